@@ -0,0 +1,53 @@
+"""
+Benchmark of the import time of the depio modules, e.g., the cost every slurm worker pays to unpickle a task.
+
+    python benchmarks/bench_import_time.py --repeat 10
+
+Each import runs in a fresh interpreter with -X importtime. Reports the median of the cumulative import time and the
+heavy dependencies that got imported along the way.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+MODULES = ["depio.Task", "depio.Executors", "depio.Pipeline"]
+HEAVY_DEPENDENCIES = ["submitit", "rich", "termcolor", "tabulate", "werkzeug"]
+
+
+def measure(module: str):
+    """
+    :return: The cumulative import time of the module in seconds and the heavy dependencies it imported.
+    """
+    env = {**os.environ, "PYTHONPATH": f"{SRC}{os.pathsep}{os.environ.get('PYTHONPATH', '')}"}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True, env=env)
+    cumulative, imported = None, set()
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        if name == module:
+            cumulative = int(fields[1]) / 1e6
+        if name.split(".")[0] in HEAVY_DEPENDENCIES:
+            imported.add(name.split(".")[0])
+    return cumulative, sorted(imported)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        measurements = [measure(module) for _ in range(args.repeat)]
+        median = statistics.median(m[0] for m in measurements)
+        print(f"{module}: {median * 1000:.1f}ms, heavy dependencies: {', '.join(measurements[0][1]) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark of the memory the driver needs for the DAG, i.e., for the tasks and their dependencies before anything runs.
+
+    python benchmarks/bench_memory.py --tasks 100000 1000000
+
+Each size runs in a fresh interpreter. The tasks form a binary tree: each task depends on the product of its parent
+and on a config file that all tasks share. Reports the growth of the resident memory after adding the tasks and
+solving the order, per task.
+"""
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Annotated
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from depio.BuildMode import BuildMode  # noqa: E402
+from depio.Executors import SequentialExecutor  # noqa: E402
+from depio.Pipeline import Pipeline  # noqa: E402
+from depio.Task import Dependency, Product  # noqa: E402
+
+
+def step(config: Annotated[Path, Dependency], parent: Annotated[Path, Dependency], out: Annotated[Path, Product],
+         seed: int):
+    pass
+
+
+def get_rss() -> int:
+    """
+    :return: The resident memory of the process in bytes.
+    """
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(n: int, tmp_dir: Path) -> None:
+    config = tmp_dir / "config.yaml"
+    config.touch()
+    gc.collect()
+    rss_before = get_rss()
+    start = time.perf_counter()
+
+    pipeline = Pipeline(SequentialExecutor(), quiet=True, depio_dir=tmp_dir / ".depio")
+    points = ({"parent": Path(f"out/{(i - 1) // 2}.pt") if i > 0 else None, "out": Path(f"out/{i}.pt"), "seed": i}
+              for i in range(n))
+    pipeline.add_sweep(step, points, func_kwargs={"config": Path(config)}, buildmode=BuildMode.ALWAYS)
+    pipeline._solve_order()
+    pipeline._init_scheduling_state()
+
+    duration = time.perf_counter() - start
+    gc.collect()
+    rss = get_rss() - rss_before
+    print(f"{n} tasks: {rss / 1024 ** 2:.0f} MB ({rss / n:.0f} bytes/task), built in {duration:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)  # Measure in this interpreter
+    args = parser.parse_args()
+
+    if args.single:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            measure(args.tasks[0], Path(tmp_dir))
+        return
+
+    for n in args.tasks:
+        subprocess.run([sys.executable, __file__, "--single", "--tasks", str(n)], check=True)
+
+
+if __name__ == "__main__":
+    main()
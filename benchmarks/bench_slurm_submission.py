@@ -0,0 +1,82 @@
+"""
+Benchmark of the submission of a large DAG to slurm, against a stub sbatch that only hands out job ids.
+
+    python benchmarks/bench_slurm_submission.py --chains 100 --length 100
+
+The DAG consists of independent chains of tasks, i.e., it is deep and wide at once. The pipeline runs in detached mode,
+hence the measured time is the time to submit the whole DAG. Reports the number of sbatch calls as well.
+"""
+import argparse
+import os
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import submitit  # noqa: E402
+
+from depio.BuildMode import BuildMode  # noqa: E402
+from depio.Executors import SubmitItExecutor  # noqa: E402
+from depio.Pipeline import Pipeline  # noqa: E402
+from depio.Task import Task  # noqa: E402
+
+STUB_SBATCH = """#!/bin/sh
+# Hands out increasing job ids and logs the dependency of each call.
+n=$(cat "{counter}" 2>/dev/null || echo 1000)
+n=$((n + 1))
+echo $n > "{counter}"
+grep -h "^#SBATCH --dependency" "$@" >> "{log}" 2>/dev/null || echo "none" >> "{log}"
+echo "Submitted batch job $n"
+"""
+
+
+def step(chain: int, i: int):
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chains", type=int, default=100)
+    parser.add_argument("--length", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        sbatch = tmp / "bin" / "sbatch"
+        sbatch.parent.mkdir()
+        sbatch.write_text(STUB_SBATCH.format(counter=tmp / "counter", log=tmp / "sbatch.log"))
+        sbatch.chmod(sbatch.stat().st_mode | stat.S_IEXEC)
+        srun = sbatch.parent / "srun"  # submitit checks for it, but it is not called
+        srun.write_text("#!/bin/sh\n")
+        srun.chmod(srun.stat().st_mode | stat.S_IEXEC)
+        os.environ["PATH"] = f"{sbatch.parent}{os.pathsep}{os.environ['PATH']}"
+
+        internal_executor = submitit.AutoExecutor(folder=tmp / "slurm", cluster="slurm")
+        internal_executor._executor._throttling = 0.0  # No real controller to protect
+        executor = SubmitItExecutor(internal_executor=internal_executor, parameters={"slurm_time": 10})
+        pipeline = Pipeline(executor, name="bench", quiet=True, depio_dir=tmp / "depio", detached=True)
+
+        start = time.perf_counter()
+        for chain in range(args.chains):
+            previous = None
+            for i in range(args.length):
+                previous = pipeline.add_task(Task(f"step_{chain}_{i}", step, [chain, i], buildmode=BuildMode.ALWAYS,
+                                                  depends_on=[previous] if previous is not None else []))
+        built = time.perf_counter()
+
+        try:
+            pipeline.run()
+        except SystemExit:
+            pass
+        submitted = time.perf_counter()
+
+        num_sbatch = len((tmp / "sbatch.log").read_text().splitlines())
+        print(f"{args.chains * args.length} tasks: built the DAG in {built - start:.2f}s, "
+              f"submitted it in {submitted - built:.2f}s with {num_sbatch} sbatch calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of the routing of print calls to the output buffers of the tasks, i.e., the throughput of the
+LocalProxy against the StreamRouter with and without line buffering.
+
+    python benchmarks/bench_stdout_proxy.py --threads 8 --lines 100000
+
+Each thread gets redirected to a buffer of its own and prints the given number of lines.
+"""
+import argparse
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from depio.OutputCapture import OutputCapture  # noqa: E402
+from depio.stdio_helpers import LocalProxy, StreamRouter, _get_stream, redirect, stop_redirect  # noqa: E402
+
+
+def printing_thread(stream, buffer, lines: int):
+    redirect(buffer)
+    for i in range(lines):
+        print("step", i, "loss", 0.5, file=stream)
+    stop_redirect()
+
+
+def measure(stream, make_buffer, threads: int, lines: int) -> float:
+    """
+    :return: The number of printed lines per second.
+    """
+    workers = [threading.Thread(target=printing_thread, args=(stream, make_buffer(), lines)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * lines / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lines", type=int, default=100000)
+    args = parser.parse_args()
+
+    original = io.StringIO()
+    proxies = {
+        "LocalProxy": LocalProxy(_get_stream(original)),
+        "StreamRouter": StreamRouter(original, "stdout"),
+        "StreamRouter, line buffering": StreamRouter(original, "stdout", line_buffering=True),
+    }
+    buffers = {"StringIO": io.StringIO, "OutputCapture": lambda: OutputCapture(max_size=64 * 1024)}
+    for buffer_name, make_buffer in buffers.items():
+        for proxy_name, proxy in proxies.items():
+            throughput = measure(proxy, make_buffer, args.threads, args.lines)
+            print(f"{proxy_name} -> {buffer_name}: {throughput / 1e6:.2f}M lines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark of the creation of the tasks of a parameter sweep, i.e., of Task() alone, of Task() and Pipeline.add_task in
+a loop and of Pipeline.add_sweep. The last scenario adds all tasks a second time, i.e., it measures the deduplication
+by Task.__hash__ and Task.__eq__.
+
+    python benchmarks/bench_task_creation.py --tasks 100000
+
+The function of the tasks has a dependency and a product annotated, like a typical training function.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Annotated, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from depio.BuildMode import BuildMode  # noqa: E402
+from depio.Executors import SequentialExecutor  # noqa: E402
+from depio.Pipeline import Pipeline  # noqa: E402
+from depio.Task import Dependency, Product, Task  # noqa: E402
+
+
+def train(data: Annotated[Path, Dependency], out: Annotated[Path, Product], lr: float, seed: int):
+    pass
+
+
+def create(n: int) -> List[Task]:
+    return [Task(f"train_{i}", train, func_kwargs=dict(data=Path("data.csv"), out=Path(f"out/{i}.pt"), lr=0.1, seed=i),
+                 buildmode=BuildMode.ALWAYS) for i in range(n)]
+
+
+def loop(n: int) -> Pipeline:
+    pipeline = Pipeline(SequentialExecutor(), quiet=True)
+    for i in range(n):
+        pipeline.add_task(Task(f"train_{i}", train, func_kwargs=dict(data=Path("data.csv"), out=Path(f"out/{i}.pt"),
+                                                                     lr=0.1, seed=i), buildmode=BuildMode.ALWAYS))
+    return pipeline
+
+
+def sweep(n: int) -> Pipeline:
+    pipeline = Pipeline(SequentialExecutor(), quiet=True)
+    pipeline.add_sweep(train, [dict(out=Path(f"out/{i}.pt"), seed=i) for i in range(n)], name="train_{seed}",
+                       func_kwargs=dict(data=Path("data.csv"), lr=0.1), buildmode=BuildMode.ALWAYS)
+    return pipeline
+
+
+def add_twice(n: int) -> Pipeline:
+    pipeline = Pipeline(SequentialExecutor(), quiet=True)
+    for task in create(n) + create(n):
+        pipeline.add_task(task)
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100000)
+    args = parser.parse_args()
+
+    scenarios = [("Task() only", create), ("Task() + add_task in a loop", loop), ("add_sweep", sweep),
+                 ("Task() + add_task of every task twice", add_twice)]
+    for name, scenario in scenarios:
+        start = time.perf_counter()
+        result = scenario(args.tasks)
+        duration = time.perf_counter() - start
+        tasks = result if isinstance(result, list) else result.tasks
+        print(f"{name}: {len(tasks)} tasks in {duration:.2f}s ({len(tasks) / duration:.0f} tasks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,3 +6,4 @@ class BuildMode(enum.Enum):
     IF_MISSING = enum.auto()
     ALWAYS = enum.auto()
     IF_NEW = enum.auto()
+    IF_CHANGED = enum.auto()
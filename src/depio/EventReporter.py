@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, TextIO, Union
+
+from .Task import Task
+
+
+class EventReporter:
+    """
+    Writes the progress of a pipeline as JSON lines, one event per line, e.g., for CI logs or dashboards.
+    Unlike the UI, it does not need a terminal. Each event has the fields "event" and "time", the events of a task
+    have the fields "task" (queue id), "name", "identity" and "slurm_id" in addition.
+    """
+
+    def __init__(self, target: Union[str, Path, TextIO], flush_interval: float = 1.0):
+        """
+        :param target: Path of a file, "tcp://host:port", "unix:///path/of/socket" or a writable text stream.
+            The file or socket gets opened with the first event.
+        :param flush_interval: Maximum number of seconds an event stays in the buffer.
+        """
+        self.target: Union[str, Path, TextIO] = target
+        self.flush_interval: float = flush_interval
+        self._stream: Optional[TextIO] = None
+        self._socket: Optional[socket.socket] = None
+        self._owns_stream: bool = False
+        self._last_flush_time: float = 0.0
+        self._lock = threading.Lock()  # Events are reported by the threads of the executors as well
+
+    def _open(self) -> TextIO:
+        if hasattr(self.target, "write"):
+            return self.target
+
+        self._owns_stream = True
+        target = str(self.target)
+        if target.startswith("tcp://"):
+            host, port = target[len("tcp://"):].rsplit(":", 1)
+            self._socket = socket.create_connection((host, int(port)))
+            return self._socket.makefile("w", encoding="utf-8")
+        if target.startswith("unix://"):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(target[len("unix://"):])
+            return self._socket.makefile("w", encoding="utf-8")
+
+        path = Path(target)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return open(path, "a", encoding="utf-8")
+
+    def emit(self, event: str, **fields: Any) -> None:
+        line = json.dumps({"event": event, "time": time.time(), **fields}, default=str)
+        with self._lock:
+            if self._stream is None:
+                self._stream = self._open()
+            self._stream.write(line + "\n")
+            if time.time() - self._last_flush_time >= self.flush_interval:
+                self._stream.flush()
+                self._last_flush_time = time.time()
+
+    def emit_task(self, event: str, task: Task, **fields: Any) -> None:
+        self.emit(event, task=task._queue_id, name=task.name, identity=task.identity, slurm_id=task.slurmid or None,
+                  **fields)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._stream is not None:
+                self._stream.flush()
+                self._last_flush_time = time.time()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._stream is None:
+                return
+            self._stream.flush()
+            if self._owns_stream:
+                self._stream.close()
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+            self._stream = None
+
+
+__all__ = [EventReporter]
@@ -1,12 +1,23 @@
+from __future__ import annotations
+
 import concurrent.futures
+import math
+import multiprocessing
+import subprocess
+import threading
+import traceback
 from abc import ABC, abstractmethod
 from concurrent.futures.thread import ThreadPoolExecutor
-from typing import List
-import submitit
+from concurrent.futures.process import ProcessPoolExecutor
+from typing import List, Callable, Dict, Tuple
 from attrs import frozen
 from pathlib import Path
 
-from .Task import Task
+from .Resources import Resources
+from .Task import Task, TaskRunResult
+from .TaskStatus import TaskStatus
+from .stdio_helpers import enable_proxy
+from .SlurmStatePoller import SlurmStatePoller
 
 
 class AbstractTaskExecutor(ABC):
@@ -22,10 +33,24 @@ class AbstractTaskExecutor(ABC):
         self.max_jobs_pending = max_jobs_pending
         self.max_jobs_queued = max_jobs_queued
 
+        # Gets set by the Pipeline, if it runs in event-driven mode.
+        self.on_task_done: Callable[[Task], None] | None = None
+        # Gets set by the Pipeline to journal the ids of submitted slurm jobs.
+        self.on_task_submitted: Callable[[Task], None] | None = None
+
     @abstractmethod
     def submit(self, task, task_dependencies: List[Task] = None):
         ...
 
+    def submit_tasks(self, tasks: List[Task]) -> None:
+        """
+        Submit a batch of tasks whose dependencies are all submitted already.
+        Executors can override this to submit the batch more efficiently, e.g., as job arrays.
+        :param tasks: The tasks to submit.
+        """
+        for task in tasks:
+            self.submit(task, task.task_dependencies)
+
     @abstractmethod
     def wait_for_all(self):
         ...
@@ -38,6 +63,62 @@ class AbstractTaskExecutor(ABC):
     def handles_dependencies(self):
         ...
 
+    def needs_runtime_history(self) -> bool:
+        """
+        Whether the executor uses the expected durations and peak memory of the tasks from earlier runs, i.e., whether
+        the pipeline has to record and load them.
+        """
+        return False
+
+    def set_on_task_done(self, callback: Callable[[Task], None] | None) -> None:
+        """
+        Register a callback that is called with the task, once a submitted task reached a terminal state.
+        :param callback: The callback. None disables the notifications.
+        """
+        self.on_task_done = callback
+
+    def resubmit(self, task: Task) -> None:
+        """
+        Submit a task again, e.g., after its last attempt failed. Its dependencies are terminal or submitted already.
+        """
+        task.reset()
+        self.submit(task, task.task_dependencies)
+
+    def reattach(self, tasks: List[Task], job_id: str) -> bool:
+        """
+        Track a job that got submitted by an earlier run of the pipeline, instead of submitting the tasks again.
+        :param tasks: The tasks that run in the job, more than one if they are packed.
+        :return: False, if the executor is not able to reattach to the job. The default implementation is not.
+        """
+        return False
+
+    def reattach_jobs(self, jobs: Dict[str, List[Task]]) -> List[str]:
+        """
+        Reattach to several jobs at once, see reattach.
+        :param jobs: Mapping from the job ids to the tasks that run in them.
+        :return: The ids of the jobs the executor reattached to. The tasks of the other jobs have to be submitted again.
+        """
+        return [job_id for job_id, tasks in jobs.items() if self.reattach(tasks, job_id)]
+
+    def set_on_task_submitted(self, callback: Callable[[Task], None] | None) -> None:
+        self.on_task_submitted = callback
+
+    def _notify_task_submitted(self, task: Task) -> None:
+        if self.on_task_submitted is not None:
+            self.on_task_submitted(task)
+
+    def _notify_task_done(self, task: Task) -> None:
+        if self.on_task_done is not None:
+            self.on_task_done(task)
+
+    def poll(self) -> None:
+        """
+        Give the executor the chance to check for state changes of submitted tasks.
+        Executors that are not able to notify about finished tasks by themselves (e.g., Slurm) can use this
+        to call the on_task_done callback. The default implementation does nothing.
+        """
+        pass
+
     @property
     def has_jobs_queued_limit(self):
         return self.max_jobs_queued is not None
@@ -61,7 +142,15 @@ class SequentialExecutor(AbstractTaskExecutor):
         print("==========================================================")
         print(f"I'm going to run task <{task.name}> now")
         print("==========================================================")
-        task.run()
+        try:
+            task.run()
+        except Exception:
+            # Like the other executors, a task that recorded its failure, e.g., to get retried, does not stop the run
+            if not task.is_in_failed_terminal_state and task.status[0] != TaskStatus.RETRYING:
+                raise
+            task.stderr.write(traceback.format_exc())
+        finally:
+            self._notify_task_done(task)
 
     def wait_for_all(self):
         pass
@@ -75,30 +164,182 @@ class SequentialExecutor(AbstractTaskExecutor):
 
 class ParallelExecutor(AbstractTaskExecutor):
 
-    def __init__(self, internal_executor: concurrent.futures.Executor = None, max_jobs_pending: int = None, max_jobs_queued: int = None, **kwargs):
+    def __init__(self, internal_executor: concurrent.futures.Executor = None, max_jobs_pending: int = None, max_jobs_queued: int = None,
+                 resources: Resources = None, placement: str = "first-fit", **kwargs):
+        """
+        :param resources: Capacity of the node, e.g., Resources.of_local_machine(). If given, a task only starts while
+            its requirements, as given by its slurm_parameters, fit into the free capacity. Waiting tasks are admitted in
+            the order of their priority and critical path length.
+        :param placement: "first-fit" admits every waiting task that fits. "best-fit" admits the task that leaves the
+            least capacity unused first.
+        """
         super().__init__(max_jobs_pending=max_jobs_pending, max_jobs_queued=max_jobs_queued)
-        self.internal_executor = internal_executor if internal_executor is not None else ThreadPoolExecutor()
+        if placement not in ("first-fit", "best-fit"):
+            raise ValueError(f"Unknown placement {placement!r}, use 'first-fit' or 'best-fit'.")
+        if internal_executor is None:
+            # The default pool has at most 32 workers, which would cap the number of tasks on large nodes.
+            max_workers = max(1, int(resources.cpus)) if resources is not None else None
+            internal_executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.internal_executor = internal_executor
+        self.capacity: Resources | None = resources
+        self.available: Resources | None = resources
+        self.placement: str = placement
+        self.waiting_tasks: List[Tuple[int, Task, Resources]] = []  # (submission index, task, requirements)
+        self._num_submitted: int = 0
+        self._lock = threading.RLock()
         self.running_jobs = []
         self.running_tasks = []
         print("depio-ParallelExecutor initialized")
 
     def submit(self, task, task_dependencies: List[Task] = None):
-        job = self.internal_executor.submit(task.run)
+        if self.capacity is None:
+            self._start(task)
+            return
+
+        requirements = Resources.from_slurm_parameters(task.slurm_parameters)
+        if not requirements.fits_into(self.capacity):
+            task.stderr.write(f"The task requires {requirements}, which exceeds the capacity {self.capacity}.\n")
+            task.set_to_failed()
+            self._notify_task_done(task)
+            return
+
+        with self._lock:
+            self.waiting_tasks.append((self._num_submitted, task, requirements))
+            self._num_submitted += 1
+            # Start them under the lock, such that wait_for_all never sees a task neither waiting nor running
+            for admitted_task, admitted_requirements in self._admit_waiting_tasks():
+                self._start(admitted_task, admitted_requirements)
+
+    def _start(self, task: Task, requirements: Resources = None) -> None:
+        with self._lock:
+            job = self.internal_executor.submit(task.run)
+            self.running_jobs.append(job)
+            self.running_tasks.append(task)
+        job.add_done_callback(lambda _: self._on_job_done(task, requirements))
+
+    def _on_job_done(self, task: Task, requirements: Resources | None) -> None:
+        if requirements is not None:
+            with self._lock:
+                self.available = self.available + requirements
+                for admitted_task, admitted_requirements in self._admit_waiting_tasks():
+                    self._start(admitted_task, admitted_requirements)
+        self._notify_task_done(task)
+
+    def _admit_waiting_tasks(self) -> List[Tuple[Task, Resources]]:
+        """
+        Allocate the free capacity to the waiting tasks. Must be called with the lock held.
+        If the first waiting task does not fit, the capacity it lacks is reserved for it. Otherwise, a stream of smaller
+        tasks behind it could take every freed CPU and starve it.
+        :return: The admitted tasks.
+        """
+        # Highest priority first, then longest critical path, then in the order of submission
+        self.waiting_tasks.sort(key=lambda w: (-w[1].priority, -w[1].critical_path_length, w[0]))
+        admitted = []
+        while len(self.waiting_tasks) > 0:
+            head = self.waiting_tasks[0][2]
+            free = self.available if head.fits_into(self.available) else self.available.after_reserving(head)
+            fitting = [w for w in self.waiting_tasks if w[2].fits_into(free)]
+            if len(fitting) == 0:
+                break
+            if self.placement == "best-fit":
+                fitting = [min(fitting, key=lambda w: w[2].leftover(self.available, self.capacity))]
+            for w in fitting:
+                if w[2].fits_into(free):
+                    self.waiting_tasks.remove(w)
+                    self.available = self.available - w[2]
+                    free = free - w[2]
+                    admitted.append((w[1], w[2]))
+        return admitted
+
+    def wait_for_all(self):
+        while True:
+            with self._lock:
+                jobs = list(self.running_jobs)
+            for job in jobs:
+                job.result()
+            with self._lock:
+                if len(self.waiting_tasks) == 0 and len(self.running_jobs) == len(jobs):
+                    return
+
+    def cancel_all_jobs(self):
+        pass
+
+    def handles_dependencies(self):
+        return False
+
+
+def _run_task_in_process(task: Task) -> TaskRunResult:
+    """
+    Entry point of a worker process of the ProcessExecutor. The task is a copy, hence we send back its result.
+    """
+    return task.run_and_collect()
+
+
+class ProcessExecutor(AbstractTaskExecutor):
+    """
+    Runs the tasks in a pool of worker processes. Other than threads, the processes are not serialized by the GIL.
+    The function and the arguments of a task get pickled, so they have to be importable from the workers
+    (in particular with the "spawn" start method). The parent's tasks get updated with the status, the timings
+    and the captured output of their runs.
+    """
+
+    def __init__(self, max_workers: int = None, start_method: str = None, max_tasks_per_child: int = None,
+                 max_jobs_pending: int = None, max_jobs_queued: int = None):
+        """
+        :param max_workers: Number of worker processes. Defaults to the number of CPUs.
+        :param start_method: "fork", "spawn" or "forkserver". Defaults to the default of the platform.
+        :param max_tasks_per_child: Number of tasks after which a worker process gets replaced (Python >= 3.11).
+            None reuses the workers for all tasks.
+        """
+        super().__init__(max_jobs_pending=max_jobs_pending, max_jobs_queued=max_jobs_queued)
+        kwargs = {}
+        if start_method is not None:
+            kwargs["mp_context"] = multiprocessing.get_context(start_method)
+        if max_tasks_per_child is not None:
+            kwargs["max_tasks_per_child"] = max_tasks_per_child
+        self.internal_executor = ProcessPoolExecutor(max_workers=max_workers, initializer=enable_proxy, **kwargs)
+        self.running_jobs = []
+        print("depio-ProcessExecutor initialized")
+
+    def submit(self, task, task_dependencies: List[Task] = None):
+        # The parent does not see when the worker picks the task up.
+        task._status = TaskStatus.PENDING
+        job = self.internal_executor.submit(_run_task_in_process, task)
+        job.add_done_callback(lambda j: self._on_job_done(task, j))
         self.running_jobs.append(job)
-        self.running_tasks.append(task)
-        return
+
+    def _on_job_done(self, task: Task, job: concurrent.futures.Future) -> None:
+        try:
+            task.apply_run_result(job.result())
+        except Exception as e:
+            # E.g., the task could not be pickled or the worker died
+            task.stderr.write(f"Running the task in a worker process failed: {e!r}\n")
+            task.set_to_failed()
+        self._notify_task_done(task)
 
     def wait_for_all(self):
         for job in self.running_jobs:
             job.result()
 
     def cancel_all_jobs(self):
-        pass
+        for job in self.running_jobs:
+            job.cancel()
 
     def handles_dependencies(self):
         return False
 
 
+def _run_packed_tasks(tasks: List[Task], workers: int = 1) -> List[TaskRunResult]:
+    """
+    Entry point of a packed slurm job: runs all tasks inside one allocation and returns one result per task.
+    """
+    enable_proxy()  # Route the output of each task to its own buffers
+    if workers <= 1:
+        return [task.run_and_collect() for task in tasks]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(Task.run_and_collect, tasks))
+
+
 TWO_DAYS_IN_MINUTES = 60 * 48  # 48 hours in minutes
 DEFAULT_PARAMS = {
     "slurm_time": TWO_DAYS_IN_MINUTES,
@@ -110,41 +351,300 @@ DEFAULT_PARAMS = {
 
 class SubmitItExecutor(AbstractTaskExecutor):
 
-    def __init__(self, folder: Path = None, internal_executor=None, parameters=None, max_jobs_pending: int = 45, max_jobs_queued: int = 20):
+    def __init__(self, folder: Path = None, internal_executor=None, parameters=None, max_jobs_pending: int = 45, max_jobs_queued: int = 20,
+                 min_poll_interval: float = 5.0, sacct_command="sacct", max_array_size: int = 1000,
+                 pack_size: int = 1, pack_time_budget: float = None, pack_workers: int = 1,
+                 right_sizing: bool = False, mem_margin: float = 1.5, time_margin: float = 1.5,
+                 escalation_factor: float = 2.0, max_escalations: int = 2, scontrol_command="scontrol"):
+        """
+        :param min_poll_interval: Minimum number of seconds between two sacct calls of the state poller.
+        :param sacct_command: The sacct executable used by the state poller.
+        :param max_array_size: Maximum number of tasks that get submitted together as one job array. Ready tasks with
+            the same slurm parameters and the same dependencies are grouped into job arrays. 1 disables job arrays.
+        :param pack_size: Maximum number of tasks that run inside one slurm job. 1 disables the packing.
+        :param pack_time_budget: Maximum sum of the expected durations (in minutes) of the tasks inside one slurm job.
+            Tasks without an expected duration only count towards the pack_size.
+        :param pack_workers: Number of threads that run the tasks of one packed job. 1 runs them sequentially.
+        :param right_sizing: Request memory and time based on the measured usage of earlier runs of equivalent tasks,
+            unless set in the slurm_parameters of the task. Resubmit jobs that ran out of memory or time with
+            escalated requests.
+        :param mem_margin: Factor applied to the measured peak memory.
+        :param time_margin: Factor applied to the measured duration.
+        :param escalation_factor: Factor applied to the memory or time of a job that ran out of it.
+        :param max_escalations: Maximum number of resubmissions of a task.
+        :param scontrol_command: The scontrol executable, used to point the dependent jobs to a resubmitted job.
+        """
         super().__init__(max_jobs_pending=max_jobs_pending, max_jobs_queued=max_jobs_queued)
+        self.default_parameters = parameters if parameters is not None else DEFAULT_PARAMS
+        self.folder: Path | None = folder
 
         # Overwrite with a default executor.
         if internal_executor is None:
+            import submitit  # Imported on first use, the other executors and the slurm workers do not need it
             internal_executor = submitit.AutoExecutor(folder=folder)
-            internal_executor.update_parameters(**parameters)
 
         self.internal_executor = internal_executor
-        self.default_parameters = parameters if parameters is not None else DEFAULT_PARAMS
         self.internal_executor.update_parameters(**self.default_parameters)
+        self.max_array_size: int = max_array_size
+        self.pack_size: int = pack_size
+        self.pack_time_budget: float | None = pack_time_budget
+        self.pack_workers: int = pack_workers
+        self.packs: Dict[str, List[Task]] = {}  # job id -> tasks of a packed job
+
+        self.right_sizing: bool = right_sizing
+        self.mem_margin: float = mem_margin
+        self.time_margin: float = time_margin
+        self.escalation_factor: float = escalation_factor
+        self.max_escalations: int = max_escalations
+        self.scontrol_command: str = scontrol_command
+        self.escalations: Dict[int, Dict[str, int]] = {}  # id(task) -> number of escalations per resource
 
         self.slurmjobs = []
+        self.state_poller = SlurmStatePoller(sacct_command=sacct_command, min_poll_interval=min_poll_interval,
+                                             apply_state=self._apply_slurmstate)
         print("depio-SubmitItExecutor initialized")
 
-    def submit(self, task, task_dependencies: List[Task] = None):
-        slurm_additional_parameters = {}
+    def needs_runtime_history(self) -> bool:
+        return self.right_sizing
+
+    def _get_parameters(self, task: Task) -> Dict:
+        params = {**self.default_parameters, **task.slurm_parameters}
+        if not self.right_sizing:
+            return params
 
+        if "slurm_mem" not in task.slurm_parameters and task.expected_peak_mem is not None:
+            params["slurm_mem"] = math.ceil(task.expected_peak_mem * self.mem_margin)
+        if "slurm_time" not in task.slurm_parameters and task.expected_duration is not None:
+            params["slurm_time"] = max(1, math.ceil(task.expected_duration * self.time_margin / 60))
+
+        escalations = self.escalations.get(id(task), {})
+        if escalations.get("mem", 0) > 0 and "slurm_mem" in params:
+            mem = Resources.from_slurm_parameters({"slurm_mem": params["slurm_mem"]}).mem
+            params["slurm_mem"] = math.ceil(mem * self.escalation_factor ** escalations["mem"])
+        if escalations.get("time", 0) > 0 and isinstance(params.get("slurm_time"), (int, float)):
+            params["slurm_time"] = math.ceil(params["slurm_time"] * self.escalation_factor ** escalations["time"])
+        return params
+
+    def _apply_slurmstate(self, task: Task, slurmstate: str) -> None:
+        """
+        Apply the state reported by the poller. With right-sizing, a job that ran out of memory or time gets
+        resubmitted with escalated requests instead of failing the task and its dependents.
+        """
+        resource = {"OUT_OF_MEMORY": "mem", "TIMEOUT": "time"}.get(slurmstate)
+        escalations = self.escalations.setdefault(id(task), {})
+        if (not self.right_sizing or resource is None or task.packed or task.is_in_terminal_state
+                or sum(escalations.values()) >= self.max_escalations):
+            task.set_slurmstate(slurmstate)
+            return
+
+        print(f"Task {task.name}: slurm job {task.slurmjob.job_id} ended with {slurmstate}, resubmitting it.")
+        escalations[resource] = escalations.get(resource, 0) + 1
+        task.failed_attempts.append(slurmstate)  # Shown by the UI and noted in the output by the reset
+        self.resubmit(task)
+
+    def _get_slurmjob(self, job_id: str):
+        import submitit
+        return submitit.SlurmJob(folder=self.folder, job_id=job_id)
+
+    def reattach(self, tasks: List[Task], job_id: str) -> bool:
+        return job_id in self.reattach_jobs({job_id: tasks})
+
+    def reattach_jobs(self, jobs: Dict[str, List[Task]]) -> List[str]:
+        if self.folder is None or len(jobs) == 0:
+            return []
+        # A job that sacct does not report anymore (e.g., purged or from another cluster) would never get updated by
+        # the poller, hence its tasks would never settle. Confirm all jobs with one query and resubmit the others.
+        try:
+            states = self.state_poller.query_states(list(jobs.keys()))
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Querying the states of the jobs of the earlier run failed: {e}")
+            return []
+        reattached = []
+        for job_id, tasks in jobs.items():
+            if job_id in states:
+                self._register_slurmjob(tasks, self._get_slurmjob(job_id))
+                reattached.append(job_id)
+        return reattached
+
+    def resubmit(self, task: Task) -> None:
+        # The job of a resubmitted task runs on its own, even if it was packed before.
+        self.state_poller.untrack(task)
+        self.packs.pop(str(task.slurmjob.job_id), None)
+        super().resubmit(task)
+        self._update_dependent_jobs(task)
+
+    def _update_dependent_jobs(self, task: Task) -> None:
+        """
+        Point the jobs of the dependent tasks, which wait for the old job of the task, to the new one.
+        """
+        job_ids = {}
+        for dependent_task in task.dependent_tasks:
+            if dependent_task.slurmjob is not None and not dependent_task.is_in_terminal_state:
+                job_ids[str(dependent_task.slurmjob.job_id)] = self._get_afterok(dependent_task.task_dependencies)
+        for job_id, afterok in job_ids.items():
+            command = [self.scontrol_command, "update", f"JobId={job_id}", f"Dependency=afterok:{':'.join(afterok)}"]
+            try:
+                subprocess.run(command, capture_output=True, text=True, check=True)
+            except (subprocess.CalledProcessError, OSError) as e:
+                print(f"Updating the dependencies of slurm job {job_id} failed: {e}")
+
+    @staticmethod
+    def _get_afterok(task_dependencies: List[Task]) -> List[str]:
         tasks_with_slurmjob = [t for t in task_dependencies if t.slurmjob is not None]
-        afterok: List[str] = [f"{t.slurmjob.job_id}" for t in tasks_with_slurmjob]
+        return [f"{t.slurmjob.job_id}" for t in tasks_with_slurmjob]
 
-        if len(afterok) > 0:
+    @staticmethod
+    def _get_aftercorr(task_dependencies: List[Task]) -> Tuple[Tuple[str, ...], int] | None:
+        """
+        If all submitted dependencies are elements of job arrays with the same index, e.g., "12_3" and "15_3",
+        return the ids of the arrays and the index. Then, the task can be the element with this index of an array that
+        depends on these arrays by aftercorr.
+        """
+        job_ids = [str(t.slurmjob.job_id) for t in task_dependencies if t.slurmjob is not None and not t.packed]
+        if len(job_ids) == 0 or len(job_ids) != sum(1 for t in task_dependencies if t.slurmjob is not None):
+            return None
+        if any(job_id.count("_") != 1 for job_id in job_ids):
+            return None
+        bases, indices = zip(*(job_id.split("_") for job_id in job_ids))
+        if len(set(indices)) != 1 or not indices[0].isdigit():
+            return None
+        return tuple(sorted(set(bases))), int(indices[0])
+
+    def _update_parameters(self, params: Dict, afterok: List[str], aftercorr: Tuple[str, ...] = ()) -> None:
+        slurm_additional_parameters = {}
+        if len(aftercorr) > 0:
+            slurm_additional_parameters["dependency"] = f"aftercorr:{':'.join(aftercorr)}"
+        elif len(afterok) > 0:
             slurm_additional_parameters["dependency"] = f"afterok:{':'.join(afterok)}"
-
-        if task.slurm_parameters is not None:
-            params = task.slurm_parameters
-        else:
-            params = self.default_parameters
         self.internal_executor.update_parameters(**params, slurm_additional_parameters=slurm_additional_parameters)
 
-        slurmjob = self.internal_executor.submit(task.run)
-        task.slurmjob = slurmjob
+    def _submit_array(self, units: List[List[Task]]) -> None:
+        with self.internal_executor.batch():
+            slurmjobs = [self._submit_unit(unit) for unit in units]
+        # The job ids are available after leaving the batch context
+        for unit, slurmjob in zip(units, slurmjobs):
+            self._register_slurmjob(unit, slurmjob)
+
+    def _submit_correlated_arrays(self, tasks: List[Task]) -> List[Task]:
+        """
+        Submit the tasks that continue job arrays element by element (e.g., the next step of many independent chains)
+        as job arrays that depend on the arrays by aftercorr. Hence, a whole wave of such tasks needs one sbatch call
+        instead of one per task.
+        :return: The tasks that do not fit this pattern.
+        """
+        groups: Dict[Tuple[str, Tuple[str, ...]], Dict[int, Task]] = {}
+        remaining: List[Task] = []
+        for task in tasks:
+            aftercorr = self._get_aftercorr(task.task_dependencies)
+            if aftercorr is None:
+                remaining.append(task)
+                continue
+            key = (repr(sorted(self._get_parameters(task).items())), aftercorr[0])
+            group = groups.setdefault(key, {})
+            if aftercorr[1] in group:
+                remaining.append(task)
+            else:
+                group[aftercorr[1]] = task
+
+        for (_, bases), group in groups.items():
+            # The element i of the new array waits for the elements i of the arrays, hence all indices are required.
+            if len(group) < 2 or len(group) > self.max_array_size or sorted(group) != list(range(len(group))):
+                remaining.extend(group.values())
+                continue
+            units = [[group[i]] for i in range(len(group))]
+            self._update_parameters(self._get_parameters(units[0][0]), [], aftercorr=bases)
+            self._submit_array(units)
+        return remaining
+
+    def _register_slurmjob(self, tasks: List[Task], slurmjob) -> None:
+        for task in tasks:
+            task.slurmjob = slurmjob
+            task.packed = len(tasks) > 1
+            task.set_slurmstate("PENDING")
+            self.state_poller.track(task)
+            self._notify_task_submitted(task)
+        if len(tasks) > 1:
+            self.packs[str(slurmjob.job_id)] = tasks
         self.slurmjobs.append(slurmjob)
+
+    def _submit_unit(self, tasks: List[Task]):
+        if len(tasks) == 1:
+            return self.internal_executor.submit(tasks[0].run)
+        return self.internal_executor.submit(_run_packed_tasks, tasks, self.pack_workers)
+
+    def _pack(self, tasks: List[Task]) -> List[List[Task]]:
+        """
+        Split the tasks into packs that respect the pack_size and the pack_time_budget.
+        """
+        packs: List[List[Task]] = []
+        current: List[Task] = []
+        current_duration = 0.0
+        for task in tasks:
+            duration = task.expected_duration or 0.0
+            fits_budget = self.pack_time_budget is None or current_duration + duration <= self.pack_time_budget * 60
+            if len(current) > 0 and (len(current) >= self.pack_size or not fits_budget):
+                packs.append(current)
+                current, current_duration = [], 0.0
+            current.append(task)
+            current_duration += duration
+        if len(current) > 0:
+            packs.append(current)
+        return packs
+
+    def submit(self, task, task_dependencies: List[Task] = None):
+        self._update_parameters(self._get_parameters(task), self._get_afterok(task_dependencies or []))
+        self._register_slurmjob([task], self.internal_executor.submit(task.run))
         return
 
+    def submit_tasks(self, tasks: List[Task]) -> None:
+        if self.pack_size == 1 and self.max_array_size > 1:
+            tasks = self._submit_correlated_arrays(tasks)
+
+        # Group the tasks that can share one job array or packed job: same parameters and same dependencies.
+        groups: Dict[Tuple[str, Tuple[str, ...]], List[Task]] = {}
+        for task in tasks:
+            params = self._get_parameters(task)
+            afterok = self._get_afterok(task.task_dependencies)
+            key = (repr(sorted(params.items())), tuple(sorted(afterok)))
+            groups.setdefault(key, []).append(task)
+
+        for group in groups.values():
+            self._update_parameters(self._get_parameters(group[0]), self._get_afterok(group[0].task_dependencies))
+            units = self._pack(group)
+            array_size = max(self.max_array_size, 1)
+            for i in range(0, len(units), array_size):
+                chunk = units[i:i + array_size]
+                if len(chunk) == 1:
+                    self._register_slurmjob(chunk[0], self._submit_unit(chunk[0]))
+                else:
+                    self._submit_array(chunk)
+
+    def _apply_pack_results(self, tasks: List[Task]) -> None:
+        try:
+            results: List[TaskRunResult] = tasks[0].slurmjob.result()
+        except Exception as e:
+            print(f"Reading the results of the packed slurm job {tasks[0].slurmjob.job_id} failed: {e}")
+            for task in tasks:
+                task.set_to_failed()
+            return
+        for task, result in zip(tasks, results):
+            task.apply_run_result(result)
+
+    def poll(self) -> None:
+        # Slurm does not call us back, hence we ask for the states of all unfinished jobs at once.
+        self.state_poller.poll()
+
+        # A completed packed job only tells that it ran all its tasks. Each task reports its own result.
+        for job_id, tasks in list(self.packs.items()):
+            if tasks[0]._slurmstate == "COMPLETED":
+                del self.packs[job_id]
+                self._apply_pack_results(tasks)
+
+        for task in self.state_poller.get_tracked_tasks():
+            if task.is_in_terminal_state:
+                self.state_poller.untrack(task)
+                self._notify_task_done(task)
+
     def wait_for_all(self):
         for job in self.slurmjobs:
             job.result()
@@ -157,4 +657,4 @@ class SubmitItExecutor(AbstractTaskExecutor):
         return True
 
 
-__all__ = [AbstractTaskExecutor, ParallelExecutor, SequentialExecutor, SubmitItExecutor]
+__all__ = [AbstractTaskExecutor, ParallelExecutor, ProcessExecutor, SequentialExecutor, SubmitItExecutor]
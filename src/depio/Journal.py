@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, TextIO
+
+
+class Journal:
+    """
+    Append-only log of the submitted slurm jobs and of the final states of the tasks, keyed by Task.identity.
+    Each line is a JSON object. A restarted pipeline replays it to skip the finished tasks and to reattach to the
+    jobs that are still known to slurm. Lines that were cut off by a crash get ignored.
+    """
+
+    def __init__(self, path: Path):
+        """
+        :param path: Path of the journal file. The parent directory gets created on first use.
+        """
+        self.path: Path = Path(path)
+        self._file: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+    def open(self, resume: bool) -> None:
+        """
+        :param resume: Keep the records of the previous run, otherwise start a new journal.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self._write({"event": "start", "resume": resume})
+
+    def _write(self, record: Dict) -> None:
+        record["time"] = time.time()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(record) + "\n")
+            # Flushed to the OS right away, such that the record survives the death of the process.
+            self._file.flush()
+
+    def record_submitted(self, task_key: str, job_id: str) -> None:
+        self._write({"event": "submitted", "task": task_key, "job_id": job_id})
+
+    def record_status(self, task_key: str, status: str) -> None:
+        self._write({"event": "status", "task": task_key, "status": status})
+
+    def replay(self) -> Dict[str, Dict]:
+        """
+        The last known state of each task in the journal: its final status and the id of its last slurm job.
+        """
+        states: Dict[str, Dict] = {}
+        if not self.path.exists():
+            return states
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("event") == "submitted":
+                    states[record["task"]] = {"status": None, "job_id": record["job_id"]}
+                elif record.get("event") == "status":
+                    states.setdefault(record["task"], {"job_id": None})["status"] = record["status"]
+        return states
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+__all__ = [Journal]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from .Task import Task
+
+
+class Manifest:
+    """
+    Description of a pipeline that got submitted in detached mode: the tasks, their slurm jobs and their dependencies.
+    The depio command line tool reads it to report the progress, see depio.cli.
+    """
+
+    def __init__(self, name: str, tasks: List[Dict], created: float = None):
+        """
+        :param tasks: One dict per task with the keys id, name, identity, job_id, status and dependencies.
+            The job_id is None, if the task did not get submitted (e.g., it got skipped). Then, the status is final.
+        """
+        self.name: str = name
+        self.tasks: List[Dict] = tasks
+        self.created: float = created if created is not None else time.time()
+
+    @classmethod
+    def from_tasks(cls, name: str, tasks: List[Task]) -> Manifest:
+        return cls(name, [{
+            "id": task._queue_id,
+            "name": task.name,
+            "identity": task.identity,
+            "job_id": str(task.slurmjob.job_id) if task.slurmjob is not None else None,
+            "status": task.status[0].name,
+            "dependencies": [t._queue_id for t in task.task_dependencies],
+        } for task in tasks])
+
+    def write(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"name": self.name, "created": self.created, "tasks": self.tasks}, f, indent=1)
+        tmp_path.replace(path)  # Readers never see a partially written manifest
+
+    @classmethod
+    def read(cls, path: Path) -> Manifest:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["name"], data["tasks"], data["created"])
+
+
+__all__ = [Manifest]
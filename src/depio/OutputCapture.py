@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import gzip
+import threading
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Deque, Optional, TextIO
+
+
+def _read_gzip(path: Path) -> str:
+    """
+    Read a gzip file that may still be written to. Unlike gzip.open, this accepts a missing end of the stream.
+    Each time the file got opened again, e.g., by a retry, it has another gzip member.
+    """
+    data = path.read_bytes()
+    parts = []
+    while len(data) > 0:
+        decompressor = zlib.decompressobj(wbits=31)
+        parts.append(decompressor.decompress(data))
+        data = decompressor.unused_data
+    return b"".join(parts).decode("utf-8", errors="replace")
+
+
+class OutputCapture:
+    """
+    Captures an output stream of a task, e.g., its stdout. Only the last max_size characters are kept in memory.
+    If a path is given, the full stream is spilled to it, gzip-compressed if the path ends with ".gz".
+    The log file gets flushed at least every flush_interval seconds, hence it can be followed while the task runs,
+    e.g., with tail -f or zcat.
+    """
+
+    def __init__(self, path: Path = None, max_size: int = None, flush_interval: float = 1.0):
+        """
+        :param path: Log file the full stream is appended to. None keeps the stream in memory only.
+        :param max_size: Number of characters kept in memory. None keeps everything.
+        :param flush_interval: Maximum number of seconds the written output stays in the buffer of the log file.
+        """
+        self.path: Path | None = Path(path) if path is not None else None
+        self.max_size: int | None = max_size
+        self.flush_interval: float = flush_interval
+        self.truncated: bool = False  # Parts of the stream got dropped from memory
+        self._chunks: Deque[str] = deque()
+        self._size: int = 0
+        self._file: Optional[TextIO] = None
+        self._last_flush_time: float = 0.0
+        self._lock = threading.Lock()
+
+    # Stream interface, such that the capture can replace sys.stdout
+    encoding = "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def write(self, s: str) -> int:
+        with self._lock:
+            self._append(s)
+            if self.path is not None:
+                self._spill(s)
+        return len(s)
+
+    def _append(self, s: str) -> None:
+        self._chunks.append(s)
+        self._size += len(s)
+        if self.max_size is None:
+            return
+        while self._size > self.max_size:
+            excess = self._size - self.max_size
+            first = self._chunks[0]
+            if len(first) <= excess:
+                self._chunks.popleft()
+                self._size -= len(first)
+            else:
+                self._chunks[0] = first[excess:]
+                self._size -= excess
+            self.truncated = True
+
+    def _spill(self, s: str) -> None:
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.suffix == ".gz":
+                    self._file = gzip.open(self.path, "at", encoding="utf-8")
+                else:
+                    self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(s)
+            if time.time() - self._last_flush_time >= self.flush_interval:
+                self._file.flush()
+                self._last_flush_time = time.time()
+        except OSError as e:
+            # E.g., the log directory is not available on a slurm node. Keep the output in memory at least.
+            self.path = None
+            self.max_size = None
+            self._file = None
+            self._append(f"\n[depio] Spilling the output failed: {e!r}\n")
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._last_flush_time = time.time()
+
+    def close(self) -> None:
+        """
+        Close the log file. Later writes open it again.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def tail(self) -> str:
+        """
+        The output kept in memory, i.e., the last max_size characters.
+        """
+        with self._lock:
+            return "".join(self._chunks)
+
+    def getvalue(self) -> str:
+        """
+        The full output. It is read from the log file, if there is one.
+        """
+        if self.path is None:
+            return self.tail()
+        self.flush()
+        try:
+            if self.path.suffix == ".gz":
+                return _read_gzip(self.path)
+            return self.path.read_text(encoding="utf-8")
+        except (OSError, zlib.error):
+            return self.tail()
+
+    def adopt(self, text: str) -> None:
+        """
+        Take over the output of a run on a copy of the task. The copy spilled the output to the log file already.
+        """
+        with self._lock:
+            self._append(text)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_file"] = None
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+__all__ = [OutputCapture]
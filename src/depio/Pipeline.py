@@ -1,37 +1,74 @@
+from __future__ import annotations
+
+import contextlib
 import pathlib
-from logging import setLoggerClass
-from typing import Set, Dict, List
+import typing
+from typing import Set, Dict, List, Tuple
+import heapq
+import itertools
 from pathlib import Path
 import time
 import sys
 
-from rich.table import Table
-from rich.panel import Panel
-from rich.console import Group
-from rich.live import Live
-from rich.text import Text
-
 import threading
 import queue
 
-
-from termcolor import colored
-from tabulate import tabulate
-
 from .stdio_helpers import enable_proxy
-from .Task import Task
+from .file_helpers import stat_cache
+from .Task import Task, _status_texts
+from .TaskGraph import TaskGraph
 from .TaskStatus import TaskStatus
+from .BuildMode import BuildMode
+from .SignatureDatabase import SignatureDatabase
+from .RuntimeDatabase import RuntimeDatabase
+from .RetryPolicy import RetryPolicy
+from .Journal import Journal
+from .Manifest import Manifest
+from .ProgressTracker import ProgressTracker
+from .EventReporter import EventReporter
+from .OutputCapture import OutputCapture
 from .Executors import AbstractTaskExecutor
 from .exceptions import ProductAlreadyRegisteredException, TaskNotInQueueException, DependencyNotAvailableException
 
+if typing.TYPE_CHECKING:
+    from rich.panel import Panel  # Imported lazily by the render methods, see _get_command_panel
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
 
 class Pipeline:
+    # With ui="auto", pipelines with more tasks than this get the compact UI
+    COMPACT_UI_THRESHOLD = 200
+    # Characters of the stdout and stderr of each task that are kept in memory, if the output is spilled to log_dir
+    DEFAULT_MAX_OUTPUT_SIZE = 64 * 1024
+
     def __init__(self, depioExecutor: AbstractTaskExecutor, name: str = "NONAME",
                  clear_screen: bool = True,
                  hide_successful_terminated_tasks: bool = False,
                  submit_only_if_runnable: bool = False,
                  quiet: bool = False,
-                 refreshrate: float = 1.0):
+                 refreshrate: float = 1.0,
+                 event_driven: bool = False,
+                 depio_dir: Path = Path(".depio"),
+                 retry_policy: RetryPolicy = None,
+                 resume: bool = False,
+                 detached: bool = False,
+                 ui: str = "auto",
+                 ui_refreshrate: float = None,
+                 ui_max_rows: int = 20,
+                 events: typing.Union[str, Path, typing.TextIO] = None,
+                 log_dir: Path = None,
+                 max_output_size: int = None,
+                 compress_logs: bool = False,
+                 journal: bool = False,
+                 runtime_history: bool = False):
 
         # Flags
         self.CLEAR_SCREEN: bool = clear_screen
@@ -39,12 +76,46 @@ class Pipeline:
         self.REFRESHRATE: float = refreshrate
         self.HIDE_SUCCESSFUL_TERMINATED_TASKS: bool = hide_successful_terminated_tasks
         self.SUBMIT_ONLY_IF_RUNNABLE :bool = submit_only_if_runnable
+        self.EVENT_DRIVEN: bool = event_driven
+        self.RESUME: bool = resume
+        self.DETACHED: bool = detached
+        # A resumed run needs the journal, and so does a detached run to be resumed later
+        self.JOURNAL: bool = journal or resume or detached
+        # E.g., the right-sizing of the slurm jobs needs the measured usage of earlier runs
+        self.RUNTIME_HISTORY: bool = runtime_history or (depioExecutor is not None
+                                                         and depioExecutor.needs_runtime_history())
+        if ui not in ("auto", "full", "compact"):
+            raise ValueError(f"Unknown ui {ui}. Choose from 'auto', 'full' and 'compact'.")
+        self.UI: str = ui
+        self.UI_REFRESHRATE: float = ui_refreshrate if ui_refreshrate is not None else refreshrate
+        self.UI_MAX_ROWS: int = ui_max_rows
 
         self.name: str = name
-        self.handled_tasks: List[Task] = None
+        self.retry_policy: RetryPolicy | None = retry_policy  # For the tasks without a retry policy of their own
+        self.depio_dir: Path = Path(depio_dir)
+        self.signature_db: SignatureDatabase = SignatureDatabase(self.depio_dir / "signatures.sqlite")
+        self.runtime_db: RuntimeDatabase = RuntimeDatabase(self.depio_dir / "runtimes.sqlite")
+        self.journal: Journal = Journal(self.depio_dir / f"journal_{name}.jsonl")
+        self.event_reporter: EventReporter | None = EventReporter(events) if events is not None else None
+        self.log_dir: Path | None = Path(log_dir) if log_dir is not None else None
+        # With a log directory, the memory only has to hold the tail of the output
+        self.max_output_size: int | None = max_output_size if max_output_size is not None or log_dir is None \
+            else self.DEFAULT_MAX_OUTPUT_SIZE
+        self.compress_logs: bool = compress_logs
         self.tasks: List[Task] = []
         self.depioExecutor: AbstractTaskExecutor = depioExecutor
+        if self.DETACHED and (not depioExecutor.handles_dependencies() or self.SUBMIT_ONLY_IF_RUNNABLE):
+            raise ValueError("The detached mode requires an executor that handles the dependencies by itself, "
+                             "e.g., the SubmitItExecutor, and submit_only_if_runnable=False.")
         self.registered_products: Set[Path] = set()
+        self._product_owners: Dict[str, Task] = {}  # str(product) -> registering task
+        # hash(task) -> registered task, or a list of the registered tasks if their hashes collide
+        self._task_index: Dict[int, typing.Union[Task, List[Task]]] = {}
+        self._interned_paths: Dict[Path, Path] = {}  # Equal paths of the tasks share one instance
+        self.graph: TaskGraph | None = None  # The edges between the tasks, gets built by _solve_order
+        self._status_listener = self._on_task_status_change  # A bound method, shared by all tasks
+        self.progress: ProgressTracker = ProgressTracker(max_recently_failed=ui_max_rows)
+        self._last_render_time: float = 0.0
         if not self.QUIET: print("Pipeline initialized")
 
         self.paused = False
@@ -53,6 +124,18 @@ class Pipeline:
         self.last_key_press_time = 0
         self.key_sequence = []
 
+        # Executors push finished tasks into this queue, if the pipeline runs event-driven.
+        self.event_queue: queue.Queue = queue.Queue()
+
+        # Scheduling state, gets initialized by run(). All indices are task._queue_id - 1.
+        self.handled_tasks: Set[int] = set()  # Queue ids of the tasks that are submitted or settled without running
+        self._remaining_dependencies: typing.MutableSequence[int] = []  # Task dependencies that are not released yet
+        self._ready_tasks: List[Tuple[int, float, int, Task]] = []  # Heap of the tasks whose dependencies are all released
+        self._submitted_tasks: Dict[int, Task] = {}  # Submitted tasks that did not reach a terminal state yet
+        self._num_settled_tasks: int = 0  # Tasks that are handled and in a terminal state
+        self._release_on_submit: bool = False
+        self._reattached_tasks: Set[int] = set()  # Queue ids of the tasks whose jobs survived a restart
+
     def add_tasks(self, tasks: List[Task]) -> None:
         for task in tasks:
             self.add_task(task)
@@ -60,18 +143,17 @@ class Pipeline:
     def add_task(self, task: Task) -> None:
 
         # Check if the exact task is already registered
-        for registered_task in self.tasks:
-            if task == registered_task:
-                return registered_task
+        registered_task = self._find_registered_task(task)
+        if registered_task is not None:
+            return registered_task
 
 
         # Check is a product is already registered
-        products_already_registered: List[str] = [str(p) for p in task.products if
-                                                  str(p) in set(map(str, self.registered_products))]
+        products_already_registered: List[str] = [str(p) for p in task.products if str(p) in self._product_owners]
         if len(products_already_registered) > 0:
             print(task.cleaned_args)
             for p in products_already_registered:
-                t = [t for t in self.tasks if str(p) in set(map(str, t.products))][0]
+                t = self._product_owners[p]
                 print(f"Product {p} is already registered by task {t.name}. Now again registered by task {task.name}.")
             raise ProductAlreadyRegisteredException(
                 f"The product/s {products_already_registered} is/are already registered. "
@@ -79,55 +161,143 @@ class Pipeline:
 
 
         # Check if the task dependencies are registered already
-        missing_tasks: List[Task] = [t for t in task.dependencies if isinstance(t, Task) and t not in self.tasks]
+        missing_tasks: List[Task] = [t for t in task.dependencies
+                                     if isinstance(t, Task) and self._find_registered_task(t) is None]
         if len(missing_tasks) > 0:
             raise TaskNotInQueueException(f"Add the tasks into the queue in the correct order. "
                                           f"The following task/s is/are missing: {missing_tasks}.")
 
+        self._intern_paths(task)
+
         # Register products
         self.registered_products.update(task.products)
+        for p in task.products:
+            self._product_owners[str(p)] = task
 
         # Register task
+        if task.buildmode == BuildMode.IF_CHANGED:
+            task.signature_db = self.signature_db
+        if task.retry_policy is None:
+            task.retry_policy = self.retry_policy
         self.tasks.append(task)
+        self._index_task(task)
         task._queue_id = len(self.tasks)  # TODO Fix this!
+        task.status_listener = self._status_listener
+        if self.log_dir is not None or self.max_output_size is not None:
+            task.configure_output(self.log_dir, self.max_output_size, self.compress_logs)
+        self.progress.add(task)
         return task
 
+    def add_sweep(self, func: typing.Callable,
+                  grid: typing.Union[Dict[str, typing.Iterable], typing.Iterable[Dict[str, typing.Any]]],
+                  name: str = None, func_kwargs: Dict[str, typing.Any] = None, **task_kwargs) -> List[Task]:
+        """
+        Add one task per point of a parameter sweep. The annotations of the function are parsed only once.
+        :param func: The function of the tasks.
+        :param grid: Either a mapping from parameter names to values, whose cartesian product is swept, or the points
+            themselves, i.e., an iterable of mappings from parameter names to values.
+        :param name: Name of the tasks, formatted with the parameters of each point, e.g., "train_{lr}_{seed}".
+            Defaults to the name of the function and the index of the point.
+        :param func_kwargs: Arguments that are the same for all tasks. The points override them.
+        :param task_kwargs: Further arguments for each Task, e.g., buildmode or depends_on.
+        :return: The registered tasks, in the order of the points.
+        """
+        if isinstance(grid, dict):
+            keys = list(grid.keys())
+            points = (dict(zip(keys, values)) for values in itertools.product(*grid.values()))
+        else:
+            points = grid
+        func_kwargs = func_kwargs or {}
+        func_name = getattr(func, "__name__", "task")
+
+        tasks: List[Task] = []
+        for i, point in enumerate(points):
+            task_name = name.format(**point) if name is not None else f"{func_name}_{i}"
+            tasks.append(self.add_task(Task(task_name, func, func_kwargs={**func_kwargs, **point}, **task_kwargs)))
+        return tasks
+
+    def _find_registered_task(self, task: Task) -> Task | None:
+        """
+        Look up a registered task that is equal to the given one. The index narrows the candidates down to the tasks
+        with the same hash, the final decision is still made by Task.__eq__.
+        """
+        candidates = self._task_index.get(hash(task), ())
+        for registered_task in (candidates,) if isinstance(candidates, Task) else candidates:
+            if task == registered_task:
+                return registered_task
+        return None
+
+    def _index_task(self, task: Task) -> None:
+        key = hash(task)
+        registered = self._task_index.get(key)
+        if registered is None:
+            self._task_index[key] = task  # Most tasks have a hash of their own, hence they do without a list
+        elif isinstance(registered, Task):
+            self._task_index[key] = [registered, task]
+        else:
+            registered.append(task)
+
+    def _intern(self, value):
+        """
+        :return: The value with its paths replaced by the shared instances. Lists are copied if anything changes, they
+            may belong to the user.
+        """
+        if isinstance(value, Path):
+            return self._interned_paths.setdefault(value, value)
+        if isinstance(value, list):
+            interned = [self._intern(v) if isinstance(v, (Path, list)) else v for v in value]
+            return value if all(a is b for a, b in zip(interned, value)) else interned
+        return value
+
+    def _intern_args(self, args: Dict[str, typing.Any]) -> Dict[str, typing.Any]:
+        interned = None
+        for name, value in args.items():
+            if isinstance(value, (Path, list)):
+                new_value = self._intern(value)
+                if new_value is not value:
+                    if interned is None:
+                        interned = dict(args)  # Copy on the first change, the dict may belong to the user
+                    interned[name] = new_value
+        return args if interned is None else interned
+
+    def _intern_paths(self, task: Task) -> None:
+        """
+        Replace the paths of the task by equal instances that are shared with the other tasks, e.g., a product with the
+        dependencies on it. Large DAGs would hold thousands of copies of the same paths otherwise. The containers that
+        were passed to the task are left alone, the task gets copies of them instead.
+        """
+        task.products = self._intern(task.products)
+        task.dependencies = self._intern(task.dependencies)
+        task.func_kwargs = self._intern_args(task.func_kwargs)
+        task.cleaned_args = self._intern_args(task.cleaned_args)
+        if isinstance(task.func_args, list):
+            task.func_args = self._intern(task.func_args)
+
     def _solve_order(self) -> None:
-        # Generate a task to product mapping
-        product_to_task: Dict[Path, Task] = {}
-        for task in self.tasks:
-            for product in task.products:
-                product_to_task[product] = task
-        
         unavailable_dependencies = []
         
-        # Add the dependencies to the tasks
+        # Collect the edges between the tasks, by the indices of the tasks
+        dependency_ids: List[List[int]] = []
         for task in self.tasks:
-            # Build task dependencies list - use id() for deduplication
-            seen_ids = set()
-            task.task_dependencies = []
-            task.path_dependencies = []
-            
+            ids: List[int] = []
+            path_dependencies: List[Path] = []
+
             for d in task.dependencies:
                 if isinstance(d, Task):
-                    # Direct task dependency
-                    t_id = id(d)
-                    if t_id not in seen_ids:
-                        seen_ids.add(t_id)
-                        task.task_dependencies.append(d)
+                    # Direct task dependency, resolved to the registered instance
+                    ids.append(self._find_registered_task(d)._queue_id - 1)
                 else:  # Path dependency
                     # Check if path is produced by a task
-                    producing_task = product_to_task.get(d)
+                    producing_task = self._product_owners.get(str(d))
                     if producing_task is not None:
-                        t_id = id(producing_task)
-                        if t_id not in seen_ids:
-                            seen_ids.add(t_id)
-                            task.task_dependencies.append(producing_task)
+                        ids.append(producing_task._queue_id - 1)
                     else:
                         # Path dependency that must already exist
-                        task.path_dependencies.append(d)
-                        if not d.exists():
+                        path_dependencies.append(d)
+                        if not stat_cache.exists(d):
                             unavailable_dependencies.append(d)
+            dependency_ids.append(list(dict.fromkeys(ids)))  # Without duplicates, in the order of the dependencies
+            task.path_dependencies = tuple(path_dependencies)  # An empty tuple is shared, an empty list is not
         
         # Raise error if there are unavailable dependencies
         if unavailable_dependencies:
@@ -136,24 +306,10 @@ class Pipeline:
                 f"The following dependencies do not exist and cannot be produced: {dep_list}"
             )
         
-        # Add backlinks from dependencies to dependents
+        # The tasks look their task dependencies and their dependent tasks up in the graph
+        self.graph = TaskGraph(self.tasks, dependency_ids)
         for task in self.tasks:
-            for t_dep in task.task_dependencies:
-                t_dep.add_dependent_task(task)
-
-    def _get_non_terminal_tasks(self) -> List[Task]:
-        """
-        Get all tasks that are not in a terminal state.
-        :return: List of tasks that are not in a terminal state.
-        """
-        return [task for task in self.tasks if not task.is_in_terminal_state]
-    
-    def _get_pending_tasks(self) -> List[Task]:
-        """
-        Get all tasks that are in pending or unknown state.
-        :return: List of tasks that are pending or unknown.
-        """
-        return [task for task in self.tasks if task.status[0] in [TaskStatus.PENDING, TaskStatus.UNKNOWN]]
+            task.set_graph(self.graph)
 
     def _check_for_keypress(self):
         """Check for single key commands (no Enter needed)."""
@@ -196,82 +352,435 @@ class Pipeline:
 
     def run(self) -> None:
         enable_proxy()
-        self._solve_order()
-        self.handled_tasks = []
+        with stat_cache.tick():
+            self._solve_order()
+        if self.RUNTIME_HISTORY:
+            self._load_runtime_history()
+        self._init_scheduling_state()
+
+        journal_states = self.journal.replay() if self.RESUME else {}
+        if self.JOURNAL:
+            self.journal.open(resume=self.RESUME)
+        self.depioExecutor.set_on_task_submitted(self._on_task_submitted)
+        with stat_cache.tick():
+            self._resume_from_journal(journal_states)
+        self._emit_event("pipeline_started", pipeline=self.name, num_tasks=len(self.tasks))
+
+        if self.DETACHED:
+            try:
+                with stat_cache.tick():
+                    self._submit_detached()
+            finally:
+                self.depioExecutor.set_on_task_submitted(None)
+                self.journal.close()
+                if self.event_reporter is not None:
+                    self.event_reporter.close()
 
-        # Try to set terminal to non-blocking mode for better UX
+        # Try to set terminal to non-blocking mode for better UX. Without the UI (quiet), there is no need to.
         self._old_terminal_settings = None
-        try:
-            import termios
-            import tty
-            self._old_terminal_settings = termios.tcgetattr(sys.stdin)
-            tty.setcbreak(sys.stdin.fileno())
-            restore_terminal = True
-        except (ImportError, OSError, AttributeError):
-            restore_terminal = False
-            if not self.QUIET:
+        restore_terminal = False
+        if not self.QUIET:
+            try:
+                import termios
+                import tty
+                self._old_terminal_settings = termios.tcgetattr(sys.stdin)
+                tty.setcbreak(sys.stdin.fileno())
+                restore_terminal = True
+            except (ImportError, OSError, AttributeError):
                 print("Note: Interactive commands not available on this system")
 
         try:
-            with Live(refresh_per_second=5, console=None) as live:
-                while True:
-                    try:
-                        # Check for keyboard input
-                        if restore_terminal:
-                            self._check_for_keypress()
-
-                        if self.paused:
-                            # Update UI even when paused
-                            if not self.QUIET:
-                                live.update(self._print_tasks())
-                            time.sleep(self.REFRESHRATE)
-                            continue
-
-                        # Submit new runnable tasks
-                        for task in self.tasks:
-                            if task in self.handled_tasks:
-                                continue
-
-                            if task.is_ready_for_execution() or self.depioExecutor.handles_dependencies():
-                                if task.should_run():
-
-                                    if not self.SUBMIT_ONLY_IF_RUNNABLE:
-                                        self.depioExecutor.submit(task, task.task_dependencies)
-                                        self.handled_tasks.append(task)
-                                    elif task.is_ready_for_execution():
-                                        if self.depioExecutor.has_jobs_queued_limit:
-                                            if len(self._get_non_terminal_tasks()) >= self.depioExecutor.max_jobs_queued:
-                                                continue
-                                        elif self.depioExecutor.has_jobs_pending_limit:
-                                            if len(self._get_pending_tasks()) >= self.depioExecutor.max_jobs_pending:
-                                                continue
-
-                                        self.depioExecutor.submit(task, task.task_dependencies)
-                                        self.handled_tasks.append(task)
-
-                        # Update the rich UI
-                        if not self.QUIET:
-                            live.update(self._print_tasks())
-
-                        # Exit conditions
-                        if all(task.is_in_terminal_state for task in self.tasks):
-                            if any(task.is_in_failed_terminal_state for task in self.tasks):
-                                self.exit_with_failed_tasks()
-                            else:
-                                self.exit_successful()
-
-                        time.sleep(self.REFRESHRATE)
-
-                    except KeyboardInterrupt:
-                        print("\nStopping execution because of keyboard interrupt!")
-                        self.exit_with_failed_tasks()
+            # The UI gets rendered explicitly, see _update_ui. Hence, Live does not re-render it in between.
+            if self.QUIET:
+                live_context = contextlib.nullcontext()
+            else:
+                from rich.live import Live
+                live_context = Live(auto_refresh=False, console=None)
+            with live_context as live:
+                if self.EVENT_DRIVEN:
+                    self._run_event_loop(live, restore_terminal)
+                else:
+                    self._run_polling_loop(live, restore_terminal)
 
         finally:
             # Restore terminal settings
             self._restore_terminal()
+            self.runtime_db.flush()
+            self.depioExecutor.set_on_task_submitted(None)
+            self.journal.close()
+            if self.event_reporter is not None:
+                self.event_reporter.close()
+
+    def _emit_event(self, event: str, task: Task = None, **fields) -> None:
+        if self.event_reporter is None:
+            return
+        if task is None:
+            self.event_reporter.emit(event, **fields)
+        else:
+            self.event_reporter.emit_task(event, task, **fields)
+
+    def _emit_task_settled(self, task: Task) -> None:
+        """
+        Report the terminal state of a task, e.g., "finished", "failed" or "depfailed", with its duration.
+        """
+        if self.event_reporter is None:
+            return
+        fields = {}
+        if task.start_time is not None and task.end_time is not None:
+            fields["duration"] = task.end_time - task.start_time
+        if task.peak_mem is not None:
+            fields["peak_mem"] = task.peak_mem
+        if task.status[0] == TaskStatus.FAILED and len(task.failed_attempts) > 0:
+            fields["reason"] = task.failed_attempts[-1]
+        self.event_reporter.emit_task(task.status[0].name.lower(), task, **fields)
+
+    def _on_task_status_change(self, task: Task, old_status: TaskStatus, new_status: TaskStatus) -> None:
+        self.progress.on_status_change(task, old_status, new_status)
+        # The terminal states get reported once the task is settled, see _emit_task_settled.
+        if new_status == TaskStatus.RUNNING:
+            self._emit_event("started", task)
+        elif new_status == TaskStatus.RETRYING:
+            self._emit_event("retrying", task, reason=task.failed_attempts[-1] if task.failed_attempts else None,
+                             retry_at=task.retry_at)
+
+    def _submit_detached(self) -> None:
+        """
+        Submit the whole DAG at once, write the manifest and exit. The executor (i.e., slurm) takes care of the order.
+        """
+        self._dispatch_ready_tasks()
+        manifest_path = self.depio_dir / f"manifest_{self.name}.json"
+        Manifest.from_tasks(self.name, self.tasks).write(manifest_path)
+        num_submitted = sum(1 for task in self.tasks if task.slurmjob is not None)
+        print(f"Submitted {num_submitted} of {len(self.tasks)} tasks. Follow them with: depio status {manifest_path}")
+        exit(0)
+
+    def _on_task_submitted(self, task: Task) -> None:
+        if task.slurmjob is not None:
+            self.journal.record_submitted(task.identity, str(task.slurmjob.job_id))
+            self._emit_event("job_submitted", task)
+
+    def _resume_from_journal(self, journal_states: typing.Dict[str, typing.Dict]) -> None:
+        """
+        Restore the finished and skipped tasks of an earlier run whose products still exist, and reattach to the
+        slurm jobs of the tasks that did not finish yet, if slurm still knows them. All other tasks run again.
+        """
+        if len(journal_states) == 0:
+            return
+        jobs: Dict[str, List[Task]] = {}
+        for task in self.tasks:
+            state = journal_states.get(task.identity)
+            if state is None:
+                continue
+            if state["status"] in ("FINISHED", "SKIPPED"):
+                if not all(stat_cache.exists(p) for p in task.products):
+                    continue  # E.g., deleted since, hence the task has to run again
+                task._status = TaskStatus[state["status"]]
+                self.journal.record_status(task.identity, state["status"])
+            elif state["status"] is None and state["job_id"] is not None:
+                jobs.setdefault(state["job_id"], []).append(task)
+
+        for job_id in self.depioExecutor.reattach_jobs(jobs):
+            self._reattached_tasks.update(task._queue_id for task in jobs[job_id])
+
+    def _load_runtime_history(self) -> None:
+        """
+        Use the measured durations of earlier runs for the tasks without a user-supplied expected duration.
+        The measured peak memory is used by executors that size the resources of the tasks, e.g., the SubmitItExecutor.
+        """
+        if len(self.tasks) == 0:
+            return
+        task_keys = [task.identity for task in self.tasks]
+        expected_durations = self.runtime_db.get_expected_durations(task_keys)
+        peak_mems = self.runtime_db.get_peak_mems(task_keys)
+        for task, task_key in zip(self.tasks, task_keys):
+            if task.expected_duration is None:
+                task.expected_duration = expected_durations.get(task_key)
+            task.expected_peak_mem = peak_mems.get(task_key)
+
+    def _init_scheduling_state(self) -> None:
+        """
+        Build the indexed scheduling state. Each task has a counter of the task dependencies that are not released yet.
+        A task gets released once it reached a terminal state, or for executors that handle the dependencies by
+        themselves, once it got submitted. Tasks whose counter drops to zero get pushed to the ready heap.
+        Hence, every dispatch costs O(out-degree) and a whole run costs O(V+E).
+        """
+        self.handled_tasks = set()
+        self._remaining_dependencies = self.graph.get_in_degrees()
+        self._submitted_tasks = {}
+        self._num_settled_tasks = 0
+        self._reattached_tasks = set()
+        self._release_on_submit = self.depioExecutor.handles_dependencies() and not self.SUBMIT_ONLY_IF_RUNNABLE
+        self._compute_critical_paths()
+
+        self._ready_tasks = []
+        for task in self.tasks:
+            if self._remaining_dependencies[task._queue_id - 1] == 0:
+                self._push_ready_task(task)
+
+    def _push_ready_task(self, task: Task) -> None:
+        # The queue id is unique, hence the tasks themselves never get compared.
+        heapq.heappush(self._ready_tasks, (-task.priority, -task.critical_path_length, task._queue_id, task))
+
+    def _compute_critical_paths(self) -> None:
+        """
+        Set the critical path length of each task, i.e., the expected duration of the longest chain of dependent tasks
+        starting at the task. Tasks without an expected duration count as one second.
+        """
+        # Accumulate in reverse topological order
+        for i in reversed(self.graph.get_topological_order()):
+            task = self.tasks[i]
+            duration = task.expected_duration if task.expected_duration is not None else 1.0
+            task.critical_path_length = duration + max(
+                (self.tasks[j].critical_path_length for j in self.graph.get_dependent_ids(i)), default=0.0)
+
+    def _release_dependent_tasks(self, task: Task) -> None:
+        for idx in self.graph.get_dependent_ids(task._queue_id - 1):
+            self._remaining_dependencies[idx] -= 1
+            if self._remaining_dependencies[idx] == 0:
+                self._push_ready_task(self.tasks[idx])
+
+    def _is_throttled(self, num_batched: int = 0) -> bool:
+        """
+        Whether the limits of the executor are reached. Only the tasks submitted by this pipeline count, the tasks that
+        are still waiting for their dependencies do not. Both limits apply if the executor sets both.
+        :param num_batched: Number of tasks that are about to be submitted in addition to the submitted ones.
+        """
+        if not self.SUBMIT_ONLY_IF_RUNNABLE:
+            return False
+        if self.depioExecutor.has_jobs_queued_limit:
+            if len(self._submitted_tasks) + num_batched >= self.depioExecutor.max_jobs_queued:
+                return True
+        if self.depioExecutor.has_jobs_pending_limit:
+            # Submitted tasks that did not start yet, i.e., also those whose state was not reported yet
+            num_pending = sum(1 for task in self._submitted_tasks.values()
+                              if task.status[0] in [TaskStatus.WAITING, TaskStatus.PENDING, TaskStatus.UNKNOWN])
+            if num_pending + num_batched >= self.depioExecutor.max_jobs_pending:
+                return True
+        return False
+
+    def _dispatch_ready_tasks(self) -> None:
+        """
+        Submit the tasks of the ready heap until it is empty or the limits of the executor are reached.
+        The tasks with the highest priority, and then with the longest critical path, get submitted first.
+        The currently ready tasks are handed over to the executor as one batch, such that it can group them
+        (e.g., into job arrays). Tasks released by the submission form the next batch.
+        """
+        throttled = False
+        while len(self._ready_tasks) > 0 and not throttled:
+            batch: List[Task] = []
+            num_ready = len(self._ready_tasks)
+            for _ in range(num_ready):
+                task = self._ready_tasks[0][-1]
+
+                if task._queue_id in self._reattached_tasks:
+                    # The job of the task survived the restart of the pipeline, hence it is submitted already.
+                    heapq.heappop(self._ready_tasks)
+                    self.handled_tasks.add(task._queue_id)
+                    self._emit_event("reattached", task)
+                    self._register_submitted_tasks([task])
+                    continue
+
+                if task.is_in_terminal_state:
+                    # E.g., the task got dep. failed while waiting for its other dependencies.
+                    runnable = False
+                elif self._release_on_submit:
+                    # The executor takes care of the order. Just update the status (skipped, dep. failed).
+                    task.is_ready_for_execution()
+                    runnable = not task.is_in_terminal_state
+                else:
+                    runnable = task.is_ready_for_execution()
+                    if not runnable and not task.is_in_terminal_state:
+                        # All dependencies are terminated, but not all of them successfully (e.g., canceled).
+                        task.set_to_depfailed()
+
+                if runnable and self._is_throttled(len(batch)):
+                    throttled = True
+                    break
+
+                heapq.heappop(self._ready_tasks)
+                self.handled_tasks.add(task._queue_id)
+
+                if runnable:
+                    batch.append(task)
+                else:
+                    self._num_settled_tasks += 1
+                    self.journal.record_status(task.identity, task.status[0].name)
+                    self._emit_task_settled(task)
+                    self._release_dependent_tasks(task)
+
+            self._submit_batch(batch)
+
+    def _submit_batch(self, batch: List[Task]) -> None:
+        if len(batch) == 0:
+            return
+
+        for task in batch:
+            self._emit_event("submitted", task)
+        self.depioExecutor.submit_tasks(batch)
+        self._register_submitted_tasks(batch)
+
+    def _register_submitted_tasks(self, batch: List[Task]) -> None:
+        for task in batch:
+            self._submitted_tasks[task._queue_id] = task
+            if self._release_on_submit:
+                self._release_dependent_tasks(task)
+        for task in batch:
+            if task.is_in_terminal_state:
+                # Executors like the SequentialExecutor run the task right away.
+                self._on_task_finished(task)
+
+    def _on_task_finished(self, task: Task) -> None:
+        """
+        Settle a submitted task that reached a terminal state and release its dependent tasks.
+        """
+        if not task.is_in_terminal_state:
+            return  # E.g., the task failed, but gets retried
+        if self._submitted_tasks.pop(task._queue_id, None) is None:
+            return  # Already settled
+        self._num_settled_tasks += 1
+        self.journal.record_status(task.identity, task.status[0].name)
+        self._emit_task_settled(task)
+        if task.buildmode == BuildMode.IF_CHANGED and task.status[0] == TaskStatus.FINISHED:
+            task.record_signature()
+        if self.RUNTIME_HISTORY and task.start_time is not None and task.end_time is not None:
+            self.runtime_db.record(task.identity, task.end_time - task.start_time, task.peak_mem, task.status[0].name)
+        if not self._release_on_submit:
+            self._release_dependent_tasks(task)
+
+    def _resubmit_due_retries(self) -> None:
+        """
+        Resubmit the tasks that failed, but whose retry policy allows another attempt, once their backoff passed.
+        """
+        now = time.time()
+        for task in list(self._submitted_tasks.values()):
+            if task.status[0] == TaskStatus.RETRYING and task.retry_at is not None and task.retry_at <= now:
+                self.depioExecutor.resubmit(task)
+
+    def _collect_finished_tasks(self) -> None:
+        # Only the submitted tasks can change their state, hence we do not have to check all tasks.
+        for task in list(self._submitted_tasks.values()):
+            if task.is_in_terminal_state:
+                self._on_task_finished(task)
+
+    def _check_exit_conditions(self) -> None:
+        if self._num_settled_tasks == len(self.tasks):
+            if any(task.is_in_failed_terminal_state for task in self.tasks):
+                self.exit_with_failed_tasks()
+            else:
+                self.exit_successful()
+
+    def _run_polling_loop(self, live, restore_terminal: bool) -> None:
+        while True:
+            try:
+                # Check for keyboard input
+                if restore_terminal:
+                    self._check_for_keypress()
+
+                if self.paused:
+                    # Update UI even when paused
+                    if not self.QUIET:
+                        self._update_ui(live)
+                    time.sleep(self.REFRESHRATE)
+                    continue
+
+                # Release the dependents of finished tasks and submit new runnable tasks
+                with stat_cache.tick():
+                    self.depioExecutor.poll()
+                    self._collect_finished_tasks()
+                    self._resubmit_due_retries()
+                    self._dispatch_ready_tasks()
+
+                # Update the rich UI
+                if not self.QUIET:
+                    self._update_ui(live)
+
+                # Exit conditions
+                self._check_exit_conditions()
+
+                time.sleep(self.REFRESHRATE)
+
+            except KeyboardInterrupt:
+                print("\nStopping execution because of keyboard interrupt!")
+                self.exit_with_failed_tasks()
+
+    def _run_event_loop(self, live, restore_terminal: bool) -> None:
+        """
+        Instead of rescanning the tasks every REFRESHRATE seconds, the event loop waits for the executor to report
+        finished tasks and releases their dependent tasks right away.
+        The UI gets refreshed by a separate thread.
+        """
+        self.depioExecutor.set_on_task_done(self.event_queue.put)
+
+        stop_ui = threading.Event()
+        if not self.QUIET:
+            ui_thread = threading.Thread(target=self._refresh_ui_periodically, args=(live, stop_ui), daemon=True)
+            ui_thread.start()
+
+        try:
+            while True:
+                try:
+                    # Check for keyboard input
+                    if restore_terminal:
+                        self._check_for_keypress()
+
+                    if not self.paused:
+                        with stat_cache.tick():
+                            self._resubmit_due_retries()
+                            self._dispatch_ready_tasks()
+
+                    # Block until a task finished. The timeout is needed for the keyboard input, the executors
+                    # that have to be polled and the ready tasks that could not be submitted due to the limits.
+                    self.depioExecutor.poll()
+                    finished_tasks = self._wait_for_finished_tasks()
+                    if len(finished_tasks) > 0:
+                        for task in finished_tasks:
+                            self._on_task_finished(task)
+                    else:
+                        self._collect_finished_tasks()
+
+                    # Exit conditions
+                    self._check_exit_conditions()
+
+                except KeyboardInterrupt:
+                    print("\nStopping execution because of keyboard interrupt!")
+                    self.exit_with_failed_tasks()
+        finally:
+            stop_ui.set()
+            self.depioExecutor.set_on_task_done(None)
+
+    def _wait_for_finished_tasks(self) -> List[Task]:
+        finished_tasks: List[Task] = []
+        try:
+            finished_tasks.append(self.event_queue.get(timeout=self.REFRESHRATE))
+            while True:
+                finished_tasks.append(self.event_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return finished_tasks
+
+    def _refresh_ui_periodically(self, live, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self._update_ui(live)
+            stop.wait(self.UI_REFRESHRATE)
+
+    def _update_ui(self, live) -> None:
+        """
+        Render the UI, at most every UI_REFRESHRATE seconds. Hence, a fast scheduling loop does not render faster.
+        """
+        now = time.time()
+        if now - self._last_render_time < self.UI_REFRESHRATE:
+            return
+        self._last_render_time = now
+        live.update(self._print_tasks(), refresh=True)
+
+    def _use_compact_ui(self) -> bool:
+        if self.UI == "auto":
+            return len(self.tasks) > self.COMPACT_UI_THRESHOLD
+        return self.UI == "compact"
 
 
     def _get_text_for_task(self, task):
+        from rich.text import Text
         status = task.status
 
         # Extract fields
@@ -283,6 +792,10 @@ class Pipeline:
         status_rich = Text(status_text, style=color)
         slurm_rich = Text(slurm_status, style=color)
 
+        eta = ""
+        if not task.is_in_terminal_state and task.expected_duration is not None:
+            eta = f"~{_format_seconds(self._get_remaining_time(task))}"
+
         return [
             task.is_in_successful_terminal_state,
             task.id,
@@ -291,15 +804,136 @@ class Pipeline:
             slurm_rich,
             status_text,
             [t._queue_id for t in task.task_dependencies],
+            eta,
+            self._get_attempts_text(task),
         ]
 
+    @staticmethod
+    def _get_attempts_text(task: Task) -> str:
+        if len(task.failed_attempts) == 0 or (len(task.failed_attempts) == 1 and task.status[0] == TaskStatus.FAILED):
+            return ""
+        # The reason of the final failure is part of the failed attempts
+        attempt = len(task.failed_attempts) + (0 if task.status[0] == TaskStatus.FAILED else 1)
+        if task.retry_policy is not None:
+            attempt = f"{attempt}/{task.retry_policy.max_attempts}"
+        return f"{attempt} ({', '.join(task.failed_attempts)})"
+
+    @staticmethod
+    def _get_remaining_time(task: Task) -> float:
+        """
+        Expected remaining run time of the task itself, based on its expected duration.
+        """
+        if task.is_in_terminal_state:
+            return 0.0
+        expected = task.expected_duration if task.expected_duration is not None else 1.0
+        if task.status[0] == TaskStatus.RUNNING and task.start_time is not None:
+            return max(0.0, expected - (time.time() - task.start_time))
+        return expected
+
+    def _get_pipeline_eta(self) -> float:
+        """
+        Expected remaining time of the pipeline, i.e., of its longest remaining chain of tasks.
+        It is a lower bound, as it assumes that the executor runs all ready tasks at once.
+        Each remaining chain passes a submitted or a ready task, hence the other tasks do not have to be visited.
+        The ready tasks did not start yet, hence their remaining chain is their critical path.
+        """
+        remaining = max((-entry[1] for entry in self._ready_tasks), default=0.0)
+        for task in list(self._submitted_tasks.values()):
+            if task.is_in_terminal_state:
+                continue
+            expected = task.expected_duration if task.expected_duration is not None else 1.0
+            chain = task.critical_path_length - expected + self._get_remaining_time(task)
+            remaining = max(remaining, chain)
+        return remaining
+
 
     def _clear_screen(self):
         if self.CLEAR_SCREEN: sys.stdout.write("\033[2J\033[H")
 
 
+    def _get_command_panel(self) -> Panel:
+        from rich.panel import Panel
+        from rich.text import Text
+        command_text = Text()
+        command_text.append("Pipeline Status: ", style="bold")
+        if self.paused:
+            command_text.append("⏸ PAUSED", style="bold yellow")
+        else:
+            command_text.append("▶ RUNNING", style="bold green")
+        command_text.append(f"    ETA: ~{_format_seconds(self._get_pipeline_eta())}", style="bold")
+        
+        if self.last_command_message:
+            command_text.append("\n\n" + self.last_command_message, style="italic cyan")
+        
+        command_text.append("\n\nQuick Commands: ", style="bold")
+        command_text.append("P", style="bold cyan")
+        command_text.append("ause  ", style="dim")
+        command_text.append("R", style="bold cyan")
+        command_text.append("esume  ", style="dim")
+        command_text.append("Q", style="bold cyan")
+        command_text.append("uit", style="dim")
+        
+        return Panel(
+            command_text,
+            title="[bold]Interactive Commands[/bold]",
+            border_style="blue",
+            subtitle="[dim]Press keys directly (no Enter needed)[/dim]"
+        )
+
+    def _print_tasks_compact(self):
+        """
+        Render a bounded window of the tasks, i.e., the running, the recently failed and the next ready tasks, next to
+        the histogram of all tasks. The histogram is kept up to date by the ProgressTracker, hence the cost of a
+        refresh does not grow with the number of tasks.
+        """
+        from rich.columns import Columns
+        from rich.console import Group
+        from rich.panel import Panel
+        from rich.table import Table
+        headers = ["ID", "Name", "Slurm ID", "Slurm Status", "Status", "ETA", "Attempts"]
+        n = self.UI_MAX_ROWS
+
+        def make_table(title: str, tasks: List[Task]) -> Table:
+            table = Table(title=title, expand=True, border_style="white", header_style="bold white",
+                          row_styles=["", "dim"])
+            for h in headers:
+                table.add_column(h, style="white")
+            for task in tasks:
+                _, tid, name, slurm_id, slurm_status, status, _, eta, attempts = self._get_text_for_task(task)
+                table.add_row(str(tid), str(name), str(slurm_id), str(slurm_status), str(status), eta, attempts)
+            return table
+
+        counts = self.progress.get_counts()
+        ready_tasks = [entry[-1] for entry in heapq.nsmallest(n, self._ready_tasks)]
+        tables = [
+            make_table(f"Running ({counts.get(TaskStatus.RUNNING, 0)})", self.progress.get_running(n)),
+            make_table("Recently failed", self.progress.get_recently_failed(n)),
+            make_table(f"Next up ({len(self._ready_tasks)} ready)", ready_tasks),
+        ]
+
+        summary = Table(show_header=True, header_style="bold magenta", border_style="magenta", expand=True)
+        summary.add_column("Status", style="bold")
+        summary.add_column("Count", justify="right", style="cyan")
+        for status, count in counts.items():
+            summary.add_row(_status_texts[status].upper(), str(count))
+        summary.add_row("TOTAL", str(len(self.tasks)))
+
+        top_section = Columns([Group(*tables), summary], expand=True)
+
+        return Panel(
+            Group(top_section, self._get_command_panel()),
+            title=f"Pipeline: {self.name}"
+        )
+
     def _print_tasks(self):
-        headers = ["ID", "Name", "Slurm ID", "Slurm Status", "Status", "Task Deps"]
+        if self._use_compact_ui():
+            return self._print_tasks_compact()
+
+        from rich.columns import Columns
+        from rich.console import Group
+        from rich.panel import Panel
+        from rich.table import Table
+        headers = ["ID", "Name", "Slurm ID", "Slurm Status", "Status", "Task Deps", "ETA", "Attempts"]
         table = Table(
             show_lines=True, 
             expand=True,
@@ -312,7 +946,7 @@ class Pipeline:
         
         histogram = {}
         for task in self.tasks:
-            is_success, tid, name, slurm_id, slurm_status, status, deps = self._get_text_for_task(task)
+            is_success, tid, name, slurm_id, slurm_status, status, deps, eta, attempts = self._get_text_for_task(task)
             histogram[status] = histogram.get(status, 0) + 1
             if self.HIDE_SUCCESSFUL_TERMINATED_TASKS and is_success:
                 continue
@@ -322,7 +956,9 @@ class Pipeline:
                 str(slurm_id),
                 str(slurm_status),
                 str(status),
-                ", ".join(str(d) for d in deps)
+                ", ".join(str(d) for d in deps),
+                eta,
+                attempts
             )
         
         # Summary table
@@ -332,34 +968,9 @@ class Pipeline:
         for status, count in histogram.items():
             summary.add_row(status, str(count))
         
-        # Command panel
-        command_text = Text()
-        command_text.append("Pipeline Status: ", style="bold")
-        if self.paused:
-            command_text.append("⏸ PAUSED", style="bold yellow")
-        else:
-            command_text.append("▶ RUNNING", style="bold green")
-        
-        if self.last_command_message:
-            command_text.append("\n\n" + self.last_command_message, style="italic cyan")
-        
-        command_text.append("\n\nQuick Commands: ", style="bold")
-        command_text.append("P", style="bold cyan")
-        command_text.append("ause  ", style="dim")
-        command_text.append("R", style="bold cyan")
-        command_text.append("esume  ", style="dim")
-        command_text.append("Q", style="bold cyan")
-        command_text.append("uit", style="dim")
-        
-        command_panel = Panel(
-            command_text,
-            title="[bold]Interactive Commands[/bold]",
-            border_style="blue",
-            subtitle="[dim]Press keys directly (no Enter needed)[/dim]"
-        )
-        
+        command_panel = self._get_command_panel()
+
         # Create side-by-side layout with table and summary
-        from rich.columns import Columns
         top_section = Columns([table, summary], expand=True)
         
         return Panel(
@@ -377,6 +988,21 @@ class Pipeline:
             except:
                 pass
 
+    def _emit_pipeline_finished(self, success: bool) -> None:
+        if self.event_reporter is None:
+            return
+        counts = {status.name.lower(): count for status, count in self.progress.get_counts().items()}
+        self._emit_event("pipeline_finished", pipeline=self.name, success=success, counts=counts)
+        self.event_reporter.flush()
+
+    @staticmethod
+    def _get_output_title(title: str, capture: OutputCapture) -> str:
+        if not capture.truncated:
+            return title
+        if capture.path is None:
+            return f"{title} (last {capture.max_size} characters)"
+        return f"{title} (last {capture.max_size} characters, full output: {capture.path})"
+
     def exit_with_failed_tasks(self) -> None:
         # Restore terminal first
         self._restore_terminal()
@@ -402,14 +1028,15 @@ class Pipeline:
             for task in self.tasks:
                 if task.status[0] == TaskStatus.FAILED:
                     print(f"Details for Task ID: {task.id} - Name: {task.name}")
-                    print(f"STDOUT")
-                    print(task.get_stdout())
+                    print(self._get_output_title("STDOUT", task.stdout))
+                    print(task.get_stdout(tail=True))
                     print(f"")
-                    print(f"STDERR")
-                    print(task.get_stderr())
+                    print(self._get_output_title("STDERR", task.stderr))
+                    print(task.get_stderr(tail=True))
 
         print("Canceling running jobs...")
         self.depioExecutor.cancel_all_jobs()
+        self._emit_pipeline_finished(success=False)
 
         print("Exit.")
         exit(1)
@@ -423,6 +1050,7 @@ class Pipeline:
             task.is_ready_for_execution()
         if not self.QUIET: self._print_tasks()
 
+        self._emit_pipeline_finished(success=True)
         print("All jobs done! Exit.")
         exit(0)
 
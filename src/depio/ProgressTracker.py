@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, List
+
+from .Task import Task
+from .TaskStatus import TaskStatus
+
+
+class ProgressTracker:
+    """
+    Aggregates the states of the tasks of a pipeline. It gets notified on every status change of a task, see
+    Task.status_listener. Hence, the UI can show the histogram and the running and failed tasks without visiting all
+    tasks on every refresh.
+    """
+
+    # Statuses that show up in the list of recently failed tasks
+    FAILURE_STATES = [TaskStatus.FAILED, TaskStatus.RETRYING]
+
+    def __init__(self, max_recently_failed: int = 100):
+        """
+        :param max_recently_failed: Number of failed tasks that are remembered for the UI.
+        """
+        self._lock = threading.Lock()  # Status changes are reported by the threads of the executors as well
+        self._counts: Dict[TaskStatus, int] = {}
+        self._running: Dict[int, Task] = {}  # id(task) -> task, in the order the tasks started to run
+        self._recently_failed: Deque[Task] = deque(maxlen=max_recently_failed)
+
+    def add(self, task: Task) -> None:
+        with self._lock:
+            self._count(task._status, 1)
+            if task._status == TaskStatus.RUNNING:
+                self._running[id(task)] = task
+
+    def on_status_change(self, task: Task, old_status: TaskStatus, new_status: TaskStatus) -> None:
+        with self._lock:
+            self._count(old_status, -1)
+            self._count(new_status, 1)
+            if new_status == TaskStatus.RUNNING:
+                self._running[id(task)] = task
+            elif old_status == TaskStatus.RUNNING:
+                self._running.pop(id(task), None)
+            if new_status in self.FAILURE_STATES:
+                self._recently_failed.append(task)
+
+    def _count(self, status: TaskStatus, delta: int) -> None:
+        count = self._counts.get(status, 0) + delta
+        if count > 0:
+            self._counts[status] = count
+        else:
+            self._counts.pop(status, None)
+
+    def get_counts(self) -> Dict[TaskStatus, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def get_running(self, n: int) -> List[Task]:
+        """
+        The n longest running tasks.
+        """
+        with self._lock:
+            return list(islice(self._running.values(), n))
+
+    def get_recently_failed(self, n: int) -> List[Task]:
+        """
+        The n most recently failed tasks, the latest first. A task that failed several times shows up once.
+        """
+        with self._lock:
+            failed_tasks = list(reversed(self._recently_failed))
+        seen = set()
+        unique_tasks = [t for t in failed_tasks if id(t) not in seen and not seen.add(id(t))]
+        return unique_tasks[:n]
+
+
+__all__ = [ProgressTracker]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+import re
+from typing import Dict
+
+from attrs import frozen
+
+_MEM_UNITS = {"K": 1 / 1024, "M": 1, "G": 1024, "T": 1024 * 1024}
+
+
+def _parse_mem(mem) -> float:
+    """
+    Parse a memory specification as understood by slurm into MB, e.g., 512, "512M", "16G".
+    """
+    if isinstance(mem, (int, float)):
+        return float(mem)
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*", str(mem), re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Cannot parse the memory specification {mem!r}")
+    return float(match.group(1)) * _MEM_UNITS[match.group(2).upper() or "M"]
+
+
+@frozen
+class Resources:
+    """
+    Amount of CPUs, memory (in MB) and GPUs. Used for the capacity of a node and the requirements of a task.
+    """
+    cpus: float = 1
+    mem: float = 0
+    gpus: int = 0
+
+    def __add__(self, other: Resources) -> Resources:
+        return Resources(self.cpus + other.cpus, self.mem + other.mem, self.gpus + other.gpus)
+
+    def __sub__(self, other: Resources) -> Resources:
+        return Resources(self.cpus - other.cpus, self.mem - other.mem, self.gpus - other.gpus)
+
+    def after_reserving(self, reserved: Resources) -> Resources:
+        """
+        The resources that are left for others, if the reserved ones get set aside. None of them are negative, i.e., the
+        part of the reservation that is not available yet is not left for others either.
+        """
+        return Resources(max(0.0, self.cpus - reserved.cpus), max(0.0, self.mem - reserved.mem),
+                         max(0, self.gpus - reserved.gpus))
+
+    def fits_into(self, other: Resources) -> bool:
+        return self.cpus <= other.cpus and self.mem <= other.mem and self.gpus <= other.gpus
+
+    def leftover(self, available: Resources, capacity: Resources) -> float:
+        """
+        Fraction of the capacity that is left unused, if these resources get allocated from the available ones.
+        """
+        rest = available - self
+        fractions = [getattr(rest, name) / getattr(capacity, name) for name in ("cpus", "mem", "gpus")
+                     if getattr(capacity, name) > 0]
+        return sum(fractions)
+
+    @classmethod
+    def from_slurm_parameters(cls, slurm_parameters: Dict) -> Resources:
+        """
+        Requirements of a task as given by its slurm_parameters. A task without parameters requires one CPU.
+        """
+        p = slurm_parameters
+        cpus = p.get("slurm_cpus_per_task", p.get("cpus_per_task", 1))
+        if "slurm_mem" in p:
+            mem = _parse_mem(p["slurm_mem"])
+        elif "mem_gb" in p:
+            mem = float(p["mem_gb"]) * 1024
+        else:
+            mem = 0.0
+        gpus = p.get("slurm_gpus_per_node", p.get("gpus_per_node", 0))
+        return cls(cpus=float(cpus), mem=mem, gpus=int(gpus))
+
+    @classmethod
+    def of_local_machine(cls, gpus: int = 0) -> Resources:
+        """
+        Capacity of the machine depio runs on. The GPUs are not detected.
+        """
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+        try:
+            mem = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 2
+        except (ValueError, OSError, AttributeError):
+            mem = float("inf")
+        return cls(cpus=float(cpus), mem=float(mem), gpus=gpus)
+
+
+__all__ = [Resources]
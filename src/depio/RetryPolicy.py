@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from attrs import field, frozen
+
+# Failure reasons that are usually transient, with the maximum number of attempts for each of them.
+DEFAULT_RETRY_ON: Dict[str, int] = {
+    "PREEMPTED": 3,
+    "NODE_FAIL": 3,
+    "BOOT_FAIL": 3,
+    "OUT_OF_MEMORY": 2,
+}
+
+
+@frozen
+class RetryPolicy:
+    """
+    When and how often to rerun a failed task. The reason of a failure is the state of the slurm job
+    (e.g., "PREEMPTED") or "FAILED", if the function raised an exception.
+    Add "FAILED" to retry_on to retry local tasks as well.
+    """
+    max_attempts: int = 3  # Over all reasons, including the first attempt
+    backoff: float = 30.0  # Seconds to wait before the second attempt
+    backoff_factor: float = 2.0
+    max_backoff: float = 3600.0
+    retry_on: Dict[str, int] = field(factory=lambda: dict(DEFAULT_RETRY_ON))  # Reason -> maximum number of attempts
+
+    def should_retry(self, reason: str, attempt: int) -> bool:
+        """
+        :param reason: The reason of the failure.
+        :param attempt: The number of the attempt that failed, starting at 1.
+        """
+        return attempt < self.max_attempts and attempt < self.retry_on.get(reason, 0)
+
+    def get_backoff(self, attempt: int) -> float:
+        """
+        Seconds to wait after the given failed attempt, starting at 1.
+        """
+        return min(self.backoff * self.backoff_factor ** (attempt - 1), self.max_backoff)
+
+
+__all__ = [RetryPolicy]
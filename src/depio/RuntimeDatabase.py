@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import sqlite3
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class RuntimeDatabase:
+    """
+    Persistent history of the runs of tasks: duration, peak memory and final status, keyed by Task.identity.
+    The records get buffered and written in one transaction by flush(), such that large pipelines do not commit
+    once per task.
+    """
+
+    # Number of most recent successful runs to estimate from
+    HISTORY_SIZE = 5
+    # Maximum number of variables in one SQLite statement
+    CHUNK_SIZE = 500
+
+    def __init__(self, path: Path):
+        """
+        :param path: Path of the SQLite file. The parent directory gets created on first use.
+        """
+        self.path: Path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, float, float, Optional[float], str]] = []
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS runs "
+                                     "(task_key TEXT NOT NULL, finished REAL NOT NULL, duration REAL NOT NULL, "
+                                     "peak_mem REAL, status TEXT NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS runs_task_key ON runs (task_key, finished)")
+            self._connection.commit()
+        return self._connection
+
+    def record(self, task_key: str, duration: float, peak_mem: Optional[float], status: str) -> None:
+        """
+        Buffer a run. It gets written by the next call of flush().
+        :param peak_mem: Peak memory in MB, if known.
+        """
+        with self._lock:
+            self._pending.append((task_key, time.time(), float(duration), peak_mem, status))
+
+    def flush(self) -> None:
+        with self._lock:
+            if len(self._pending) == 0:
+                return
+            self.connection.executemany("INSERT INTO runs (task_key, finished, duration, peak_mem, status) "
+                                        "VALUES (?, ?, ?, ?, ?)", self._pending)
+            self.connection.commit()
+            self._pending = []
+
+    def _get_history(self, task_keys: List[str], column: str) -> Dict[str, List[float]]:
+        history: Dict[str, List[float]] = {}
+        if self._connection is None and not self.path.exists():
+            return history  # Do not create the database just for reading
+        with self._lock:
+            for i in range(0, len(task_keys), self.CHUNK_SIZE):
+                chunk = task_keys[i:i + self.CHUNK_SIZE]
+                rows = self.connection.execute(
+                    f"SELECT task_key, {column} FROM runs WHERE status = 'FINISHED' AND {column} IS NOT NULL "
+                    f"AND task_key IN ({','.join('?' * len(chunk))}) ORDER BY finished DESC", chunk).fetchall()
+                for task_key, value in rows:
+                    values = history.setdefault(task_key, [])
+                    if len(values) < self.HISTORY_SIZE:
+                        values.append(value)
+        return history
+
+    def get_expected_durations(self, task_keys: List[str]) -> Dict[str, float]:
+        """
+        Median duration in seconds of the most recent successful runs. Tasks without history are left out.
+        """
+        return {k: statistics.median(v) for k, v in self._get_history(task_keys, "duration").items()}
+
+    def get_peak_mems(self, task_keys: List[str]) -> Dict[str, float]:
+        """
+        Maximum peak memory in MB of the most recent successful runs. Tasks without history are left out.
+        """
+        return {k: max(v) for k, v in self._get_history(task_keys, "peak_mem").items()}
+
+    def close(self) -> None:
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+__all__ = [RuntimeDatabase]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .file_helpers import content_hash
+
+
+class SignatureDatabase:
+    """
+    Persistent store for the signatures of tasks with BuildMode.IF_CHANGED.
+    A signature combines the hash of the function, the cleaned_args and the content hashes of the path dependencies.
+    The content hashes of files are cached by path, mtime and size. Hence, unchanged files are not read again and a
+    touched file is read once, but does not lead to a rerun.
+    """
+
+    def __init__(self, path: Path):
+        """
+        :param path: Path of the SQLite file. The parent directory gets created on first use.
+        """
+        self.path: Path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS signatures "
+                                     "(task_key TEXT PRIMARY KEY, signature TEXT NOT NULL, updated REAL NOT NULL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS file_hashes "
+                                     "(path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+                                     "hash TEXT NOT NULL)")
+            self._connection.commit()
+        return self._connection
+
+    def get_signature(self, task_key: str) -> Optional[str]:
+        with self._lock:
+            row = self.connection.execute("SELECT signature FROM signatures WHERE task_key = ?",
+                                          (task_key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def set_signature(self, task_key: str, signature: str) -> None:
+        with self._lock:
+            self.connection.execute("INSERT OR REPLACE INTO signatures (task_key, signature, updated) VALUES (?, ?, ?)",
+                                    (task_key, signature, time.time()))
+            self.connection.commit()
+
+    def file_hash(self, path: Path) -> str:
+        """
+        Content hash of the given file or directory. Returns "missing" if the path does not exist.
+        """
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return "missing"
+
+        if path.is_dir():
+            # The mtime of a directory does not reflect changes of the files inside.
+            return content_hash(path)
+
+        key = str(path.absolute())
+        with self._lock:
+            row = self.connection.execute("SELECT mtime_ns, size, hash FROM file_hashes WHERE path = ?",
+                                          (key,)).fetchone()
+        if row is not None and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return row[2]
+
+        h = content_hash(path)
+        with self._lock:
+            self.connection.execute("INSERT OR REPLACE INTO file_hashes (path, mtime_ns, size, hash) "
+                                    "VALUES (?, ?, ?, ?)", (key, st.st_mtime_ns, st.st_size, h))
+            self.connection.commit()
+        return h
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+__all__ = [SignatureDatabase]
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import re
+import subprocess
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .Resources import _parse_mem
+from .Task import Task
+from .TaskStatus import TaskStatus, TERMINAL_STATES
+
+
+def _expand_job_ids(job_id: str) -> List[str]:
+    """
+    Expand the job ids of job arrays as printed by sacct, e.g., "12_[1-3,5]" -> ["12_1", "12_2", "12_3", "12_5"].
+    """
+    match = re.fullmatch(r"(\d+)_\[([\d,\-%]+)\]", job_id)
+    if match is None:
+        return [job_id]
+
+    base, ranges = match.group(1), match.group(2).split("%")[0]  # Drop the limit of running tasks, e.g. [1-9%2]
+    job_ids = []
+    for r in ranges.split(","):
+        if "-" in r:
+            start, end = r.split("-")
+            job_ids.extend(f"{base}_{i}" for i in range(int(start), int(end) + 1))
+        elif r:
+            job_ids.append(f"{base}_{r}")
+    return job_ids
+
+
+def _parse_elapsed(elapsed: str) -> Optional[float]:
+    """
+    Parse an elapsed time as printed by sacct into seconds, e.g., "1-02:03:04", "02:03:04" or "03:04.500".
+    """
+    match = re.fullmatch(r"(?:(\d+)-)?(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)", elapsed.strip())
+    if match is None:
+        return None
+    days, hours, minutes, seconds = match.groups()
+    return int(days or 0) * 86400 + int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+class SlurmStatePoller:
+    """
+    Polls the states of all tracked slurm jobs with a single sacct call and fans the results out to the tasks.
+    Hence, the number of calls to the slurm controller stays constant as the number of jobs grows.
+    """
+
+    # Number of job ids per sacct call, to stay below the limit of the command line length.
+    CHUNK_SIZE = 1000
+
+    def __init__(self, sacct_command: Union[str, Sequence[str]] = "sacct", min_poll_interval: float = 5.0,
+                 apply_state: Callable[[Task, str], None] = None):
+        """
+        :param sacct_command: The sacct executable, optionally with additional arguments.
+        :param min_poll_interval: Minimum number of seconds between two calls of sacct.
+        :param apply_state: Gets called with a task and the new state of its job. Defaults to Task.set_slurmstate.
+        """
+        self.apply_state: Callable[[Task, str], None] = apply_state or (lambda task, state: task.set_slurmstate(state))
+        self.sacct_command: List[str] = [sacct_command] if isinstance(sacct_command, str) else list(sacct_command)
+        self.min_poll_interval: float = min_poll_interval
+        self.last_poll_time: float = 0.0
+        self.tracked_tasks: Dict[str, List[Task]] = {}  # job id -> tasks, more than one if the tasks are packed
+
+    def track(self, task: Task) -> None:
+        self.tracked_tasks.setdefault(str(task.slurmjob.job_id), []).append(task)
+
+    def untrack(self, task: Task) -> None:
+        job_id = str(task.slurmjob.job_id)
+        tasks = [t for t in self.tracked_tasks.get(job_id, []) if t is not task]
+        if len(tasks) > 0:
+            self.tracked_tasks[job_id] = tasks
+        else:
+            self.tracked_tasks.pop(job_id, None)
+
+    def get_tracked_tasks(self) -> List[Task]:
+        return [task for tasks in self.tracked_tasks.values() for task in tasks]
+
+    def _query(self, job_ids: List[str]) -> str:
+        # sacct reports all tasks of a job array, if asked for its base id.
+        base_ids = sorted({job_id.split("_")[0] for job_id in job_ids})
+        outputs = []
+        for i in range(0, len(base_ids), self.CHUNK_SIZE):
+            command = self.sacct_command + ["-j", ",".join(base_ids[i:i + self.CHUNK_SIZE]),
+                                            "-o", "JobID,State,Elapsed,MaxRSS", "--parsable2", "--noheader"]
+            outputs.append(subprocess.run(command, capture_output=True, text=True, check=True).stdout)
+        return "\n".join(outputs)
+
+    @staticmethod
+    def parse(output: str) -> Dict[str, str]:
+        """
+        Parse the output of sacct into a mapping from job id to state. Job steps (e.g., "12.batch") are ignored.
+        """
+        states: Dict[str, str] = {}
+        for line in output.splitlines():
+            fields = line.strip().split("|")
+            if len(fields) < 2 or not fields[0] or "." in fields[0]:
+                continue
+            for job_id in _expand_job_ids(fields[0]):
+                states[job_id] = fields[1]
+        return states
+
+    @staticmethod
+    def parse_usage(output: str) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """
+        Parse the output of sacct into a mapping from job id to the elapsed time in seconds and the peak memory in MB.
+        The elapsed time is taken from the job, the peak memory is the maximum MaxRSS of its steps.
+        """
+        usage: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+        for line in output.splitlines():
+            fields = line.strip().split("|")
+            if len(fields) < 4 or not fields[0]:
+                continue
+            job_id, step = fields[0].split(".")[0], "." in fields[0]
+            elapsed, max_rss = usage.get(job_id, (None, None))
+            if not step:
+                elapsed = _parse_elapsed(fields[2])
+            if fields[3]:
+                try:
+                    max_rss = max(max_rss or 0.0, _parse_mem(fields[3]))
+                except ValueError:
+                    pass
+            usage[job_id] = (elapsed, max_rss)
+        return usage
+
+    @staticmethod
+    def _apply_usage(task: Task, elapsed: Optional[float], max_rss: Optional[float]) -> None:
+        if task.packed:
+            return  # The tasks of a packed job report their own usage.
+        if max_rss is not None:
+            task.peak_mem = max_rss
+        if elapsed is None or task.status[0] not in [TaskStatus.RUNNING] + TERMINAL_STATES:
+            return
+        if task.start_time is None:
+            task.start_time = time.time() - elapsed
+        if task.is_in_terminal_state:
+            task.end_time = task.start_time + elapsed
+
+    def query_states(self, job_ids: List[str]) -> Dict[str, str]:
+        """
+        Query the states of the given jobs right away, independent of the tracked tasks.
+        """
+        if len(job_ids) == 0:
+            return {}
+        return self.parse(self._query(job_ids))
+
+    def poll(self, force: bool = False) -> bool:
+        """
+        Query the states of all tracked jobs and apply them to the tasks.
+        :param force: Ignore the minimum poll interval.
+        :return: True if sacct got called.
+        """
+        if len(self.tracked_tasks) == 0:
+            return False
+        if not force and time.time() - self.last_poll_time < self.min_poll_interval:
+            return False
+        self.last_poll_time = time.time()
+
+        try:
+            output = self._query(list(self.tracked_tasks.keys()))
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Polling the slurm states failed: {e}")
+            return False
+        states = self.parse(output)
+        usage = self.parse_usage(output)
+
+        for job_id, tasks in list(self.tracked_tasks.items()):
+            if job_id in states:
+                for task in tasks:
+                    self.apply_state(task, states[job_id])
+                    resubmitted = str(task.slurmjob.job_id) != job_id
+                    if job_id in usage and not resubmitted:
+                        self._apply_usage(task, *usage[job_id])
+        return True
+
+
+__all__ = [SlurmStatePoller]
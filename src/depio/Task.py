@@ -1,21 +1,29 @@
 from __future__ import annotations
 
-import inspect
+import hashlib
 from pathlib import Path
 import typing
 import time
-from io import StringIO
-from os.path import getmtime
 from typing import List, Dict, Callable, get_origin, Annotated, get_args, Union
+import re
 import sys
+import traceback
+import weakref
+
+from attrs import frozen
 
 from .BuildMode import BuildMode
+from .file_helpers import stat_cache
+from .OutputCapture import OutputCapture
 from .TaskStatus import TaskStatus, TERMINAL_STATES, SUCCESSFUL_TERMINAL_STATES, FAILED_TERMINAL_STATES
-from .stdio_helpers import redirect, stop_redirect
 from .exceptions import ProductNotProducedException, TaskRaisedExceptionException, UnknownStatusException, \
     ProductNotUpdatedException, \
     DependencyNotMetException
 
+if typing.TYPE_CHECKING:
+    from .RetryPolicy import RetryPolicy
+    from .TaskGraph import TaskGraph
+
 
 class Product():
     pass
@@ -39,7 +47,8 @@ _status_colors = {
     TaskStatus.HOLD: 'white',
     TaskStatus.FAILED: 'red',
     TaskStatus.CANCELED: 'white',
-    TaskStatus.UNKNOWN: 'white'
+    TaskStatus.UNKNOWN: 'white',
+    TaskStatus.RETRYING: 'yellow'
 }
 
 _status_texts = {
@@ -52,7 +61,8 @@ _status_texts = {
     TaskStatus.CANCELED: 'cancelled',
     TaskStatus.UNKNOWN: 'unknown',
     TaskStatus.WAITING: 'waiting',
-    TaskStatus.DEPFAILED: 'dep. failed'
+    TaskStatus.DEPFAILED: 'dep. failed',
+    TaskStatus.RETRYING: 'retrying'
 }
 
 
@@ -60,15 +70,9 @@ def python_version_is_greater_or_equal_to_3_10():
     return sys.version_info.major > 3 and sys.version_info.minor >= 10
 
 
-# from https://stackoverflow.com/questions/218616/how-to-get-method-parameter-names
-def _get_args_dict(fn, args, kwargs) -> Dict[str, typing.Any]:
-    args_names = fn.__code__.co_varnames[:fn.__code__.co_argcount]
-    return {**dict(zip(args_names, args)), **kwargs}
-
-def _get_args_dict_nested(fn, args, kwargs) -> Dict[str, typing.Any]:
-    args_names = fn.__code__.co_varnames[:fn.__code__.co_argcount]
-    base = {**dict(zip(args_names, args)), **kwargs}
-
+def _expand_lists(base: Dict[str, typing.Any]) -> Dict[str, typing.Any]:
+    if not any(isinstance(value, list) for value in base.values()):
+        return base  # Nothing to expand, save the copy
     expanded = dict(base)   # copy
 
     for name, value in base.items():
@@ -81,44 +85,138 @@ def _get_args_dict_nested(fn, args, kwargs) -> Dict[str, typing.Any]:
 
 
 
-def _parse_annotation_for_metaclass(func, args_dict, metaclass) -> List[str]:
-    if python_version_is_greater_or_equal_to_3_10():
-        annotations = getattr(func, "__annotations__", None)
-    else:
-        if isinstance(func, type):
-            annotations = func.__dict__.get("__annotations__", None)
-        else:
-            annotations = getattr(func, "__annotations__", None)
-
-    results: List[str] = []
+class TaskSchema:
+    """
+    What Task.__init__, Task.__eq__ and Task.__hash__ need to know about a function: the names of its positional
+    parameters and which parameters are annotated as products, dependencies or ignored for equality, and whether
+    they are lists that get expanded. It is parsed once per function and cached, hence creating many tasks of the same
+    function, e.g., for a parameter sweep, does not parse the annotations again.
+    The cache holds the functions weakly, hence it does not keep functions alive that are not used anymore.
+    """
 
-    def expand_list(name: str, value:List):
-        """Return ['name[0]', 'name[1]', ...] based on default list size,
-        or ['name[]'] if no runtime size is available."""
-        if isinstance(value, list):
-            return [f"{name}_{i}" for i in range(len(value))]
-        return [f"{name}"]
+    _cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()  # func -> TaskSchema
 
-    for name, annotation in annotations.items():
+    def __init__(self, func: Callable):
+        self.arg_names: typing.Tuple[str, ...] = func.__code__.co_varnames[:func.__code__.co_argcount]
+        # metaclass -> [(name, annotated as a list)], e.g., Product -> [("out", False)]
+        self.annotated: Dict[type, List[typing.Tuple[str, bool]]] = {Product: [], Dependency: [], IgnoredForEq: []}
+        # metaclass -> names, if none of the annotated parameters is a list. Then, the names do not depend on the args.
+        self._static_names: Dict[type, List[str] | None] = {}
+        self._function_hash: str | None = None  # See get_function_hash
+        # The function itself must not be stored, it is the key of the cache.
+        try:
+            hash(func)
+            self.func_is_hashable: bool = True
+        except TypeError:
+            self.func_is_hashable = False
 
-        # Annotated[T, metadata...]
-        if get_origin(annotation) is Annotated:
+        if python_version_is_greater_or_equal_to_3_10():
+            annotations = getattr(func, "__annotations__", None)
+        else:
+            if isinstance(func, type):
+                annotations = func.__dict__.get("__annotations__", None)
+            else:
+                annotations = getattr(func, "__annotations__", None)
+
+        for name, annotation in (annotations or {}).items():
+            # Annotated[T, metadata...]
+            if get_origin(annotation) is not Annotated:
+                continue
             assert len(get_args(annotation)) == 2, f"Malformed annotation. Expected Annotated[T, meta], but got {annotation}"
-            
             T, *metadata = get_args(annotation)
+            is_list = get_origin(T) in (list, List)
+            for metaclass, names in self.annotated.items():
+                if any(meta is metaclass for meta in metadata):
+                    names.append((name, is_list))
 
-            if any(meta is metaclass for meta in metadata):
-                # Annotated[List[T], Meta]
-                if get_origin(T) in (list, List):
-                    val = args_dict[name]
-                    results.extend(expand_list(name, val))
-                    
-                # Annotated[T, Meta]
-                else:
-                    results.append(name)
-            
-    return results
+        for metaclass, names in self.annotated.items():
+            is_static = not any(is_list for _, is_list in names)
+            self._static_names[metaclass] = [name for name, _ in names] if is_static else None
 
+    @classmethod
+    def of(cls, func: Callable) -> TaskSchema:
+        try:
+            schema = cls._cache.get(func)
+        except TypeError:  # Not weak referenceable
+            return cls(func)
+        if schema is None:
+            schema = cls._cache[func] = cls(func)
+        return schema
+
+    def get_function_hash(self, func: Callable) -> str:
+        """
+        Hash of the source code of the function of the schema, which has to be passed in. Reading the source is slow,
+        hence it is hashed only once per function.
+        """
+        if self._function_hash is None:
+            self._function_hash = _function_hash(func)
+        return self._function_hash
+
+    def get_args_dict(self, args, kwargs) -> Dict[str, typing.Any]:
+        """
+        Mapping from the parameter names to the arguments. Without positional arguments, this is kwargs itself.
+        """
+        if len(args) == 0:
+            return kwargs
+        return {**dict(zip(self.arg_names, args)), **kwargs}
+
+    def get_annotated_args(self, args_dict: Dict[str, typing.Any], metaclass: type) -> List[str]:
+        """
+        Names of the arguments annotated with the metaclass. Lists are expanded into name_0, name_1, ...
+        The result must not be modified, it may be shared between the tasks.
+        """
+        static_names = self._static_names[metaclass]
+        if static_names is not None:
+            return static_names
+        results: List[str] = []
+        for name, is_list in self.annotated[metaclass]:
+            if is_list:
+                value = args_dict[name]
+                results.extend([f"{name}_{i}" for i in range(len(value))] if isinstance(value, list) else [name])
+            else:
+                results.append(name)
+        return results
+
+
+# Hashable types whose equal values have equal hashes, i.e., they do not have to be frozen
+_ATOMIC_TYPES = frozenset([str, int, float, bool, bytes, type(None), type(Path())])
+
+
+def _freeze(value) -> typing.Hashable:
+    """
+    Turn a value into something hashable, such that equal values map to equal results.
+    Values that cannot be hashed are reduced to their type. They still end up in the same bucket and are compared by
+    Task.__eq__ afterward.
+    """
+    if type(value) in _ATOMIC_TYPES:
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return frozenset((_freeze(k), _freeze(v)) for k, v in value.items())
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return type(value).__qualname__
+
+
+def _function_hash(func) -> str:
+    """
+    Hash of the source code of the function. Falls back to the bytecode, if the source is not available.
+    """
+    import inspect  # Only needed to build the DAG, not to run a task on a worker
+    try:
+        code = inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        code_object = getattr(func, "__code__", None)
+        if code_object is None:
+            code = repr(func).encode()
+        else:
+            code = code_object.co_code + repr(code_object.co_consts).encode() + repr(code_object.co_names).encode()
+    return hashlib.sha256(code).hexdigest()
 
 
 def _get_not_updated_products(product_timestamps_after_running: typing.Dict,
@@ -133,21 +231,91 @@ def _get_not_updated_products(product_timestamps_after_running: typing.Dict,
     return not_updated_products
 
 
+def _get_peak_mem_of_process() -> float | None:
+    """
+    Peak resident memory of the current process in MB, or None if unknown (e.g., on Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def slurmstate_to_status(slurmstate: str) -> TaskStatus:
+    """
+    Map the state of a slurm job, as reported by sacct, to the status of its task.
+    """
+    if slurmstate in ['RUNNING', 'CONFIGURING', 'COMPLETING', 'STAGE_OUT']:
+        return TaskStatus.RUNNING
+    elif slurmstate in ['FAILED', 'BOOT_FAIL', 'DEADLINE', 'NODE_FAIL', 'OUT_OF_MEMORY',
+                        'PREEMPTED', 'SPECIAL_EXIT', 'STOPPED', 'SUSPENDED', 'TIMEOUT']:
+        return TaskStatus.FAILED
+    elif slurmstate in ['READY', 'PENDING', 'REQUEUE_FED', 'REQUEUED']:
+        return TaskStatus.PENDING
+    elif slurmstate == 'CANCELLED':
+        return TaskStatus.CANCELED
+    elif 'CANCELLED' in slurmstate: # Slurm set 'CANCELLED by <number>' sometimes...
+        return TaskStatus.CANCELED
+    elif slurmstate in ['COMPLETED']:
+        return TaskStatus.FINISHED
+    elif slurmstate in ['RESV_DEL_HOLD', 'REQUEUE_HOLD', 'RESIZING', 'REVOKED', 'SIGNALING']:
+        return TaskStatus.HOLD
+    else:
+        return TaskStatus.UNKNOWN
+
+
+@frozen
+class TaskRunResult:
+    """
+    Everything that is needed to update a task after it ran on a copy, e.g., in another process or inside a packed
+    slurm job.
+    """
+    status: TaskStatus
+    start_time: float | None
+    end_time: float | None
+    stdout: str
+    stderr: str
+    peak_mem: float | None = None
+
+
 class Task:
+    # Tasks of large DAGs are many, hence they do without a __dict__
+    __slots__ = ("end_time", "start_time", "peak_mem", "expected_peak_mem", "description", "expected_duration",
+                 "priority", "retry_policy", "failed_attempts", "retry_at", "status_listener", "_status_value", "name",
+                 "_queue_id", "slurmjob", "func", "func_args", "func_kwargs", "buildmode", "slurm_parameters",
+                 "_output_config", "_stdout", "_stderr", "_slurmid", "_slurmstate", "packed", "schema", "cleaned_args",
+                 "products", "dependencies", "path_dependencies", "_task_dependencies", "_dependent_tasks", "_graph",
+                 "critical_path_length", "_dedup_hash", "_identity", "_should_run_memo", "signature_db",
+                 "__weakref__")
+
     def __init__(self, name: str, func: Callable, func_args: List = None, func_kwargs: List = None,
                  produces: List[Path] = None, depends_on: List[Union[Path, Task]] = None,
                  buildmode: BuildMode = BuildMode.IF_MISSING,
                  slurm_parameters: Dict = None,
                  arg_resolver: Callable = None,
-                 description: str = None):
+                 description: str = None,
+                 expected_duration: float = None,
+                 priority: int = 0,
+                 retry_policy: RetryPolicy = None):
 
         self.end_time = None
         self.start_time = None
+        self.peak_mem: float | None = None  # In MB, if the task ran in a process of its own
+        self.expected_peak_mem: float | None = None  # In MB, gets set by the Pipeline from earlier runs
         self.description = description or ""
+        self.expected_duration: float | None = expected_duration  # In seconds, e.g., used to pack slurm jobs
+        self.priority: int = priority  # Ready tasks with a higher priority get submitted first
+        self.retry_policy: RetryPolicy | None = retry_policy  # Defaults to the policy of the Pipeline
+        self.failed_attempts: List[str] = []  # Reasons of the failures of the earlier attempts
+        self.retry_at: float | None = None  # Time after which the task gets resubmitted, if it is RETRYING
         produces: List[Path] = produces or []
         depends_on: List[Union[Path, Task]] = depends_on or []
 
-        self._status: TaskStatus = TaskStatus.WAITING
+        self.status_listener: Callable[[Task, TaskStatus, TaskStatus], None] | None = None  # Gets set by the Pipeline
+        self._status_value: TaskStatus = TaskStatus.WAITING
         self.name: str = name
         self._queue_id: int | None = None
         self.slurmjob = None
@@ -157,37 +325,52 @@ class Task:
         self.buildmode: BuildMode = buildmode
         self.slurm_parameters: Dict = slurm_parameters or {}
 
-        self.stdout: StringIO = StringIO()
-        self.stderr: StringIO = StringIO()
-        self.slurmjob = None
+        self._output_config: typing.Tuple[Path | None, int | None, bool] = (None, None, False)
+        self._stdout: OutputCapture | None = None  # Allocated on the first access, see stdout
+        self._stderr: OutputCapture | None = None
         self._slurmid = None
         self._slurmstate: str = ""
+        self.packed: bool = False  # Shares its slurm job with other tasks
 
         # Allow the task to specify an argument resolver. This can be used to load default values dynamically.
         # And in particular, before the DAG is constructed.
         if arg_resolver is not None:
             self.func_args, self.func_kwargs = arg_resolver(self.func, self.func_args, self.func_kwargs)
 
-        args_dict: Dict[str, typing.Any] = _get_args_dict(func, self.func_args, self.func_kwargs)
+        self.schema: TaskSchema = TaskSchema.of(func)
+        args_dict: Dict[str, typing.Any] = self.schema.get_args_dict(self.func_args, self.func_kwargs)
 
-        # Parse dependencies and products from the annotations and merge with args
-        products_args: List[str] = _parse_annotation_for_metaclass(func, args_dict, Product)
-        dependencies_args: List[str] = _parse_annotation_for_metaclass(func, args_dict, Dependency)
-        ignored_for_eq_args: List[str] = _parse_annotation_for_metaclass(func, args_dict, IgnoredForEq)
+        # Get dependencies and products from the annotations and merge with args
+        products_args: List[str] = self.schema.get_annotated_args(args_dict, Product)
+        dependencies_args: List[str] = self.schema.get_annotated_args(args_dict, Dependency)
+        ignored_for_eq_args: List[str] = self.schema.get_annotated_args(args_dict, IgnoredForEq)
 
-        args_dict: Dict[str, typing.Any] = _get_args_dict_nested(func, self.func_args, self.func_kwargs)
-        self.cleaned_args: Dict[str, typing.Any] = {k: v for k, v in args_dict.items() if k not in ignored_for_eq_args}
+        args_dict = _expand_lists(args_dict)
+        if len(ignored_for_eq_args) > 0:
+            self.cleaned_args: Dict[str, typing.Any] = \
+                {k: v for k, v in args_dict.items() if k not in ignored_for_eq_args}
+        else:
+            self.cleaned_args = dict(args_dict)  # args_dict may be func_kwargs itself
 
         self.products: List[Path] = \
             ([args_dict[argname] for argname in products_args if argname in args_dict and args_dict[argname] is not None] + produces)
         self.dependencies: List[Union[Task, Path]] = \
             ([args_dict[argname] for argname in dependencies_args if argname in args_dict and args_dict[argname] is not None] + depends_on)
 
-        # Gets filled by Pipeline
+        # Gets filled by Pipeline. The task dependencies and the dependent tasks are looked up in the TaskGraph of
+        # the Pipeline, unless they are set explicitly.
         self.path_dependencies = None
-        self.task_dependencies = None
+        self._task_dependencies: List[Task] | None = None
+        self._dependent_tasks: List[Task] | None = None
+        self._graph: TaskGraph | None = None
+        self.critical_path_length: float = 0.0  # Expected duration of the longest chain starting at this task
 
-        self.dependent_tasks = []
+        self._dedup_hash: int | None = None
+        self._identity = None
+        self._should_run_memo = None
+
+        # Gets set by the Pipeline, required for BuildMode.IF_CHANGED
+        self.signature_db = None
 
     def is_ready_for_execution(self) -> bool:
         if not self.should_run():
@@ -205,48 +388,133 @@ class Task:
 
 
     def all_path_dependencies_exist(self) -> bool:
-        return all(p_dep.exists() for p_dep in self.path_dependencies)
+        return all(stat_cache.exists(p_dep) for p_dep in self.path_dependencies)
 
     def all_task_dependencies_terminated_successfully(self) -> bool:
         return all(t_dep.is_in_successful_terminal_state for t_dep in self.task_dependencies)
 
+    @property
+    def task_dependencies(self) -> List[Task] | None:
+        if self._task_dependencies is not None or self._graph is None:
+            return self._task_dependencies
+        return self._graph.get_dependencies(self._queue_id - 1)
+
+    @task_dependencies.setter
+    def task_dependencies(self, tasks: List[Task] | None) -> None:
+        self._task_dependencies = tasks
+
+    @property
+    def dependent_tasks(self) -> List[Task]:
+        if self._dependent_tasks is not None:
+            return self._dependent_tasks
+        if self._graph is None:
+            return []
+        return self._graph.get_dependents(self._queue_id - 1)
+
+    @dependent_tasks.setter
+    def dependent_tasks(self, tasks: List[Task] | None) -> None:
+        self._dependent_tasks = tasks
+
+    def set_graph(self, graph: TaskGraph | None) -> None:
+        """
+        Look the task dependencies and the dependent tasks up in the graph from now on, instead of in lists of the
+        task. The index of the task in the graph is its queue id - 1.
+        """
+        self._graph = graph
+        self._task_dependencies = None
+        self._dependent_tasks = None
+
     def add_dependent_task(self, task):
-        self.dependent_tasks.append(task)
+        if self._dependent_tasks is None:
+            self._dependent_tasks = list(self.dependent_tasks)
+        self._dependent_tasks.append(task)
 
     def __str__(self):
         return f"Task:{self.name}"
 
     def should_run(self) -> bool:
-        missing_products: List[Path] = [p for p in self.products if not p.exists()]
+        # Memoized per tick of the stat cache, which makes the recursion of IF_NEW linear. Outside of a tick, the stats
+        # are not cached, hence neither is the result.
+        if not stat_cache.active:
+            return self._should_run()
+        if self._should_run_memo is not None and self._should_run_memo[0] == stat_cache.generation:
+            return self._should_run_memo[1]
+        result = self._should_run()
+        self._should_run_memo = (stat_cache.generation, result)
+        return result
+
+    def _has_run_or_will_run(self) -> bool:
+        return self._status == TaskStatus.FINISHED or (not self.is_in_terminal_state and self.should_run())
+
+    def _should_run(self) -> bool:
+        missing_products: List[Path] = [p for p in self.products if not stat_cache.exists(p)]
 
         if self.buildmode == BuildMode.ALWAYS:
             return True
         elif self.buildmode == BuildMode.IF_MISSING:
             return len(missing_products) > 0
         elif self.buildmode == BuildMode.IF_NEW:
-            return any(t.should_run() for t in self.task_dependencies) or len(missing_products) > 0
+            return any(t._has_run_or_will_run() for t in self.task_dependencies) or len(missing_products) > 0
+        elif self.buildmode == BuildMode.IF_CHANGED:
+            # Dependencies that are still going to be rebuilt have no final content yet.
+            return len(missing_products) > 0 \
+                or any(not t.is_in_terminal_state and t.should_run() for t in self.task_dependencies) \
+                or self.signature_db is None \
+                or self.signature_db.get_signature(self.identity) != self.compute_signature()
         elif self.buildmode == BuildMode.NEVER:
             return False
         else:
             raise Exception(f"Unkown buildmode: {self.buildmode}")
 
+    @property
+    def identity(self) -> str:
+        """
+        Identity of the task that is stable across runs: the qualified name of the function and the cleaned_args.
+        """
+        if self._identity is not None:
+            return self._identity
+        func_name = f"{getattr(self.func, '__module__', '')}.{getattr(self.func, '__qualname__', repr(self.func))}"
+        args = repr(sorted(self.cleaned_args.items(), key=lambda kv: kv[0]))
+        self._identity = hashlib.sha256(f"{func_name}:{args}".encode()).hexdigest()
+        return self._identity
+
+    def compute_signature(self) -> str:
+        """
+        Signature of the inputs of the task: the function, the cleaned_args and the content of the path dependencies
+        and of the products of the task dependencies.
+        """
+        h = hashlib.sha256()
+        h.update(self.schema.get_function_hash(self.func).encode())
+        h.update(repr(sorted(self.cleaned_args.items(), key=lambda kv: kv[0])).encode())
+        # A task dependency counts with its products, as if they were path dependencies
+        paths = [d for d in self.dependencies if isinstance(d, Path)]
+        paths += [p for t in self.task_dependencies for p in t.products]
+        for d in dict.fromkeys(paths):
+            h.update(str(d).encode())
+            h.update(self.signature_db.file_hash(d).encode())
+        return h.hexdigest()
+
+    def record_signature(self) -> None:
+        if self.signature_db is not None:
+            self.signature_db.set_signature(self.identity, self.compute_signature())
+
     def _check_path_dependencies(self):
         not_existing_path_dependencies: List[str] = \
-            [str(dependency) for dependency in self.path_dependencies if not dependency.exists()]
+            [str(dependency) for dependency in self.path_dependencies if not stat_cache.exists(dependency)]
 
         if len(not_existing_path_dependencies) > 0:
-            self._status = TaskStatus.FAILED
+            self.set_to_failed()
             raise DependencyNotMetException(
                 f"Task {self.name}: Dependency/ies {not_existing_path_dependencies} not met.")
 
     def _check_existence_of_products(self):
-        not_existing_products: List[str] = [str(product) for product in self.products if not product.exists()]
+        not_existing_products: List[str] = [str(product) for product in self.products if not stat_cache.exists(product)]
         if len(not_existing_products) > 0:
-            self._status = TaskStatus.FAILED
+            self.set_to_failed()
             raise ProductNotProducedException(f"Task {self.name}: Product/s {not_existing_products} not produced.")
 
     def _get_timestamp_of_products(self) -> Dict[str, float]:
-        return {str(product): getmtime(product) for product in self.products if product.exists()}
+        return {str(product): stat_cache.getmtime(product) for product in self.products if stat_cache.exists(product)}
 
     def get_duration(self) -> int:
         if self.start_time is None:
@@ -256,13 +524,15 @@ class Task:
         return int(self.end_time - self.start_time)
 
     def run(self):
+        from .stdio_helpers import redirect, stop_redirect
         self.start_time = time.time()
-        redirect(self.stdout)
+        redirect(self.stdout, self.stderr)
 
         # Check if all path dependencies are met
         self._check_path_dependencies()
 
         # Store the last-modification timestamp of the already existing products.
+        stat_cache.invalidate(self.products)
         product_timestamps_before_running: Dict[str, float] = self._get_timestamp_of_products()
 
         # Call the actual function
@@ -275,8 +545,11 @@ class Task:
             raise TaskRaisedExceptionException(e)
         finally:
             stop_redirect()
+            self.stdout.close()
+            self.stderr.close()
 
-        # Check if any product does not exist.
+        # Check if any product does not exist. The function changed the products, so we need fresh stats.
+        stat_cache.invalidate(self.products)
         self._check_existence_of_products()
 
         # Check if any product has not been updated.
@@ -284,38 +557,78 @@ class Task:
         not_updated_products = _get_not_updated_products(product_timestamps_after_running,
                                                          product_timestamps_before_running)
         if len(not_updated_products) > 0:
-            self._status = TaskStatus.FAILED
+            self.set_to_failed()
             raise ProductNotUpdatedException(f"Task {self.name}: Product/s {not_updated_products} not updated.")
 
         self._status = TaskStatus.FINISHED
         self.end_time = time.time()
 
+    def run_and_collect(self) -> TaskRunResult:
+        """
+        Run the task and collect the result instead of raising. Use this if the task runs on a copy.
+        """
+        try:
+            self.run()
+        except Exception:
+            if not self.is_in_failed_terminal_state and self._status != TaskStatus.RETRYING:
+                self.set_to_failed()
+            self.stderr.write(traceback.format_exc())
+        if self.end_time is None:
+            self.end_time = time.time()
+        # The peak of the whole process, hence an upper bound if the process ran other tasks before.
+        self.peak_mem = _get_peak_mem_of_process()
+        self.stderr.close()
+        # The full output is in the log files already, if the task has some.
+        return TaskRunResult(status=self._status, start_time=self.start_time, end_time=self.end_time,
+                             stdout=self.stdout.tail(), stderr=self.stderr.tail(), peak_mem=self.peak_mem)
+
+    def apply_run_result(self, result: TaskRunResult) -> None:
+        """
+        Update the task with the result of a run on a copy.
+        """
+        self.start_time = result.start_time
+        self.end_time = result.end_time
+        self.peak_mem = result.peak_mem
+        self.stdout, self.stderr = self._new_output_capture("stdout"), self._new_output_capture("stderr")
+        self.stdout.adopt(result.stdout)
+        self.stderr.adopt(result.stderr)
+        if result.status in FAILED_TERMINAL_STATES:
+            self.set_to_failed()
+        else:
+            self._status = result.status
+
+    def reset(self) -> None:
+        """
+        Forget the state of the last run, such that the task can get submitted again. The output of the last run is
+        kept, the output of the next one gets appended after a note about the retry.
+        """
+        reason = self.failed_attempts[-1] if len(self.failed_attempts) > 0 else self._status.name
+        note = f"[depio] Attempt {len(self.failed_attempts)} failed ({reason}), retrying.\n"
+        if self.slurmjob is not None and not self.packed:
+            # get_stdout and get_stderr read the log of the new job, the old one stays on the disk
+            note = (f"[depio] Attempt {len(self.failed_attempts)} failed ({reason}), see the log of slurm job "
+                    f"{self.slurmjob.job_id}. Retrying.\n")
+        self.stdout.write(note)
+        self.stderr.write(note)
+        self._status = TaskStatus.WAITING
+        self.slurmjob = None
+        self._slurmid = None
+        self._slurmstate = ""
+        self.packed = False
+        self.start_time = None
+        self.end_time = None
+        self.peak_mem = None
+        self.retry_at = None
+        self._should_run_memo = None
+
     def barerun(self):
         self.func(*self.func_args, **self.func_kwargs)
 
     def _set_status_by_slurmstate(self, slurmstate):
-
-        if slurmstate in ['RUNNING', 'CONFIGURING', 'COMPLETING', 'STAGE_OUT']:
-            _status = TaskStatus.RUNNING
-        elif slurmstate in ['FAILED', 'BOOT_FAIL', 'DEADLINE', 'NODE_FAIL', 'OUT_OF_MEMORY',
-                            'PREEMPTED', 'SPECIAL_EXIT', 'STOPPED', 'SUSPENDED', 'TIMEOUT']:
-            _status = TaskStatus.FAILED
-            self.set_to_failed()
-        elif slurmstate in ['READY', 'PENDING', 'REQUEUE_FED', 'REQUEUED']:
-            _status = TaskStatus.PENDING
-        elif slurmstate == 'CANCELLED':
-            _status = TaskStatus.CANCELED
-        elif 'CANCELLED' in slurmstate: # Slurm set 'CANCELLED by <number>' sometimes...
-            _status = TaskStatus.CANCELED
-        elif slurmstate in ['COMPLETED']:
-            _status = TaskStatus.FINISHED
-        elif slurmstate in ['RESV_DEL_HOLD', 'REQUEUE_HOLD', 'RESIZING', 'REVOKED', 'SIGNALING']:
-            _status = TaskStatus.HOLD
-        elif slurmstate in ['UNKNOWN']:
-            _status = TaskStatus.UNKNOWN
-        else:
-            #print(f"Unknown slurmjob status! -> {slurmstate} ")
-            _status = TaskStatus.UNKNOWN
+        _status = slurmstate_to_status(slurmstate)
+        if _status == TaskStatus.FAILED:
+            self.set_to_failed(reason=slurmstate)
+            _status = self._status  # FAILED, or RETRYING if the retry policy applies
 
         self._status = _status
         return _status
@@ -324,11 +637,18 @@ class Task:
         assert self.slurmjob is not None
 
         self.slurmjob.watcher.update()
-
-        self._slurmstate = self.slurmjob.state
-        self._set_status_by_slurmstate(self._slurmstate)
-
-        self._slurmid = f"{int(self.slurmjob.job_id):d}-{int(self.slurmjob.task_id):d}"
+        self.set_slurmstate(self.slurmjob.state)
+
+    def set_slurmstate(self, slurmstate: str) -> None:
+        """
+        Apply a state of the slurm job, e.g., as reported by the SlurmStatePoller of the executor.
+        """
+        if slurmstate == self._slurmstate:
+            return
+        self._slurmstate = slurmstate
+        if self._status == TaskStatus.DEPFAILED:
+            return  # The job got canceled because of a failed dependency. Keep the reason.
+        self._set_status_by_slurmstate(slurmstate)
 
     @property
     def slurmjob_status(self):
@@ -375,11 +695,23 @@ class Task:
             s = self._status
             slurmstate = ""
         else:
-            if self._slurmstate is None: self._update_by_slurmjob()
+            # The state gets updated by the executor, see set_slurmstate
+            s = self._status
             slurmstate = self._slurmstate
-            s = self._set_status_by_slurmstate(slurmstate)
         return s, self.statustext(s), self.statuscolor(s), slurmstate
 
+    @property
+    def _status(self) -> TaskStatus:
+        return self._status_value
+
+    @_status.setter
+    def _status(self, status: TaskStatus) -> None:
+        # All status changes pass here, hence the listener (e.g., the UI counters) never has to rescan the tasks.
+        old_status = self._status_value
+        self._status_value = status
+        if self.status_listener is not None and old_status != status:
+            self.status_listener(self, old_status, status)
+
     @property
     def is_in_terminal_state(self) -> bool:
         return self._status in TERMINAL_STATES
@@ -396,7 +728,20 @@ class Task:
         for task in self.dependent_tasks:
             task.set_to_depfailed()
 
-    def set_to_failed(self):
+    def set_to_failed(self, reason: str = "FAILED"):
+        """
+        Fail the task and its dependent tasks, unless the retry policy allows another attempt.
+        :param reason: The reason of the failure, e.g., the state of the slurm job.
+        """
+        attempt = len(self.failed_attempts) + 1
+        if self.retry_policy is not None and self.retry_policy.should_retry(reason, attempt):
+            self.failed_attempts.append(reason)
+            self.retry_at = time.time() + self.retry_policy.get_backoff(attempt)
+            self._status = TaskStatus.RETRYING
+            return
+
+        if self._status != TaskStatus.FAILED:
+            self.failed_attempts.append(reason)
         self._status = TaskStatus.FAILED
         if self.slurmjob is not None:
             self.slurmjob.cancel()
@@ -424,13 +769,18 @@ class Task:
         if self.slurmjob is None:
             return ""
 
-        self._update_by_slurmjob()
+        if self._slurmid is None:
+            self._slurmid = f"{self.slurmjob.job_id}-{self.slurmjob.task_id}"
         return f"{self._slurmid}"
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
             if self.func != other.func:
                 return False
+            # Equal tasks have equal hashes. The hashes are cached, hence this rejects most unequal tasks without
+            # comparing their arguments.
+            if self._dedup_hash is not None and other._dedup_hash is not None and self._dedup_hash != other._dedup_hash:
+                return False
 
             for k,v1 in self.cleaned_args.items():
                 if k not in other.cleaned_args:
@@ -465,22 +815,101 @@ class Task:
         else:
             return False
 
-    def get_stderr(self):
-        if self.slurmjob is None:
-            return self.stderr.getvalue()
-        else:
-            return self.slurmjob.stderr()
+    def configure_output(self, log_dir: Path = None, max_size: int = None, compress: bool = False) -> None:
+        """
+        Configure the capture of the output of the task.
+        :param log_dir: Directory the full stdout and stderr get spilled to, named after the queue id and the name.
+        :param max_size: Number of characters of each stream that are kept in memory. None keeps everything.
+        :param compress: Compress the log files with gzip.
+        """
+        if log_dir is not None and not isinstance(log_dir, Path):
+            log_dir = Path(log_dir)
+        self._output_config = (log_dir, max_size, compress)
+        self._stdout, self._stderr = None, None
 
-    def get_stdout(self):
-        if self.slurmjob is None:
-            return self.stdout.getvalue()
+    @property
+    def stdout(self) -> OutputCapture:
+        if self._stdout is None:
+            self._stdout = self._new_output_capture("stdout")
+        return self._stdout
+
+    @stdout.setter
+    def stdout(self, capture: OutputCapture | None) -> None:
+        self._stdout = capture
+
+    @property
+    def stderr(self) -> OutputCapture:
+        if self._stderr is None:
+            self._stderr = self._new_output_capture("stderr")
+        return self._stderr
+
+    @stderr.setter
+    def stderr(self, capture: OutputCapture | None) -> None:
+        self._stderr = capture
+
+    def _new_output_capture(self, stream: str) -> OutputCapture:
+        log_dir, max_size, compress = self._output_config
+        path = None
+        if log_dir is not None:
+            name = re.sub(r"[^\w.-]", "_", self.name)
+            path = log_dir / f"{self._queue_id}_{name}.{stream}.log{'.gz' if compress else ''}"
+        return OutputCapture(path, max_size)
+
+    def get_stderr(self, tail: bool = False):
+        """
+        :param tail: Only return the output kept in memory instead of reading the full log file.
+        """
+        if self.slurmjob is None or self.packed:
+            return self.stderr.tail() if tail else self.stderr.getvalue()
+        else:
+            # The output of the earlier attempts, see reset
+            previous = self._stderr.getvalue() if self._stderr is not None else ""
+            return previous + (self.slurmjob.stderr() or "")
+
+    def get_stdout(self, tail: bool = False):
+        """
+        :param tail: Only return the output kept in memory instead of reading the full log file.
+        """
+        if self.slurmjob is None or self.packed:
+            return self.stdout.tail() if tail else self.stdout.getvalue()
         else:
-            return self.slurmjob.stdout()
+            # The output of the earlier attempts, see reset
+            previous = self._stdout.getvalue() if self._stdout is not None else ""
+            return previous + (self.slurmjob.stdout() or "")
         
+    def __getstate__(self):
+        # Only keep what is needed to run the task, e.g., on a slurm node. The links to other tasks would pull in the
+        # whole DAG and the signature database holds a connection that cannot be pickled.
+        state = {name: getattr(self, name) for name in Task.__slots__ if name != "__weakref__" and hasattr(self, name)}
+        state["dependencies"] = [d for d in self.dependencies if not isinstance(d, Task)]
+        state["_task_dependencies"] = []
+        state["_dependent_tasks"] = []
+        state["_graph"] = None
+        state["slurmjob"] = None
+        state["signature_db"] = None
+        state["retry_policy"] = None  # The pipeline decides about retries, not the copy
+        state["status_listener"] = None
+        state["_dedup_hash"] = None  # The hash of the function differs between processes
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def dedup_key(self) -> typing.Hashable:
+        """
+        Hashable key based on the function and the cleaned_args. Equal tasks have equal keys.
+        """
+        func_key = self.func if self.schema.func_is_hashable else id(self.func)
+        return func_key, frozenset((k, _freeze(v)) for k, v in self.cleaned_args.items())
+
     def __hash__(self):
-        # Hash based on function and cleaned_args
-        return hash((id(self.func), tuple(sorted(self.cleaned_args.items()))))
+        # Hash based on function and cleaned_args. Only the hash is cached, the key would take more memory than the task.
+        if self._dedup_hash is None:
+            self._dedup_hash = hash(self.dedup_key)
+        return self._dedup_hash
     
 
 
-__all__ = [Task, Product, Dependency, _get_not_updated_products]
+__all__ = [Task, TaskSchema, Product, Dependency, _get_not_updated_products]
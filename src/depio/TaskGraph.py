@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from array import array
+from typing import Iterable, List
+
+from .Task import Task
+
+
+class TaskGraph:
+    """
+    The edges between the tasks of a pipeline in compressed sparse row format, i.e., two flat integer arrays per
+    direction instead of two lists per task. The tasks are referred to by their index, i.e., task._queue_id - 1.
+    The Pipeline builds the graph once the order is solved, the tasks look their neighbors up in it.
+    """
+
+    def __init__(self, tasks: List[Task], dependency_ids: Iterable[Iterable[int]]):
+        """
+        :param tasks: The tasks of the pipeline, in the order of their queue ids.
+        :param dependency_ids: For each task, the indices of the tasks it depends on.
+        """
+        self.tasks: List[Task] = tasks
+
+        # The dependencies of task i are _dependency_ids[_dependency_offsets[i]:_dependency_offsets[i + 1]]
+        self._dependency_offsets: array = array("q", [0])
+        self._dependency_ids: array = array("i")
+        for ids in dependency_ids:
+            self._dependency_ids.extend(ids)
+            self._dependency_offsets.append(len(self._dependency_ids))
+        assert len(self._dependency_offsets) == len(tasks) + 1, "Expected the dependencies of every task."
+
+        # The same for the other direction, filled by counting sort
+        num_dependents = array("q", bytes(8 * (len(tasks) + 1)))
+        for j in self._dependency_ids:
+            num_dependents[j + 1] += 1
+        for i in range(len(tasks)):
+            num_dependents[i + 1] += num_dependents[i]
+        self._dependent_offsets: array = array("q", num_dependents)
+        self._dependent_ids: array = array("i", bytes(4 * len(self._dependency_ids)))
+        for i in range(len(tasks)):
+            for j in self.get_dependency_ids(i):
+                self._dependent_ids[num_dependents[j]] = i
+                num_dependents[j] += 1
+
+    def __len__(self) -> int:
+        return len(self._dependency_offsets) - 1
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._dependency_ids)
+
+    def get_dependency_ids(self, i: int) -> array:
+        return self._dependency_ids[self._dependency_offsets[i]:self._dependency_offsets[i + 1]]
+
+    def get_dependent_ids(self, i: int) -> array:
+        return self._dependent_ids[self._dependent_offsets[i]:self._dependent_offsets[i + 1]]
+
+    def get_dependencies(self, i: int) -> List[Task]:
+        return [self.tasks[j] for j in self.get_dependency_ids(i)]
+
+    def get_dependents(self, i: int) -> List[Task]:
+        return [self.tasks[j] for j in self.get_dependent_ids(i)]
+
+    def get_num_dependencies(self, i: int) -> int:
+        return self._dependency_offsets[i + 1] - self._dependency_offsets[i]
+
+    def get_in_degrees(self) -> array:
+        """
+        :return: A new array of the number of dependencies of each task, e.g., as counters for the scheduling.
+        """
+        offsets = self._dependency_offsets
+        return array("i", (offsets[i + 1] - offsets[i] for i in range(len(self))))
+
+    def get_topological_order(self) -> List[int]:
+        """
+        :return: The indices of the tasks in a topological order, by Kahn's algorithm. Tasks on a cycle are missing.
+        """
+        remaining = self.get_in_degrees()
+        order = [i for i in range(len(self)) if remaining[i] == 0]
+        for i in order:
+            for j in self.get_dependent_ids(i):
+                remaining[j] -= 1
+                if remaining[j] == 0:
+                    order.append(j)
+        return order
+
+
+__all__ = [TaskGraph]
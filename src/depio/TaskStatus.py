@@ -14,6 +14,7 @@ class TaskStatus(enum.Enum):
     DEPFAILED = enum.auto()
     HOLD = enum.auto()
     UNKNOWN = enum.auto()
+    RETRYING = enum.auto()
 
 
 TERMINAL_STATES = [
@@ -0,0 +1,97 @@
+"""
+Command line tool to follow pipelines that got submitted in detached mode.
+
+    depio status .depio/manifest_<name>.json
+    depio wait .depio/manifest_<name>.json --interval 60
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+from .Manifest import Manifest
+from .SlurmStatePoller import SlurmStatePoller
+from .Task import slurmstate_to_status
+from .TaskStatus import TaskStatus, TERMINAL_STATES, FAILED_TERMINAL_STATES
+
+
+def get_statuses(manifest: Manifest, poller: SlurmStatePoller) -> Dict[int, TaskStatus]:
+    """
+    Current status of each task of the manifest, by one batched sacct query.
+    Tasks whose jobs never start, because a dependency failed, are reported as DEPFAILED.
+    """
+    job_ids = sorted({t["job_id"] for t in manifest.tasks if t["job_id"] is not None})
+    states = poller.query_states(job_ids)
+
+    statuses: Dict[int, TaskStatus] = {}
+    for t in manifest.tasks:
+        if t["job_id"] is None:
+            statuses[t["id"]] = TaskStatus[t["status"]]
+        elif t["job_id"] in states:
+            statuses[t["id"]] = slurmstate_to_status(states[t["job_id"]])
+        else:
+            statuses[t["id"]] = TaskStatus.UNKNOWN
+
+    # Propagate failures in topological order
+    dependents: Dict[int, List[int]] = {t["id"]: [] for t in manifest.tasks}
+    remaining = {t["id"]: len(t["dependencies"]) for t in manifest.tasks}
+    for t in manifest.tasks:
+        for d in t["dependencies"]:
+            dependents[d].append(t["id"])
+    order = [task_id for task_id, n in remaining.items() if n == 0]
+    dependencies = {t["id"]: t["dependencies"] for t in manifest.tasks}
+    for task_id in order:
+        failed = any(statuses[d] in FAILED_TERMINAL_STATES for d in dependencies[task_id])
+        if failed and statuses[task_id] in [TaskStatus.PENDING, TaskStatus.CANCELED, TaskStatus.UNKNOWN]:
+            statuses[task_id] = TaskStatus.DEPFAILED
+        for dependent in dependents[task_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+    return statuses
+
+
+def print_status(manifest: Manifest, statuses: Dict[int, TaskStatus], verbose: bool) -> None:
+    histogram: Dict[str, int] = {}
+    for status in statuses.values():
+        histogram[status.name] = histogram.get(status.name, 0) + 1
+    summary = ", ".join(f"{name}: {count}" for name, count in sorted(histogram.items()))
+    print(f"Pipeline {manifest.name} ({len(manifest.tasks)} tasks) - {summary}")
+    if verbose:
+        for t in manifest.tasks:
+            print(f"{t['id']:>6}  {t['name']:<30}  {t['job_id'] or '':<14}  {statuses[t['id']].name}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="depio", description="Follow depio pipelines submitted in detached mode.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in [("status", "Print the status of the tasks once."),
+                               ("wait", "Wait until all tasks are done. Exits with 1 if any task failed.")]:
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument("manifest", help="The manifest written by the detached pipeline.")
+        subparser.add_argument("--sacct", default="sacct", help="The sacct executable.")
+        subparser.add_argument("-v", "--verbose", action="store_true", help="Print the status of every task.")
+        if command == "wait":
+            subparser.add_argument("--interval", type=float, default=60.0, help="Seconds between two sacct calls.")
+    args = parser.parse_args(argv)
+
+    manifest = Manifest.read(args.manifest)
+    poller = SlurmStatePoller(sacct_command=args.sacct)
+
+    while True:
+        statuses = get_statuses(manifest, poller)
+        print_status(manifest, statuses, args.verbose)
+        done = all(status in TERMINAL_STATES for status in statuses.values())
+        if args.command == "status" or done:
+            break
+        time.sleep(args.interval)
+
+    if args.command == "wait":
+        return 1 if any(status in FAILED_TERMINAL_STATES for status in statuses.values()) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,9 @@
+import contextlib
 import datetime
+import hashlib
+import os
 import pathlib
+from typing import Dict, Iterable, Optional
 
 def getmtime(f: pathlib.Path):
     return datetime.datetime.fromtimestamp(f.stat().st_mtime)
@@ -11,3 +15,95 @@ def getatime(f: pathlib.Path):
 
 def getctime(f: pathlib.Path):
     return datetime.datetime.fromtimestamp(f.stat().st_ctime)
+
+
+def content_hash(f: pathlib.Path, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of the content of a file. For directories, the relative names and the contents of all files inside are
+    hashed.
+    """
+    h = hashlib.sha256()
+    if f.is_dir():
+        for child in sorted(p for p in f.rglob("*") if p.is_file()):
+            h.update(str(child.relative_to(f)).encode())
+            h.update(content_hash(child, chunk_size).encode())
+        return h.hexdigest()
+
+    with open(f, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class StatCache:
+    """
+    Cache for the stat results of paths. On network filesystems every stat is a round trip, hence the pipeline
+    shares one cache between all tasks during a scheduling tick (or event), see tick. Outside of a tick, every call
+    stats the path again.
+    Each tick starts a new generation, which can be used to memoize values that depend on the stats.
+    """
+
+    _MISSING = object()
+
+    def __init__(self):
+        self._stats: Dict[pathlib.Path, Optional[os.stat_result]] = {}
+        self._depth: int = 0  # Number of nested ticks
+        self.generation: int = 0
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether the stats are cached, i.e., whether a tick is running. Memoize values only if so.
+        """
+        return self._depth > 0
+
+    @contextlib.contextmanager
+    def tick(self):
+        """
+        Cache the stats until the end of the block. The cache starts empty and is dropped afterward. Nested ticks share
+        the cache of the outermost one.
+        """
+        if self._depth == 0:
+            self.clear()
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.clear()
+
+    def stat(self, f: pathlib.Path) -> Optional[os.stat_result]:
+        """
+        The stat result of the path, or None if it does not exist.
+        """
+        st = self._stats.get(f, self._MISSING)
+        if st is self._MISSING:
+            try:
+                st = os.stat(f)
+            except (FileNotFoundError, NotADirectoryError):
+                st = None
+            if self._depth > 0:
+                self._stats[f] = st
+        return st
+
+    def exists(self, f: pathlib.Path) -> bool:
+        return self.stat(f) is not None
+
+    def getmtime(self, f: pathlib.Path) -> float:
+        st = self.stat(f)
+        if st is None:
+            raise FileNotFoundError(f)
+        return st.st_mtime
+
+    def invalidate(self, paths: Iterable[pathlib.Path]) -> None:
+        for f in paths:
+            self._stats.pop(f, None)
+
+    def clear(self) -> None:
+        self._stats = {}
+        self.generation += 1
+
+
+# Shared by all tasks of the process
+stat_cache = StatCache()
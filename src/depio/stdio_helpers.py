@@ -13,7 +13,6 @@
 
 import threading
 import sys
-from io import StringIO
 import copy
 
 from typing import Any
@@ -25,7 +24,8 @@ orig___stdout__ = sys.__stdout__
 orig___stderr__ = sys.__stderr__
 orig_stdout = sys.stdout
 orig_stderr = sys.stderr
-thread_proxies = {}
+thread_proxies = {}  # Used by the LocalProxy, see _get_stream
+_routes = threading.local()  # The redirected streams of the current thread, used by the StreamRouter
 
 
 class LocalProxy:
@@ -170,39 +170,88 @@ class LocalProxy:
     __deepcopy__ = lambda x, memo: copy.deepcopy(x._get_current_object(), memo)
 
 
-def redirect(stringio: StringIO):
+class StreamRouter:
     """
-    Enables the redirect for the current thread's output to a single cStringIO
-    object and returns the object.
-
-    :return: The StringIO object.
-    :rtype: ``cStringIO.StringIO``
+    Routes the writes of each thread to the stream the thread got redirected to, see redirect.
+    The writes of all other threads go to the original stream.
+    Unlike the LocalProxy, write and flush look up the stream of the thread directly, which matters for print-heavy
+    tasks. All other attributes are forwarded.
     """
-    # Get the current thread's identity.
-    ident = threading.current_thread().ident
 
-    # Enable the redirect and return the cStringIO object.
-    thread_proxies[ident] = stringio
+    def __init__(self, original, route: str, line_buffering: bool = False):
+        """
+        :param original: The stream of the threads that are not redirected.
+        :param route: The attribute of _routes holding the stream of the current thread, "stdout" or "stderr".
+        :param line_buffering: Collect the writes of a redirected thread until a line is complete.
+            Hence, a print call ends up as one write to the stream instead of two.
+        """
+        self._original = original
+        self._route: str = route
+        self._line_buffering: bool = line_buffering
+        self._pending = threading.local()
+
+    def _get_current_object(self):
+        return getattr(_routes, self._route, None) or self._original
+
+    def write(self, s: str) -> int:
+        stream = getattr(_routes, self._route, None)
+        if stream is None:
+            return self._original.write(s)
+        if not self._line_buffering:
+            return stream.write(s)
+
+        pending = getattr(self._pending, "chunks", None)
+        if pending is None:
+            pending = self._pending.chunks = []
+        pending.append(s)
+        if "\n" in s:
+            stream.write("".join(pending))
+            pending.clear()
+        return len(s)
+
+    def flush(self) -> None:
+        stream = getattr(_routes, self._route, None)
+        if stream is None:
+            return self._original.flush()
+        pending = getattr(self._pending, "chunks", None)
+        if pending:
+            stream.write("".join(pending))
+            pending.clear()
+        stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_current_object(), name)
 
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self._route} of {self._get_current_object()!r}>"
 
-def stop_redirect():
+
+def redirect(stdout, stderr=None):
     """
-    Enables the redirect for the current thread's output to a single cStringIO
-    object and returns the object.
+    Enables the redirect for the current thread's output.
 
-    :return: The final string value.
-    :rtype: ``str``
+    :param stdout: The stream the stdout of the current thread is written to, e.g., a StringIO.
+    :param stderr: The stream the stderr of the current thread is written to. Defaults to stdout.
     """
-    # Get the current thread's identity.
-    ident = threading.current_thread().ident
+    _routes.stdout = stdout
+    _routes.stderr = stderr if stderr is not None else stdout
+
+    # Keep the LocalProxy working as well.
+    thread_proxies[threading.current_thread().ident] = stdout
 
-    # Only act on proxied threads.
-    if ident not in thread_proxies:
-        return
 
-    # Read the value, close/remove the buffer, and return the value.
-    thread_proxies[ident] = None
-    del thread_proxies[ident]
+def stop_redirect():
+    """
+    Disables the redirect for the current thread's output.
+    """
+    # Write the pending partial lines of the line buffering routers.
+    for stream in (sys.stdout, sys.stderr):
+        if isinstance(stream, StreamRouter) and getattr(_routes, stream._route, None) is not None:
+            stream.flush()
+    _routes.stdout = None
+    _routes.stderr = None
+
+    thread_proxies.pop(threading.current_thread().ident, None)
 
 
 def _get_stream(original):
@@ -233,15 +282,21 @@ def _get_stream(original):
     return proxy
 
 
-def enable_proxy():
+def enable_proxy(line_buffering: bool = False):
     """
-    Overwrites __stdout__, __stderr__, stdout, and stderr with the proxied
-    objects.
+    Overwrites __stdout__, __stderr__, stdout, and stderr with the routing
+    objects. Streams that are routed already are kept.
+
+    :param line_buffering: See StreamRouter.
     """
-    sys.__stdout__ = LocalProxy(_get_stream(sys.__stdout__))
-    sys.__stderr__ = LocalProxy(_get_stream(sys.__stderr__))
-    sys.stdout = LocalProxy(_get_stream(sys.stdout))
-    sys.stderr = LocalProxy(_get_stream(sys.stderr))
+    if not isinstance(sys.__stdout__, StreamRouter):
+        sys.__stdout__ = StreamRouter(sys.__stdout__, "stdout", line_buffering)
+    if not isinstance(sys.__stderr__, StreamRouter):
+        sys.__stderr__ = StreamRouter(sys.__stderr__, "stderr", line_buffering)
+    if not isinstance(sys.stdout, StreamRouter):
+        sys.stdout = StreamRouter(sys.stdout, "stdout", line_buffering)
+    if not isinstance(sys.stderr, StreamRouter):
+        sys.stderr = StreamRouter(sys.stderr, "stderr", line_buffering)
 
 
 def disable_proxy():
@@ -255,4 +310,4 @@ def disable_proxy():
     sys.stderr = orig_stderr
 
 
-__all__ = [redirect, stop_redirect, enable_proxy, disable_proxy]
+__all__ = [StreamRouter, redirect, stop_redirect, enable_proxy, disable_proxy]
@@ -0,0 +1,109 @@
+import contextlib
+import stat
+
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import SubmitItExecutor
+from depio.Task import Task
+
+
+# Task functions shared by the tests. They are module-level functions, such that the ProcessExecutor can pickle them.
+def dummyfunc(i: int):
+    pass
+
+
+def failingfunc(i: int):
+    raise Exception("This function raises an exception")
+
+
+class FakeSlurmJob:
+    def __init__(self, job_id, fn=None, args=()):
+        self.job_id = job_id
+        self.task_id = 0
+        self.fn = fn
+        self.args = args
+        self.canceled = False
+
+    def result(self):
+        return self.fn(*self.args)
+
+    def cancel(self):
+        self.canceled = True
+
+
+class FakeInternalExecutor:
+    """Mimics the parts of submitit's executor that the SubmitItExecutor uses."""
+
+    def __init__(self):
+        self.parameters = {}
+        self.submissions = []  # List of (parameters, number of jobs) per sbatch call
+        self._batch = None
+        self._next_id = 100
+
+    def update_parameters(self, **kwargs):
+        assert self._batch is None
+        self.parameters.update(kwargs)
+
+    @contextlib.contextmanager
+    def batch(self):
+        self._batch = []
+        yield
+        base_id = self._next_id
+        self._next_id += 1
+        for i, job in enumerate(self._batch):
+            job.job_id = f"{base_id}_{i}"
+        self.submissions.append((dict(self.parameters), len(self._batch)))
+        self._batch = None
+
+    def submit(self, fn, *args):
+        if self._batch is not None:
+            job = FakeSlurmJob(None, fn, args)
+            self._batch.append(job)
+            return job
+        job = FakeSlurmJob(str(self._next_id), fn, args)
+        self._next_id += 1
+        self.submissions.append((dict(self.parameters), 1))
+        return job
+
+
+@pytest.fixture
+def make_task():
+    """
+    Factory of tasks that run outside of a pipeline, hence without dependencies on other tasks or paths.
+    The arguments default to [name] and the buildmode to ALWAYS.
+    """
+    def make(name, func=dummyfunc, args=None, **kwargs):
+        kwargs.setdefault("buildmode", BuildMode.ALWAYS)
+        task = Task(name, func, args if args is not None else [name], **kwargs)
+        task.task_dependencies = []  # Set by the pipeline otherwise
+        task.path_dependencies = []
+        return task
+    return make
+
+
+@pytest.fixture
+def fake_command(tmp_path):
+    """
+    Factory of fake executables, e.g., sacct. They print the given output and append their arguments to
+    <name>_calls.txt.
+    """
+    def make(name, output=""):
+        script = tmp_path / name
+        script.write_text(f"#!/bin/sh\necho \"$@\" >> {tmp_path / (name + '_calls.txt')}\ncat <<'EOF'\n{output}\nEOF\n")
+        script.chmod(script.stat().st_mode | stat.S_IEXEC)
+        return script
+    return make
+
+
+@pytest.fixture
+def make_submitit_executor(fake_command):
+    """
+    Factory of SubmitItExecutors that submit to a FakeInternalExecutor and query a fake sacct with the given output.
+    """
+    def make(sacct_output="", **kwargs):
+        kwargs = {"parameters": {"slurm_mem": 1}, "min_poll_interval": 0.0,
+                  "sacct_command": str(fake_command("sacct", sacct_output)),
+                  "scontrol_command": str(fake_command("scontrol")), **kwargs}
+        return SubmitItExecutor(internal_executor=FakeInternalExecutor(), **kwargs)
+    return make
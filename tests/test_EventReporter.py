@@ -0,0 +1,83 @@
+import io
+import json
+import socket
+import threading
+
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.EventReporter import EventReporter
+from depio.Executors import ParallelExecutor
+from depio.Pipeline import Pipeline
+from depio.Task import Task
+
+from conftest import dummyfunc, failingfunc
+
+
+def read_events(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_reporter_writes_json_lines_to_stream():
+    stream = io.StringIO()
+    reporter = EventReporter(stream)
+    task = Task("t", dummyfunc, [1])
+    task._queue_id = 7
+    reporter.emit("pipeline_started", num_tasks=1)
+    reporter.emit_task("started", task)
+    reporter.close()
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [e["event"] for e in events] == ["pipeline_started", "started"]
+    assert events[1]["task"] == 7 and events[1]["name"] == "t" and events[1]["slurm_id"] is None
+    assert not stream.closed
+
+
+def test_reporter_writes_to_tcp_socket():
+    server = socket.create_server(("127.0.0.1", 0))
+    received = []
+
+    def accept():
+        connection, _ = server.accept()
+        with connection, connection.makefile("r") as f:
+            received.extend(f.read().splitlines())
+
+    thread = threading.Thread(target=accept)
+    thread.start()
+    reporter = EventReporter(f"tcp://127.0.0.1:{server.getsockname()[1]}")
+    reporter.emit("pipeline_started")
+    reporter.close()
+    thread.join(timeout=5)
+    server.close()
+
+    assert [json.loads(line)["event"] for line in received] == ["pipeline_started"]
+
+
+def test_quiet_pipeline_reports_events_without_ui(tmp_path, monkeypatch):
+    def no_live(*args, **kwargs):
+        raise AssertionError("The UI must not be set up in quiet mode")
+    monkeypatch.setattr("rich.live.Live", no_live)
+
+    events_path = tmp_path / "events.jsonl"
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, depio_dir=tmp_path, events=events_path)
+    t1 = pipeline.add_task(Task("t1", dummyfunc, [1], buildmode=BuildMode.ALWAYS))
+    t2 = pipeline.add_task(Task("t2", failingfunc, [2], depends_on=[t1], buildmode=BuildMode.ALWAYS))
+    pipeline.add_task(Task("t3", dummyfunc, [3], depends_on=[t2], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit):
+        pipeline.run()
+
+    events = read_events(events_path)
+    by_task = {}
+    for e in events:
+        if "name" in e and e["event"] != "pipeline_started":
+            by_task.setdefault(e["name"], []).append(e["event"])
+    assert events[0]["event"] == "pipeline_started" and events[0]["num_tasks"] == 3
+    assert by_task["t1"] == ["submitted", "started", "finished"]
+    assert by_task["t2"] == ["submitted", "started", "failed"]
+    assert by_task["t3"] == ["depfailed"]
+    assert events[-1]["event"] == "pipeline_finished" and events[-1]["success"] is False
+    assert events[-1]["counts"] == {"finished": 1, "failed": 1, "depfailed": 1}
+
+    finished = next(e for e in events if e["event"] == "finished")
+    assert finished["duration"] >= 0.0
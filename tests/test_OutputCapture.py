@@ -0,0 +1,92 @@
+import zlib
+
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import ParallelExecutor, ProcessExecutor
+from depio.OutputCapture import OutputCapture
+from depio.Pipeline import Pipeline
+from depio.Task import Task
+
+
+def chattyfunc(n: int):
+    for i in range(n):
+        print(f"line {i}")
+
+
+def failingchattyfunc(n: int):
+    chattyfunc(n)
+    raise Exception("This function raises an exception")
+
+
+def test_capture_keeps_tail_in_memory():
+    capture = OutputCapture(max_size=10)
+    capture.write("0123456789")
+    assert not capture.truncated
+    capture.write("abc")
+    capture.write("defghijklmn")
+    assert capture.tail() == "efghijklmn"
+    assert capture.getvalue() == "efghijklmn"
+    assert capture.truncated
+
+
+@pytest.mark.parametrize("name", ["out.log", "out.log.gz"])
+def test_capture_spills_full_stream(tmp_path, name):
+    capture = OutputCapture(tmp_path / "logs" / name, max_size=5)
+    for i in range(100):
+        capture.write(f"{i}\n")
+    capture.flush()
+
+    expected = "".join(f"{i}\n" for i in range(100))
+    if name.endswith(".gz"):
+        # Readable while the file is still open, e.g., by zcat
+        data = zlib.decompressobj(wbits=31).decompress((tmp_path / "logs" / name).read_bytes())
+        assert data.decode() == expected
+    else:
+        assert (tmp_path / "logs" / name).read_text() == expected
+    assert capture.getvalue() == expected
+    assert capture.tail() == "8\n99\n"
+
+    # Opening the file again appends, e.g., for the next attempt
+    capture.close()
+    capture.write("again\n")
+    assert capture.getvalue() == expected + "again\n"
+    capture.close()
+
+
+def test_capture_falls_back_to_memory_if_log_file_fails(tmp_path):
+    (tmp_path / "file").write_text("")
+    capture = OutputCapture(tmp_path / "file" / "out.log", max_size=5)
+    capture.write("hello world")
+    assert capture.path is None
+    assert "world" in capture.getvalue()
+    assert "Spilling the output failed" in capture.getvalue()
+
+
+def test_pipeline_spills_output_to_log_dir(tmp_path):
+    log_dir = tmp_path / "logs"
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, depio_dir=tmp_path, log_dir=log_dir,
+                        max_output_size=100, compress_logs=True)
+    t1 = pipeline.add_task(Task("chatty task", chattyfunc, [1000], buildmode=BuildMode.ALWAYS))
+    t2 = pipeline.add_task(Task("failing", failingchattyfunc, [1000], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit):
+        pipeline.run()
+
+    assert t1.stdout.path == log_dir / "1_chatty_task.stdout.log.gz"
+    assert len(t1.get_stdout(tail=True)) == 100
+    assert t1.get_stdout().splitlines() == [f"line {i}" for i in range(1000)]
+    assert t2.get_stdout().endswith("line 999\n")
+
+
+def test_process_executor_spills_output_in_worker(tmp_path):
+    executor = ProcessExecutor(max_workers=1, start_method="fork")
+    task = Task("t", chattyfunc, [1000], buildmode=BuildMode.ALWAYS)
+    task.path_dependencies = []  # Set by the pipeline otherwise
+    task._queue_id = 1
+    task.configure_output(tmp_path, max_size=100)
+    executor.submit(task)
+    executor.wait_for_all()
+
+    assert len(task.get_stdout(tail=True)) == 100
+    assert task.get_stdout().splitlines() == [f"line {i}" for i in range(1000)]
@@ -0,0 +1,138 @@
+import functools
+import threading
+import time
+
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import ParallelExecutor
+from depio.Pipeline import Pipeline
+from depio.Resources import Resources
+from depio.Task import Task
+from depio.TaskStatus import TaskStatus
+
+
+class ConcurrencyProbe:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.order = []
+
+
+probe = ConcurrencyProbe()
+
+
+def probedfunc(name: str):
+    with probe.lock:
+        probe.order.append(name)
+        probe.running += 1
+        probe.max_running = max(probe.max_running, probe.running)
+    time.sleep(0.05)
+    with probe.lock:
+        probe.running -= 1
+
+
+@pytest.fixture(autouse=True)
+def reset_probe():
+    probe.__init__()
+
+
+@pytest.fixture
+def make_task(make_task):
+    # The tasks of this module record their concurrency in the probe
+    return functools.partial(make_task, func=probedfunc)
+
+
+def test_admits_tasks_only_while_they_fit(make_task):
+    executor = ParallelExecutor(resources=Resources(cpus=4, mem=1000))
+    tasks = [make_task(f"t{i}", slurm_parameters={"cpus_per_task": 2, "slurm_mem": 400}) for i in range(6)]
+    for task in tasks:
+        executor.submit(task)
+    executor.wait_for_all()
+
+    assert probe.max_running == 2
+    assert all(t.status[0] == TaskStatus.FINISHED for t in tasks)
+    assert executor.available == executor.capacity
+
+
+def test_task_exceeding_capacity_fails(make_task):
+    executor = ParallelExecutor(resources=Resources(cpus=4, mem=1000, gpus=0))
+    task = make_task("gpu", slurm_parameters={"gpus_per_node": 1})
+    executor.submit(task)
+    executor.wait_for_all()
+
+    assert task.status[0] == TaskStatus.FAILED
+    assert "exceeds the capacity" in task.get_stderr()
+    assert probe.order == []
+
+
+def test_waiting_tasks_are_admitted_by_critical_path_length(make_task):
+    executor = ParallelExecutor(resources=Resources(cpus=1))
+    blocker = make_task("blocker")
+    short = make_task("short")
+    long = make_task("long")
+    long.critical_path_length = 10.0
+    for task in [blocker, short, long]:
+        executor.submit(task)
+    executor.wait_for_all()
+
+    assert probe.order == ["blocker", "long", "short"]
+
+
+def test_best_fit_prefers_task_that_fills_the_capacity(make_task):
+    executor = ParallelExecutor(resources=Resources(cpus=4), placement="best-fit")
+    blocker = make_task("blocker", slurm_parameters={"cpus_per_task": 4})
+    small = make_task("small", slurm_parameters={"cpus_per_task": 1})
+    large = make_task("large", slurm_parameters={"cpus_per_task": 4})
+    for task in [blocker, small, large]:
+        executor.submit(task)
+    executor.wait_for_all()
+
+    assert probe.order == ["blocker", "large", "small"]
+
+
+@pytest.mark.parametrize("placement", ["first-fit", "best-fit"])
+def test_large_task_is_not_starved_by_smaller_ones(placement, make_task):
+    executor = ParallelExecutor(resources=Resources(cpus=4), placement=placement)
+    large = make_task("large", slurm_parameters={"cpus_per_task": 4})
+    small = make_task("small", slurm_parameters={"cpus_per_task": 1})
+    executor.available = Resources(cpus=1)  # Three small tasks are running
+    executor.waiting_tasks = [(0, large, Resources(cpus=4)), (1, small, Resources(cpus=1))]
+
+    with executor._lock:
+        # The free CPU is reserved for the large task
+        assert executor._admit_waiting_tasks() == []
+        executor.available = Resources(cpus=4)
+        assert executor._admit_waiting_tasks() == [(large, Resources(cpus=4))]
+    assert executor.waiting_tasks == [(1, small, Resources(cpus=1))]
+
+
+def test_tasks_may_use_what_the_reservation_does_not_need(make_task):
+    executor = ParallelExecutor(resources=Resources(cpus=4, gpus=1))
+    gpu = make_task("gpu", slurm_parameters={"cpus_per_task": 1, "gpus_per_node": 1})
+    cpu = make_task("cpu", slurm_parameters={"cpus_per_task": 2})
+    executor.available = Resources(cpus=3, gpus=0)  # Another GPU task is running
+    executor.waiting_tasks = [(0, gpu, Resources(cpus=1, gpus=1)), (1, cpu, Resources(cpus=2))]
+
+    with executor._lock:
+        assert executor._admit_waiting_tasks() == [(cpu, Resources(cpus=2))]
+    assert executor.available == Resources(cpus=1, gpus=0)
+
+
+def test_unknown_placement():
+    with pytest.raises(ValueError):
+        ParallelExecutor(resources=Resources(cpus=1), placement="worst-fit")
+
+
+def test_pipeline_computes_critical_path_lengths(tmp_path):
+    pipeline = Pipeline(ParallelExecutor(resources=Resources(cpus=2)), quiet=True, refreshrate=0.1, event_driven=True,
+                        depio_dir=tmp_path)
+    a = pipeline.add_task(Task("a", probedfunc, ["a"], buildmode=BuildMode.ALWAYS, expected_duration=5))
+    b = pipeline.add_task(Task("b", probedfunc, ["b"], depends_on=[a], buildmode=BuildMode.ALWAYS, expected_duration=2))
+    c = pipeline.add_task(Task("c", probedfunc, ["c"], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert (a.critical_path_length, b.critical_path_length, c.critical_path_length) == (7.0, 2.0, 1.0)
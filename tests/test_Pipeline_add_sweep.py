@@ -0,0 +1,70 @@
+from pathlib import Path
+from typing import Annotated, List
+
+from depio.BuildMode import BuildMode
+from depio.Executors import SequentialExecutor
+from depio.Pipeline import Pipeline
+from depio.Task import Dependency, IgnoredForEq, Product, Task, TaskSchema
+
+
+def train(data: Annotated[Path, Dependency], out: Annotated[Path, Product], lr: float, seed: int,
+          verbose: Annotated[bool, IgnoredForEq] = False):
+    pass
+
+
+def merge(inputs: Annotated[List[Path], Dependency], out: Annotated[Path, Product]):
+    pass
+
+
+def test_sweep_over_cartesian_product(tmp_path):
+    pipeline = Pipeline(SequentialExecutor(), quiet=True, depio_dir=tmp_path)
+    grid = {"lr": [0.1, 0.01], "seed": [0, 1, 2]}
+    tasks = pipeline.add_sweep(train, grid, name="train_{lr}_{seed}",
+                               func_kwargs={"data": Path("data.csv"), "out": None}, buildmode=BuildMode.ALWAYS)
+
+    assert [t.name for t in tasks] == [f"train_{lr}_{seed}" for lr in [0.1, 0.01] for seed in [0, 1, 2]]
+    assert pipeline.tasks == tasks
+    assert all(t.buildmode == BuildMode.ALWAYS for t in tasks)
+    assert tasks[4].func_kwargs["lr"] == 0.01 and tasks[4].func_kwargs["seed"] == 1
+    assert tasks[0].dependencies == [Path("data.csv")]
+
+
+def test_sweep_over_points_registers_products(tmp_path):
+    pipeline = Pipeline(SequentialExecutor(), quiet=True, depio_dir=tmp_path)
+    points = [{"out": Path(f"out/{i}.pt"), "seed": i} for i in range(5)]
+    tasks = pipeline.add_sweep(train, points, func_kwargs={"data": Path("data.csv"), "lr": 0.1})
+
+    assert [t.name for t in tasks] == [f"train_{i}" for i in range(5)]
+    assert [t.products for t in tasks] == [[Path(f"out/{i}.pt")] for i in range(5)]
+    assert pipeline.registered_products == {Path(f"out/{i}.pt") for i in range(5)}
+
+    # Sweeping again returns the registered tasks, the arguments ignored for equality do not matter
+    again = pipeline.add_sweep(train, points, func_kwargs={"data": Path("data.csv"), "lr": 0.1, "verbose": True})
+    assert all(a is t for a, t in zip(again, tasks))
+    assert len(pipeline.tasks) == 5
+
+
+def test_schema_is_parsed_once_per_function():
+    schema = TaskSchema.of(merge)
+    assert TaskSchema.of(merge) is schema
+    assert schema.arg_names == ("inputs", "out")
+    assert schema.annotated[Dependency] == [("inputs", True)]
+    assert schema.annotated[Product] == [("out", False)]
+
+    task = Task("merge", merge, [[Path("a"), Path("b")], Path("c")])
+    assert task.dependencies == [Path("a"), Path("b")]
+    assert task.products == [Path("c")]
+
+
+def test_schema_is_shared_by_the_tasks_of_a_function():
+    a = Task("a", train, func_kwargs={"data": Path("data.csv"), "out": Path("a.pt"), "lr": 0.1, "seed": 0})
+    b = Task("b", train, func_kwargs={"data": Path("data.csv"), "out": Path("b.pt"), "lr": 0.1, "seed": 0,
+                                      "verbose": True})
+    assert a.schema is b.schema is TaskSchema.of(train)
+    assert "verbose" not in b.cleaned_args
+
+    # Unequal tasks are rejected by their cached dedup keys, equal tasks are still compared argument by argument
+    assert hash(a) != hash(b) and a != b
+    c = Task("c", train, func_kwargs={"data": Path("data.csv"), "out": Path("a.pt"), "lr": 0.1, "seed": 0,
+                                      "verbose": True})
+    assert hash(a) == hash(c) and a == c
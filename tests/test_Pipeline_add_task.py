@@ -8,8 +8,8 @@ from depio.Task import Task
 
 
 @pytest.fixture()
-def pipeline(request):
-    return Pipeline(None, False, quiet=True)
+def pipeline(request, tmp_path):
+    return Pipeline(None, False, quiet=True, depio_dir=tmp_path)
 
 def dummyfunc(self):
     pass
@@ -50,3 +50,30 @@ def test_add_task_registered_dependency(pipeline):
     # assert task2._queue_id == 2
     assert task1 in pipeline.tasks
     assert task2 in pipeline.tasks
+
+def listfunc(paths: list, n: int):
+    pass
+
+def test_add_task_duplicated_task_with_unhashable_args(pipeline):
+    task1 = Task("task1", listfunc, [[pathlib.Path("a"), pathlib.Path("b")], 1])
+    task2 = Task("task2", listfunc, [[pathlib.Path("a"), pathlib.Path("b")], 1])
+    task3 = Task("task3", listfunc, [[pathlib.Path("a"), pathlib.Path("c")], 1])
+    assert pipeline.add_task(task1) is task1
+    assert pipeline.add_task(task2) is task1
+    assert pipeline.add_task(task3) is task3
+    assert len(pipeline.tasks) == 2
+
+def test_add_task_product_already_registered(pipeline):
+    producing_task = Task("producing_task", dummyfunc, [1], produces=[pathlib.Path("test.txt")])
+    producing_task2 = Task("producing_task2", dummyfunc, [2], produces=[pathlib.Path("test.txt")])
+    pipeline.add_task(producing_task)
+    with pytest.raises(ProductAlreadyRegisteredException):
+        pipeline.add_task(producing_task2)
+
+def test_add_task_registered_dependency_by_equal_task(pipeline):
+    task1 = Task("task1", dummyfunc, [1])
+    pipeline.add_task(task1)
+    task2 = Task("task2", dummyfunc, [2], depends_on=[Task("task1", dummyfunc, [1])])
+    pipeline.add_task(task2)
+    pipeline._solve_order()
+    assert task2.task_dependencies[0] is task1
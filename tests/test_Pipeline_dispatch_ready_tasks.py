@@ -0,0 +1,190 @@
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import AbstractTaskExecutor
+from depio.Pipeline import Pipeline
+from depio.Task import Task
+from depio.TaskStatus import TaskStatus
+
+from conftest import dummyfunc
+
+
+class RecordingExecutor(AbstractTaskExecutor):
+    """Records the submitted tasks without running them."""
+
+    def __init__(self, handles_dependencies: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self._handles_dependencies = handles_dependencies
+        self.submitted = []
+
+    def submit(self, task, task_dependencies=None):
+        self.submitted.append(task)
+
+    def wait_for_all(self):
+        pass
+
+    def cancel_all_jobs(self):
+        pass
+
+    def handles_dependencies(self):
+        return self._handles_dependencies
+
+
+def diamond(pipeline):
+    a = pipeline.add_task(Task("a", dummyfunc, [1], buildmode=BuildMode.ALWAYS))
+    b = pipeline.add_task(Task("b", dummyfunc, [2], depends_on=[a], buildmode=BuildMode.ALWAYS))
+    c = pipeline.add_task(Task("c", dummyfunc, [3], depends_on=[a], buildmode=BuildMode.ALWAYS))
+    d = pipeline.add_task(Task("d", dummyfunc, [4], depends_on=[b, c], buildmode=BuildMode.ALWAYS))
+    return a, b, c, d
+
+
+def prepare(pipeline):
+    pipeline._solve_order()
+    pipeline._init_scheduling_state()
+
+
+def finish(pipeline, task):
+    task._status = TaskStatus.FINISHED
+    pipeline._on_task_finished(task)
+
+
+def test_dispatch_releases_dependents_only_when_all_dependencies_finished(tmp_path):
+    executor = RecordingExecutor()
+    pipeline = Pipeline(executor, quiet=True, depio_dir=tmp_path)
+    a, b, c, d = diamond(pipeline)
+    prepare(pipeline)
+
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == [a]
+
+    finish(pipeline, a)
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == [a, b, c]
+
+    finish(pipeline, b)
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == [a, b, c]
+
+    finish(pipeline, c)
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == [a, b, c, d]
+    assert pipeline.handled_tasks == {1, 2, 3, 4}
+
+
+def test_dispatch_settles_dependents_of_failed_task(tmp_path):
+    executor = RecordingExecutor()
+    pipeline = Pipeline(executor, quiet=True, depio_dir=tmp_path)
+    a, b, c, d = diamond(pipeline)
+    prepare(pipeline)
+
+    pipeline._dispatch_ready_tasks()
+    a.set_to_failed()
+    pipeline._collect_finished_tasks()
+    pipeline._dispatch_ready_tasks()
+
+    assert executor.submitted == [a]
+    assert pipeline._num_settled_tasks == 4
+    assert d.status[0] == TaskStatus.DEPFAILED
+
+
+def test_dispatch_submits_in_topological_order_if_executor_handles_dependencies(tmp_path):
+    executor = RecordingExecutor(handles_dependencies=True)
+    pipeline = Pipeline(executor, quiet=True, depio_dir=tmp_path)
+    a, b, c, d = diamond(pipeline)
+    prepare(pipeline)
+
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == [a, b, c, d]
+
+
+def test_dispatch_respects_jobs_queued_limit(tmp_path):
+    executor = RecordingExecutor(max_jobs_queued=1)
+    pipeline = Pipeline(executor, quiet=True, submit_only_if_runnable=True, depio_dir=tmp_path)
+    tasks = [pipeline.add_task(Task(f"t{i}", dummyfunc, [i], buildmode=BuildMode.ALWAYS)) for i in range(3)]
+    prepare(pipeline)
+
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == tasks[:1]
+
+    finish(pipeline, tasks[0])
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == tasks[:2]
+
+
+def test_dispatch_respects_jobs_pending_limit(tmp_path):
+    executor = RecordingExecutor(max_jobs_pending=2)
+    pipeline = Pipeline(executor, quiet=True, submit_only_if_runnable=True, depio_dir=tmp_path)
+    tasks = [pipeline.add_task(Task(f"t{i}", dummyfunc, [i], buildmode=BuildMode.ALWAYS)) for i in range(4)]
+    prepare(pipeline)
+
+    # The tasks that are not submitted yet do not count towards the limit
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == tasks[:2]
+
+    # Running tasks are not pending anymore
+    tasks[0]._status = TaskStatus.RUNNING
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == tasks[:3]
+
+
+def test_dispatch_respects_both_limits(tmp_path):
+    executor = RecordingExecutor(max_jobs_queued=2, max_jobs_pending=1)
+    pipeline = Pipeline(executor, quiet=True, submit_only_if_runnable=True, depio_dir=tmp_path)
+    tasks = [pipeline.add_task(Task(f"t{i}", dummyfunc, [i], buildmode=BuildMode.ALWAYS)) for i in range(4)]
+    prepare(pipeline)
+
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == tasks[:1]
+
+    # The pending limit has room again, but the queued limit is reached
+    tasks[0]._status = TaskStatus.RUNNING
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == tasks[:2]
+    tasks[1]._status = TaskStatus.RUNNING
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == tasks[:2]
+
+    finish(pipeline, tasks[0])
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == tasks[:3]
+
+
+def test_polling_loop_runs_pipeline(tmp_path):
+    executor = RecordingExecutor()
+    pipeline = Pipeline(executor, quiet=True, refreshrate=0.0, depio_dir=tmp_path)
+    executor.submit = lambda task, deps=None: task.run()
+    a, b, c, d = diamond(pipeline)
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert all(t.status[0] == TaskStatus.FINISHED for t in [a, b, c, d])
+
+
+def test_dispatch_prefers_long_critical_path(tmp_path):
+    executor = RecordingExecutor(max_jobs_queued=1)
+    pipeline = Pipeline(executor, quiet=True, submit_only_if_runnable=True, depio_dir=tmp_path)
+    cheap = [pipeline.add_task(Task(f"cheap{i}", dummyfunc, [i], buildmode=BuildMode.ALWAYS)) for i in range(3)]
+    head = pipeline.add_task(Task("head", dummyfunc, [10], buildmode=BuildMode.ALWAYS))
+    tail = pipeline.add_task(Task("tail", dummyfunc, [11], depends_on=[head], buildmode=BuildMode.ALWAYS,
+                                  expected_duration=60))
+    prepare(pipeline)
+
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == [head]
+
+    finish(pipeline, head)
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == [head, tail]
+
+
+def test_dispatch_prefers_explicit_priority(tmp_path):
+    executor = RecordingExecutor()
+    pipeline = Pipeline(executor, quiet=True, depio_dir=tmp_path)
+    low = pipeline.add_task(Task("low", dummyfunc, [1], buildmode=BuildMode.ALWAYS, expected_duration=60))
+    high = pipeline.add_task(Task("high", dummyfunc, [2], buildmode=BuildMode.ALWAYS, priority=1))
+    same = pipeline.add_task(Task("same", dummyfunc, [3], buildmode=BuildMode.ALWAYS))
+    prepare(pipeline)
+
+    pipeline._dispatch_ready_tasks()
+    assert executor.submitted == [high, low, same]
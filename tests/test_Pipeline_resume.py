@@ -0,0 +1,147 @@
+import json
+from pathlib import Path
+from typing import Annotated
+
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import ParallelExecutor
+from depio.Journal import Journal
+from depio.Pipeline import Pipeline
+from depio.Task import Product, Task
+from depio.TaskStatus import TaskStatus
+
+from conftest import FakeSlurmJob
+
+calls = []
+broken = set()
+
+
+def countingfunc(name: str):
+    calls.append(name)
+    if name in broken:
+        raise Exception(f"{name} is broken")
+
+
+def producingfunc(out: Annotated[Path, Product]):
+    calls.append(out.name)
+    out.write_text("done")
+
+
+def make_pipeline(tmp_path, executor=None, resume=False):
+    pipeline = Pipeline(executor or ParallelExecutor(), quiet=True, refreshrate=0.05, depio_dir=tmp_path,
+                        resume=resume, journal=True)
+    a = pipeline.add_task(Task("a", countingfunc, ["a"], buildmode=BuildMode.ALWAYS))
+    b = pipeline.add_task(Task("b", countingfunc, ["b"], depends_on=[a], buildmode=BuildMode.ALWAYS))
+    return pipeline, a, b
+
+
+def test_replay_ignores_cut_off_lines(tmp_path):
+    journal = Journal(tmp_path / "journal.jsonl")
+    journal.open(resume=False)
+    journal.record_submitted("a", "12")
+    journal.record_submitted("b", "13")
+    journal.record_status("b", "FINISHED")
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"event": "status", "task": "a", "sta')
+
+    assert journal.replay() == {"a": {"status": None, "job_id": "12"}, "b": {"status": "FINISHED", "job_id": "13"}}
+
+
+def test_resume_skips_finished_tasks(tmp_path):
+    calls.clear()
+    broken.clear()
+    broken.add("b")
+    pipeline, a, b = make_pipeline(tmp_path)
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 1
+    assert calls == ["a", "b"]
+
+    broken.clear()
+    pipeline, a, b = make_pipeline(tmp_path, resume=True)
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert calls == ["a", "b", "b"]
+    assert a.status[0] == TaskStatus.FINISHED
+
+
+def test_without_resume_everything_runs_again(tmp_path):
+    calls.clear()
+    broken.clear()
+    for _ in range(2):
+        pipeline, a, b = make_pipeline(tmp_path)
+        with pytest.raises(SystemExit):
+            pipeline.run()
+    assert calls == ["a", "b", "a", "b"]
+
+
+def test_resume_reattaches_to_slurm_jobs(tmp_path, make_submitit_executor):
+    pipeline, a, b = make_pipeline(tmp_path)
+    journal = pipeline.journal
+    journal.open(resume=False)
+    journal.record_submitted(a.identity, "100")
+    journal.record_submitted(b.identity, "101")
+    journal.close()
+
+    executor = make_submitit_executor("100|COMPLETED\n101|COMPLETED", folder=tmp_path / "slurm")
+    executor._get_slurmjob = lambda job_id: FakeSlurmJob(job_id)
+    pipeline, a, b = make_pipeline(tmp_path, executor=executor, resume=True)
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert executor.internal_executor.submissions == []
+    assert (a.slurmid, b.slurmid) == ("100-0", "101-0")
+    assert b.status[0] == TaskStatus.FINISHED
+
+    records = [json.loads(line) for line in pipeline.journal.path.read_text().splitlines()]
+    assert [r["event"] for r in records].count("status") == 2
+
+
+def test_no_journal_unless_requested(tmp_path):
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, depio_dir=tmp_path)
+    pipeline.add_task(Task("a", countingfunc, ["a"], buildmode=BuildMode.ALWAYS))
+    with pytest.raises(SystemExit):
+        pipeline.run()
+    assert not pipeline.journal.path.exists()
+
+
+def test_resume_resubmits_jobs_unknown_to_slurm(tmp_path, make_submitit_executor):
+    pipeline, a, b = make_pipeline(tmp_path)
+    journal = pipeline.journal
+    journal.open(resume=False)
+    journal.record_submitted(a.identity, "100")
+    journal.record_submitted(b.identity, "200")  # E.g., purged from the slurm database
+    journal.close()
+
+    executor = make_submitit_executor("100|COMPLETED\n300|COMPLETED", folder=tmp_path / "slurm")
+    executor.internal_executor._next_id = 300
+    executor._get_slurmjob = lambda job_id: FakeSlurmJob(job_id)
+    pipeline, a, b = make_pipeline(tmp_path, executor=executor, resume=True)
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert len(executor.internal_executor.submissions) == 1
+    assert (a.slurmid, b.slurmid) == ("100-0", "300-0")
+
+
+def test_resume_runs_finished_tasks_again_if_their_products_are_missing(tmp_path):
+    calls.clear()
+
+    def run(resume):
+        pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, depio_dir=tmp_path, resume=resume,
+                            journal=True)
+        pipeline.add_task(Task("p", producingfunc, [tmp_path / "out.txt"], buildmode=BuildMode.ALWAYS))
+        with pytest.raises(SystemExit) as e:
+            pipeline.run()
+        assert e.value.code == 0
+
+    run(resume=False)
+    run(resume=True)
+    assert calls == ["out.txt"]  # Restored
+
+    (tmp_path / "out.txt").unlink()
+    run(resume=True)
+    assert calls == ["out.txt", "out.txt"]
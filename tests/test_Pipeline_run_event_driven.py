@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import ParallelExecutor, SequentialExecutor
+from depio.Pipeline import Pipeline
+from depio.Task import Task
+from depio.TaskStatus import TaskStatus
+
+from conftest import dummyfunc, failingfunc
+
+
+def test_event_driven_runs_chain_without_waiting_for_refreshrate(tmp_path):
+    # With a refreshrate of 10s a polling loop would need minutes for this chain.
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=10.0, event_driven=True, depio_dir=tmp_path)
+    tasks = [pipeline.add_task(Task("t0", dummyfunc, [0], buildmode=BuildMode.ALWAYS))]
+    for i in range(1, 20):
+        tasks.append(pipeline.add_task(Task(f"t{i}", dummyfunc, [i], depends_on=[tasks[-1]],
+                                            buildmode=BuildMode.ALWAYS)))
+
+    start = time.time()
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert time.time() - start < 5.0
+    assert all(t.status[0] == TaskStatus.FINISHED for t in tasks)
+
+
+def test_event_driven_sequential_executor(tmp_path):
+    pipeline = Pipeline(SequentialExecutor(), quiet=True, refreshrate=10.0, event_driven=True, depio_dir=tmp_path)
+    t1 = pipeline.add_task(Task("t1", dummyfunc, [1], buildmode=BuildMode.ALWAYS))
+    t2 = pipeline.add_task(Task("t2", dummyfunc, [2], depends_on=[t1], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert t2.status[0] == TaskStatus.FINISHED
+
+
+def test_event_driven_failed_dependency(tmp_path):
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=10.0, event_driven=True, depio_dir=tmp_path)
+    t1 = pipeline.add_task(Task("t1", failingfunc, [1], buildmode=BuildMode.ALWAYS))
+    t2 = pipeline.add_task(Task("t2", dummyfunc, [2], depends_on=[t1], buildmode=BuildMode.ALWAYS))
+    t3 = pipeline.add_task(Task("t3", dummyfunc, [3], depends_on=[t2], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 1
+    assert t1.status[0] == TaskStatus.FAILED
+    assert t2.status[0] == TaskStatus.DEPFAILED
+    assert t3.status[0] == TaskStatus.DEPFAILED
@@ -29,8 +29,8 @@ class PathMock(Path):
 
 
 @pytest.fixture
-def pipeline():
-    return Pipeline(None, False, quiet=True)
+def pipeline(tmp_path):
+    return Pipeline(None, False, quiet=True, depio_dir=tmp_path)
 
 def dummyfunc(self):
     pass
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import ProcessExecutor
+from depio.Pipeline import Pipeline
+from depio.Task import Task
+from depio.TaskStatus import TaskStatus
+
+from conftest import failingfunc
+
+
+def printingfunc(i: int):
+    print(f"pid {os.getpid()}")
+    return i
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_process_executor_propagates_result_to_parent_task(start_method, make_task):
+    executor = ProcessExecutor(max_workers=2, start_method=start_method)
+    task = make_task("t", printingfunc, [1])
+    executor.submit(task)
+    executor.wait_for_all()
+
+    assert task.status[0] == TaskStatus.FINISHED
+    assert task.start_time is not None and task.end_time >= task.start_time
+    assert task.get_stdout().strip() != f"pid {os.getpid()}"
+    assert task.get_stdout().startswith("pid ")
+
+
+def test_process_executor_failed_task(make_task):
+    executor = ProcessExecutor(max_workers=1, start_method="fork")
+    task = make_task("t", failingfunc, [1])
+    executor.submit(task)
+    executor.wait_for_all()
+
+    assert task.status[0] == TaskStatus.FAILED
+    assert "This function raises an exception" in task.get_stderr()
+
+
+def test_process_executor_runs_pipeline(tmp_path):
+    pipeline = Pipeline(ProcessExecutor(max_workers=2, start_method="fork"), quiet=True, refreshrate=0.1,
+                        event_driven=True, depio_dir=tmp_path)
+    t1 = pipeline.add_task(Task("t1", printingfunc, [1], buildmode=BuildMode.ALWAYS))
+    t2 = pipeline.add_task(Task("t2", printingfunc, [2], depends_on=[t1], buildmode=BuildMode.ALWAYS))
+    t3 = pipeline.add_task(Task("t3", failingfunc, [3], buildmode=BuildMode.ALWAYS))
+    t4 = pipeline.add_task(Task("t4", printingfunc, [4], depends_on=[t3], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 1
+    assert t2.status[0] == TaskStatus.FINISHED
+    assert t3.status[0] == TaskStatus.FAILED
+    assert t4.status[0] == TaskStatus.DEPFAILED
@@ -0,0 +1,67 @@
+import pytest
+from rich.console import Console
+
+from depio.BuildMode import BuildMode
+from depio.Executors import ParallelExecutor
+from depio.Pipeline import Pipeline
+from depio.ProgressTracker import ProgressTracker
+from depio.Task import Task
+from depio.TaskStatus import TaskStatus
+
+from conftest import dummyfunc, failingfunc
+
+
+def test_tracker_counts_status_changes():
+    tracker = ProgressTracker()
+    tasks = [Task(f"t{i}", dummyfunc, [i]) for i in range(3)]
+    for task in tasks:
+        task.status_listener = tracker.on_status_change
+        tracker.add(task)
+    assert tracker.get_counts() == {TaskStatus.WAITING: 3}
+
+    tasks[0]._status = TaskStatus.RUNNING
+    tasks[1]._status = TaskStatus.RUNNING
+    assert tracker.get_counts() == {TaskStatus.WAITING: 1, TaskStatus.RUNNING: 2}
+    assert tracker.get_running(1) == [tasks[0]]
+
+    tasks[0]._status = TaskStatus.FINISHED
+    tasks[1]._status = TaskStatus.RETRYING
+    tasks[1]._status = TaskStatus.FAILED
+    assert tracker.get_counts() == {TaskStatus.WAITING: 1, TaskStatus.FINISHED: 1, TaskStatus.FAILED: 1}
+    assert tracker.get_running(10) == []
+    assert tracker.get_recently_failed(10) == [tasks[1]]
+
+
+def test_pipeline_keeps_histogram_up_to_date(tmp_path):
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, event_driven=True, ui="compact",
+                        depio_dir=tmp_path)
+    t1 = pipeline.add_task(Task("t1", failingfunc, [1], buildmode=BuildMode.ALWAYS))
+    pipeline.add_task(Task("t2", dummyfunc, [2], depends_on=[t1], buildmode=BuildMode.ALWAYS))
+    pipeline.add_task(Task("t3", dummyfunc, [3], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit):
+        pipeline.run()
+    assert pipeline.progress.get_counts() == {TaskStatus.FAILED: 1, TaskStatus.DEPFAILED: 1, TaskStatus.FINISHED: 1}
+    assert pipeline.progress.get_recently_failed(5) == [t1]
+
+
+def test_compact_ui_renders_bounded_window(tmp_path):
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, ui_max_rows=5, depio_dir=tmp_path)
+    tasks = [pipeline.add_task(Task(f"task{i}", dummyfunc, [i], buildmode=BuildMode.ALWAYS)) for i in range(1000)]
+    pipeline._solve_order()
+    pipeline._init_scheduling_state()
+    for task in tasks[:10]:
+        task._status = TaskStatus.RUNNING
+    assert pipeline._use_compact_ui()
+
+    console = Console(width=200, record=True)
+    console.print(pipeline._print_tasks())
+    output = console.export_text()
+    assert "1000 ready" in output
+    assert "task4 " in output and "task5 " not in output  # Five running tasks and five ready ones
+    assert "task999" not in output
+
+
+def test_unknown_ui_raises():
+    with pytest.raises(ValueError):
+        Pipeline(ParallelExecutor(), quiet=True, ui="fancy")
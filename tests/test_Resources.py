@@ -0,0 +1,30 @@
+import pytest
+
+from depio.Resources import Resources
+
+
+def test_from_slurm_parameters():
+    assert Resources.from_slurm_parameters({}) == Resources(cpus=1, mem=0, gpus=0)
+    assert Resources.from_slurm_parameters({"cpus_per_task": 4, "slurm_mem": "16G", "gpus_per_node": 2}) == \
+           Resources(cpus=4, mem=16 * 1024, gpus=2)
+    assert Resources.from_slurm_parameters({"slurm_mem": 32}) == Resources(cpus=1, mem=32, gpus=0)
+    assert Resources.from_slurm_parameters({"mem_gb": 2}) == Resources(cpus=1, mem=2048, gpus=0)
+
+
+def test_from_slurm_parameters_invalid_mem():
+    with pytest.raises(ValueError):
+        Resources.from_slurm_parameters({"slurm_mem": "a lot"})
+
+
+def test_fits_into_and_arithmetic():
+    capacity = Resources(cpus=8, mem=1024, gpus=1)
+    assert Resources(cpus=8, mem=1024, gpus=1).fits_into(capacity)
+    assert not Resources(cpus=1, mem=0, gpus=2).fits_into(capacity)
+    assert capacity - Resources(cpus=2, mem=24, gpus=1) == Resources(cpus=6, mem=1000, gpus=0)
+    assert (capacity - Resources(cpus=2)) + Resources(cpus=2) == capacity
+
+
+def test_of_local_machine():
+    local = Resources.of_local_machine()
+    assert local.cpus >= 1
+    assert local.mem > 0
@@ -0,0 +1,160 @@
+from pathlib import Path
+from typing import Annotated
+
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import ParallelExecutor, SequentialExecutor
+from depio.Pipeline import Pipeline
+from depio.RetryPolicy import RetryPolicy
+from depio.Task import Product, Task
+from depio.TaskStatus import TaskStatus
+
+from conftest import dummyfunc
+
+calls = {}
+
+
+def flakyfunc(name: str, failures: int):
+    calls[name] = calls.get(name, 0) + 1
+    if calls[name] <= failures:
+        raise Exception(f"Failure {calls[name]} of {name}")
+
+
+def chattyflakyfunc(name: str, failures: int):
+    print(f"Run {calls.get(name, 0) + 1} of {name}")
+    flakyfunc(name, failures)
+
+
+def lazyfunc(name: str, out: Annotated[Path, Product]):
+    # Produces its product only on the second call
+    calls[name] = calls.get(name, 0) + 1
+    if calls[name] >= 2:
+        out.write_text("done")
+
+
+def test_should_retry_respects_max_attempts_and_states():
+    policy = RetryPolicy(max_attempts=3, retry_on={"PREEMPTED": 5, "OUT_OF_MEMORY": 2})
+    assert policy.should_retry("PREEMPTED", 1)
+    assert policy.should_retry("PREEMPTED", 2)
+    assert not policy.should_retry("PREEMPTED", 3)
+    assert policy.should_retry("OUT_OF_MEMORY", 1)
+    assert not policy.should_retry("OUT_OF_MEMORY", 2)
+    assert not policy.should_retry("FAILED", 1)
+
+
+def test_backoff_grows_until_max_backoff():
+    policy = RetryPolicy(backoff=10, backoff_factor=3, max_backoff=50)
+    assert [policy.get_backoff(a) for a in [1, 2, 3]] == [10, 30, 50]
+
+
+def test_task_gets_retried_before_failing_dependents(tmp_path):
+    calls.clear()
+    policy = RetryPolicy(max_attempts=3, backoff=0.0, retry_on={"FAILED": 3})
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, event_driven=True, depio_dir=tmp_path,
+                        retry_policy=policy)
+    flaky = pipeline.add_task(Task("flaky", flakyfunc, ["flaky", 2], buildmode=BuildMode.ALWAYS))
+    dependent = pipeline.add_task(Task("dep", dummyfunc, [1], depends_on=[flaky], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert calls["flaky"] == 3
+    assert flaky.failed_attempts == ["FAILED", "FAILED"]
+    assert dependent.status[0] == TaskStatus.FINISHED
+    assert pipeline._get_attempts_text(flaky) == "3/3 (FAILED, FAILED)"
+
+
+def test_retry_keeps_the_output_of_earlier_attempts(tmp_path):
+    calls.clear()
+    policy = RetryPolicy(max_attempts=3, backoff=0.0, retry_on={"FAILED": 3})
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, event_driven=True, depio_dir=tmp_path,
+                        retry_policy=policy)
+    flaky = pipeline.add_task(Task("flaky", chattyflakyfunc, ["chatty", 2], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert flaky.get_stdout() == ("Run 1 of chatty\n[depio] Attempt 1 failed (FAILED), retrying.\n"
+                                  "Run 2 of chatty\n[depio] Attempt 2 failed (FAILED), retrying.\n"
+                                  "Run 3 of chatty\n")
+
+
+def test_sequential_executor_retries(tmp_path):
+    calls.clear()
+    policy = RetryPolicy(max_attempts=3, backoff=0.0, retry_on={"FAILED": 3})
+    pipeline = Pipeline(SequentialExecutor(), quiet=True, refreshrate=0.0, depio_dir=tmp_path, retry_policy=policy)
+    flaky = pipeline.add_task(Task("flaky", flakyfunc, ["sequential", 2], buildmode=BuildMode.ALWAYS))
+    dependent = pipeline.add_task(Task("dep", dummyfunc, [1], depends_on=[flaky], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert calls["sequential"] == 3
+    assert flaky.failed_attempts == ["FAILED", "FAILED"]
+    assert "Failure 2 of sequential" in flaky.get_stderr()
+    assert dependent.status[0] == TaskStatus.FINISHED
+
+
+def test_missing_product_gets_retried(tmp_path):
+    calls.clear()
+    policy = RetryPolicy(max_attempts=2, backoff=0.0, retry_on={"FAILED": 2})
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, depio_dir=tmp_path, retry_policy=policy)
+    lazy = pipeline.add_task(Task("lazy", lazyfunc, ["lazy", tmp_path / "out.txt"], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    assert calls["lazy"] == 2
+    assert lazy.failed_attempts == ["FAILED"]
+    assert (tmp_path / "out.txt").read_text() == "done"
+
+
+def test_missing_product_fails_dependent_tasks(tmp_path):
+    calls.clear()
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, depio_dir=tmp_path)
+    lazy = pipeline.add_task(Task("lazy", lazyfunc, ["never", tmp_path / "out.txt"], buildmode=BuildMode.ALWAYS))
+    dependent = pipeline.add_task(Task("dep", dummyfunc, [1], depends_on=[lazy], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 1
+    assert lazy.status[0] == TaskStatus.FAILED and lazy.failed_attempts == ["FAILED"]
+    assert dependent.status[0] == TaskStatus.DEPFAILED
+
+
+def test_task_fails_once_retries_are_used_up(tmp_path):
+    calls.clear()
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.05, depio_dir=tmp_path)
+    policy = RetryPolicy(max_attempts=2, backoff=0.0, retry_on={"FAILED": 2})
+    flaky = pipeline.add_task(Task("flaky", flakyfunc, ["broken", 5], buildmode=BuildMode.ALWAYS,
+                                   retry_policy=policy))
+    dependent = pipeline.add_task(Task("dep", dummyfunc, [1], depends_on=[flaky], buildmode=BuildMode.ALWAYS))
+
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 1
+    assert calls["broken"] == 2
+    assert flaky.status[0] == TaskStatus.FAILED
+    assert flaky.failed_attempts == ["FAILED", "FAILED"]
+    assert dependent.status[0] == TaskStatus.DEPFAILED
+
+
+def test_preempted_slurm_job_gets_resubmitted(tmp_path, make_submitit_executor):
+    executor = make_submitit_executor("100|PREEMPTED\n101|PENDING")
+    task = Task("t0", dummyfunc, [0], buildmode=BuildMode.ALWAYS, retry_policy=RetryPolicy(backoff=0.0))
+    dependent = Task("t1", dummyfunc, [1], buildmode=BuildMode.ALWAYS)
+    task.task_dependencies, dependent.task_dependencies = [], [task]
+    task.dependent_tasks = [dependent]
+    executor.submit_tasks([task])
+    executor.submit_tasks([dependent])
+
+    executor.poll()
+    assert task.status[0] == TaskStatus.RETRYING
+    assert dependent.status[0] == TaskStatus.PENDING
+
+    executor.resubmit(task)
+    assert task.slurmjob.job_id == "102"
+    assert "[depio] Attempt 1 failed (PREEMPTED), see the log of slurm job 100." in task.stderr.getvalue()
+    assert task.status[0] == TaskStatus.PENDING
+    assert (tmp_path / "scontrol_calls.txt").read_text().splitlines() == ["update JobId=101 Dependency=afterok:102"]
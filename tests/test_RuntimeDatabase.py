@@ -0,0 +1,72 @@
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import ParallelExecutor, ProcessExecutor
+from depio.Pipeline import Pipeline
+from depio.RuntimeDatabase import RuntimeDatabase
+from depio.Task import Task
+
+from conftest import dummyfunc
+
+
+def test_expected_durations_use_recent_successful_runs(tmp_path):
+    db = RuntimeDatabase(tmp_path / "runtimes.sqlite")
+    for duration in [100, 1, 2, 3, 4, 5]:
+        db.record("a", duration, 10.0, "FINISHED")
+    db.record("a", 1000, None, "FAILED")
+    db.record("b", 7, None, "FINISHED")
+    db.flush()
+
+    assert db.get_expected_durations(["a", "b", "c"]) == {"a": 3, "b": 7}
+    assert db.get_peak_mems(["a", "b"]) == {"a": 10.0}
+
+
+def test_records_are_buffered_until_flush(tmp_path):
+    db = RuntimeDatabase(tmp_path / "runtimes.sqlite")
+    db.record("a", 1, None, "FINISHED")
+    assert not db.path.exists()
+    db.flush()
+    assert RuntimeDatabase(db.path).get_expected_durations(["a"]) == {"a": 1}
+
+
+def test_reading_does_not_create_the_database(tmp_path):
+    db = RuntimeDatabase(tmp_path / "runtimes.sqlite")
+    assert db.get_expected_durations(["a"]) == {}
+    assert not db.path.exists()
+
+
+def test_pipeline_records_and_loads_durations(tmp_path):
+    def make_pipeline():
+        pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.1, event_driven=True, depio_dir=tmp_path,
+                            runtime_history=True)
+        t1 = pipeline.add_task(Task("t1", dummyfunc, [1], buildmode=BuildMode.ALWAYS))
+        t2 = pipeline.add_task(Task("t2", dummyfunc, [2], buildmode=BuildMode.ALWAYS, expected_duration=42))
+        return pipeline, t1, t2
+
+    pipeline, t1, t2 = make_pipeline()
+    with pytest.raises(SystemExit):
+        pipeline.run()
+    assert t1.expected_duration is None
+
+    pipeline, t1, t2 = make_pipeline()
+    with pytest.raises(SystemExit):
+        pipeline.run()
+    assert t1.expected_duration is not None and t1.expected_duration < 1.0
+    assert t2.expected_duration == 42
+    assert pipeline._get_pipeline_eta() == 0.0
+
+
+def test_pipeline_records_no_durations_unless_requested(tmp_path):
+    pipeline = Pipeline(ParallelExecutor(), quiet=True, refreshrate=0.1, event_driven=True, depio_dir=tmp_path)
+    pipeline.add_task(Task("t1", dummyfunc, [1], buildmode=BuildMode.ALWAYS))
+    with pytest.raises(SystemExit):
+        pipeline.run()
+    assert not (tmp_path / "runtimes.sqlite").exists()
+
+
+def test_process_executor_reports_peak_mem(make_task):
+    executor = ProcessExecutor(max_workers=1, start_method="fork")
+    task = make_task("t", args=[1])
+    executor.submit(task)
+    executor.wait_for_all()
+    assert task.peak_mem is not None and task.peak_mem > 0
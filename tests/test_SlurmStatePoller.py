@@ -0,0 +1,53 @@
+import pytest
+
+from depio.SlurmStatePoller import SlurmStatePoller, _expand_job_ids
+from depio.TaskStatus import TaskStatus
+
+from conftest import FakeSlurmJob
+
+
+@pytest.fixture
+def make_slurm_task(make_task):
+    def make(i, job_id):
+        task = make_task(f"t{i}", args=[i])
+        task.slurmjob = FakeSlurmJob(job_id)
+        return task
+    return make
+
+
+def test_expand_job_ids():
+    assert _expand_job_ids("12") == ["12"]
+    assert _expand_job_ids("12_3") == ["12_3"]
+    assert _expand_job_ids("12_[1-3,5]") == ["12_1", "12_2", "12_3", "12_5"]
+    assert _expand_job_ids("12_[1-2%1]") == ["12_1", "12_2"]
+
+
+def test_parse_ignores_steps():
+    states = SlurmStatePoller.parse("10|RUNNING\n10.batch|RUNNING\n11|CANCELLED by 123\n")
+    assert states == {"10": "RUNNING", "11": "CANCELLED by 123"}
+
+
+def test_poll_uses_a_single_sacct_call(tmp_path, make_slurm_task, fake_command):
+    script = fake_command("sacct", "10|RUNNING\n10.batch|RUNNING\n11|COMPLETED\n12_[0-1]|PENDING\n13|FAILED")
+    poller = SlurmStatePoller(sacct_command=str(script), min_poll_interval=60.0)
+    tasks = [make_slurm_task(0, "10"), make_slurm_task(1, "11"), make_slurm_task(2, "12_1"), make_slurm_task(3, "13")]
+    for task in tasks:
+        poller.track(task)
+
+    assert poller.poll()
+    assert not poller.poll()  # Minimum poll interval not passed yet
+
+    calls = (tmp_path / "sacct_calls.txt").read_text().splitlines()
+    assert len(calls) == 1
+    assert "-j 10,11,12,13" in calls[0]
+
+    assert [t.status[0] for t in tasks] == [TaskStatus.RUNNING, TaskStatus.FINISHED,
+                                            TaskStatus.PENDING, TaskStatus.FAILED]
+    assert tasks[3].slurmjob.canceled
+
+
+def test_poll_without_tracked_tasks_does_not_call_sacct(tmp_path, fake_command):
+    script = fake_command("sacct", "")
+    poller = SlurmStatePoller(sacct_command=str(script), min_poll_interval=0.0)
+    assert not poller.poll()
+    assert not (tmp_path / "sacct_calls.txt").exists()
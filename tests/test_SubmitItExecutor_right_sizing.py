@@ -0,0 +1,96 @@
+import pytest
+
+from depio.Pipeline import Pipeline
+from depio.RuntimeDatabase import RuntimeDatabase
+from depio.SlurmStatePoller import SlurmStatePoller, _parse_elapsed
+from depio.TaskStatus import TaskStatus
+
+
+@pytest.fixture
+def make_executor(make_submitit_executor):
+    def make(sacct_output="", right_sizing=True, **kwargs):
+        return make_submitit_executor(sacct_output, parameters={"slurm_mem": 32000, "slurm_time": 2880},
+                                      right_sizing=right_sizing, **kwargs)
+    return make
+
+
+def test_parse_elapsed():
+    assert _parse_elapsed("03:04") == 184
+    assert _parse_elapsed("01:02:03") == 3723
+    assert _parse_elapsed("1-00:00:01") == 86401
+    assert _parse_elapsed("") is None
+
+
+def test_parse_usage_takes_max_rss_of_steps():
+    usage = SlurmStatePoller.parse_usage("10|COMPLETED|00:01:40|\n10.batch|COMPLETED|00:01:40|2048K\n"
+                                         "10.0|COMPLETED|00:01:30|3M\n11|PENDING|00:00:00|")
+    assert usage == {"10": (100.0, 3.0), "11": (0.0, None)}
+
+
+def test_right_sizing_uses_measured_usage(make_task, make_executor):
+    executor = make_executor(mem_margin=2.0, time_margin=1.5)
+    measured = make_task("t0", args=[0])
+    measured.expected_peak_mem, measured.expected_duration = 1000.0, 600.0
+    fixed = make_task("t1", args=[1], slurm_parameters={"slurm_mem": "4G"})
+    fixed.expected_peak_mem, fixed.expected_duration = 1000.0, 600.0
+    unknown = make_task("t2", args=[2])
+
+    assert executor._get_parameters(measured) == {"slurm_mem": 2000, "slurm_time": 15}
+    assert executor._get_parameters(fixed) == {"slurm_mem": "4G", "slurm_time": 15}
+    assert executor._get_parameters(unknown) == {"slurm_mem": 32000, "slurm_time": 2880}
+
+
+def test_right_sizing_turns_on_the_runtime_history(tmp_path, make_task, make_executor):
+    db = RuntimeDatabase(tmp_path / "runtimes.sqlite")
+    db.record(make_task("t0", args=[0]).identity, 600.0, 1000.0, "FINISHED")
+    db.flush()
+
+    executor = make_executor()
+    pipeline = Pipeline(executor, quiet=True, depio_dir=tmp_path)
+    task = pipeline.add_task(make_task("t0", args=[0]))
+    assert pipeline.RUNTIME_HISTORY
+    pipeline._load_runtime_history()
+    assert executor._get_parameters(task) == {"slurm_mem": 1500, "slurm_time": 15}
+
+    assert not Pipeline(make_executor(right_sizing=False), quiet=True, depio_dir=tmp_path).RUNTIME_HISTORY
+
+
+def test_poll_applies_measured_usage(make_task, make_executor):
+    executor = make_executor(sacct_output="100|COMPLETED|00:02:00|\n100.batch|COMPLETED|00:02:00|512M")
+    task = make_task("t0", args=[0])
+    executor.submit_tasks([task])
+    executor.poll()
+
+    assert task.status[0] == TaskStatus.FINISHED
+    assert task.peak_mem == 512
+    assert task.end_time - task.start_time == 120
+
+
+def test_out_of_memory_gets_resubmitted_with_escalated_memory(tmp_path, make_task, make_executor, fake_command):
+    executor = make_executor(sacct_output="100|OUT_OF_MEMORY|00:00:10|\n101|PENDING|00:00:00|",
+                             max_escalations=1)
+    task = make_task("t0", args=[0])
+    task.expected_peak_mem = 1000.0
+    dependent = make_task("t1", args=[1])
+    dependent.task_dependencies = [task]
+    task.dependent_tasks = [dependent]
+    executor.submit_tasks([task])
+    executor.submit_tasks([dependent])
+    assert dependent.slurmjob.job_id == "101"
+
+    executor.poll()
+    assert task.status[0] == TaskStatus.PENDING
+    assert task.slurmjob.job_id == "102"
+    assert executor.internal_executor.submissions[-1][0]["slurm_mem"] == 3000
+    assert task.failed_attempts == ["OUT_OF_MEMORY"]
+    assert "[depio] Attempt 1 failed (OUT_OF_MEMORY), see the log of slurm job 100." in task.stderr.getvalue()
+    scontrol_calls = (tmp_path / "scontrol_calls.txt").read_text().splitlines()
+    assert scontrol_calls == ["update JobId=101 Dependency=afterok:102"]
+
+    # No escalations left, hence the task fails now.
+    (tmp_path / "sacct").unlink()
+    fake_command("sacct", "102|OUT_OF_MEMORY|00:00:10|\n101|PENDING|00:00:00|")
+    executor.poll()
+    assert task.status[0] == TaskStatus.FAILED
+    assert task.failed_attempts == ["OUT_OF_MEMORY", "OUT_OF_MEMORY"]
+    assert dependent.status[0] == TaskStatus.DEPFAILED
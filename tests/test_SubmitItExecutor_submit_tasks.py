@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from depio.Task import Task
+from depio.TaskStatus import TaskStatus
+
+from conftest import dummyfunc
+
+
+@pytest.fixture
+def make_tasks(make_task):
+    def make(n, slurm_parameters=None, depends_on=None):
+        tasks = [make_task(f"t{i}", args=[i], slurm_parameters=slurm_parameters) for i in range(n)]
+        for task in tasks:
+            task.task_dependencies = depends_on or []
+        return tasks
+    return make
+
+
+def test_submit_tasks_groups_homogeneous_tasks_into_arrays(make_tasks, make_submitit_executor):
+    executor = make_submitit_executor(max_array_size=4)
+    tasks = make_tasks(10)
+    executor.submit_tasks(tasks)
+
+    assert [n for _, n in executor.internal_executor.submissions] == [4, 4, 2]
+    assert tasks[0].slurmjob.job_id == "100_0"
+    assert tasks[9].slurmjob.job_id == "102_1"
+    assert tasks[9].slurmid == "102_1-0"
+    assert len(executor.state_poller.tracked_tasks) == 10
+
+
+def test_submit_tasks_splits_by_parameters_and_dependencies(make_tasks, make_submitit_executor):
+    executor = make_submitit_executor()
+    dependency = make_tasks(1)[0]
+    executor.submit(dependency, [])
+
+    tasks = make_tasks(3) + make_tasks(2, slurm_parameters={"slurm_mem": 2}) + make_tasks(2, depends_on=[dependency])
+    executor.submit_tasks(tasks)
+
+    submissions = executor.internal_executor.submissions[1:]
+    assert sorted(n for _, n in submissions) == [2, 2, 3]
+    dependencies = {p["slurm_additional_parameters"].get("dependency") for p, _ in submissions}
+    assert dependencies == {None, f"afterok:{dependency.slurmjob.job_id}"}
+
+
+def test_submit_tasks_continues_chains_by_aftercorr_arrays(make_task, make_tasks, make_submitit_executor):
+    executor = make_submitit_executor()
+    heads = make_tasks(3)
+    executor.submit_tasks(heads)
+    steps = []
+    for i in [2, 0, 1]:
+        step = make_task(f"step{i}", args=[10 + i])
+        step.task_dependencies = [heads[i]]
+        steps.append(step)
+    joined = make_task("joined", args=[20])
+    joined.task_dependencies = heads[:2]
+    executor.submit_tasks(steps + [joined])
+
+    submissions = executor.internal_executor.submissions
+    assert [n for _, n in submissions] == [3, 3, 1]
+    assert submissions[1][0]["slurm_additional_parameters"]["dependency"] == "aftercorr:100"
+    assert [s.slurmjob.job_id for s in steps] == ["101_2", "101_0", "101_1"]
+    assert submissions[2][0]["slurm_additional_parameters"]["dependency"] == "afterok:100_0:100_1"
+
+
+def test_submit_tasks_without_arrays(make_tasks, make_submitit_executor):
+    executor = make_submitit_executor(max_array_size=1)
+    executor.submit_tasks(make_tasks(3))
+    assert [n for _, n in executor.internal_executor.submissions] == [1, 1, 1]
+
+
+def printingfunc(i: int):
+    print(f"Hello from {i}")
+    if i == 1:
+        raise Exception("This function raises an exception")
+
+
+def test_submit_tasks_packs_tasks_into_one_job(make_task, make_submitit_executor):
+    executor = make_submitit_executor(pack_size=3)
+    tasks = [make_task(f"t{i}", printingfunc, [i]) for i in range(7)]
+    executor.submit_tasks(tasks)
+
+    # Three packed jobs (3 + 3 + 1 tasks) submitted as one job array
+    assert [n for _, n in executor.internal_executor.submissions] == [3]
+    assert tasks[0].slurmjob is tasks[2].slurmjob
+    assert tasks[6].slurmjob is not tasks[5].slurmjob
+    assert tasks[0].packed and not tasks[6].packed
+
+    # Let the first packed job complete
+    executor.state_poller.last_poll_time = time.time()
+    executor.state_poller.min_poll_interval = 1e9
+    for task in tasks[:3]:
+        task.set_slurmstate("COMPLETED")
+    executor.poll()
+
+    assert [t.status[0] for t in tasks[:3]] == [TaskStatus.FINISHED, TaskStatus.FAILED, TaskStatus.FINISHED]
+    assert tasks[0].get_stdout() == "Hello from 0\n"
+    assert tasks[2].get_stdout() == "Hello from 2\n"
+    assert "This function raises an exception" in tasks[1].get_stderr()
+    assert tasks[3].status[0] == TaskStatus.PENDING
+
+
+def test_pack_respects_time_budget(make_submitit_executor):
+    executor = make_submitit_executor(pack_size=10, pack_time_budget=1)
+    tasks = [Task(f"t{i}", dummyfunc, [i], expected_duration=25) for i in range(5)]
+    assert [len(pack) for pack in executor._pack(tasks)] == [2, 2, 1]
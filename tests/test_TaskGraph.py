@@ -0,0 +1,90 @@
+import pickle
+import weakref
+from pathlib import Path
+from typing import Annotated, List
+
+from depio.Pipeline import Pipeline
+from depio.Task import Dependency, Product, Task
+from depio.TaskGraph import TaskGraph
+
+from conftest import dummyfunc
+
+
+def make_tasks(n):
+    tasks = [Task(f"t{i}", dummyfunc, [i]) for i in range(n)]
+    for i, task in enumerate(tasks):
+        task._queue_id = i + 1
+    return tasks
+
+
+def test_adjacency_in_both_directions():
+    # 0 -> 2, 1 -> 2, 2 -> 3, 0 -> 3
+    tasks = make_tasks(4)
+    graph = TaskGraph(tasks, [[], [], [0, 1], [2, 0]])
+
+    assert len(graph) == 4 and graph.num_edges == 4
+    assert list(graph.get_dependency_ids(3)) == [2, 0]
+    assert list(graph.get_dependent_ids(0)) == [2, 3]
+    assert graph.get_dependencies(2) == [tasks[0], tasks[1]]
+    assert graph.get_dependents(2) == [tasks[3]]
+    assert graph.get_dependents(3) == []
+    assert [graph.get_num_dependencies(i) for i in range(4)] == [0, 0, 2, 2]
+    assert list(graph.get_in_degrees()) == [0, 0, 2, 2]
+    assert graph.get_topological_order() == [0, 1, 2, 3]
+
+
+def test_tasks_look_their_neighbors_up_in_the_graph():
+    tasks = make_tasks(3)
+    graph = TaskGraph(tasks, [[], [0], [0, 1]])
+    for task in tasks:
+        task.set_graph(graph)
+
+    assert tasks[2].task_dependencies == [tasks[0], tasks[1]]
+    assert tasks[0].dependent_tasks == [tasks[1], tasks[2]]
+
+    # Explicitly set lists take precedence, e.g., for tasks outside of a pipeline
+    tasks[0].dependent_tasks = []
+    assert tasks[0].dependent_tasks == []
+    assert tasks[1].dependent_tasks == [tasks[2]]
+
+
+def test_pipeline_builds_the_graph(tmp_path):
+    pipeline = Pipeline(None, quiet=True, depio_dir=tmp_path)
+    first = pipeline.add_task(Task("first", dummyfunc, [1], produces=[Path("a.txt")]))
+    second = pipeline.add_task(Task("second", dummyfunc, [2], depends_on=[Path("a.txt"), first]))
+    pipeline._solve_order()
+
+    assert pipeline.graph.num_edges == 1  # The path and the task are the same dependency
+    assert second.task_dependencies == [first] and first.dependent_tasks == [second]
+    assert second.path_dependencies == ()
+    # The equal paths are shared
+    assert second.dependencies[0] is first.products[0]
+
+
+def test_interning_leaves_the_arguments_of_the_user_alone(tmp_path):
+    def merge(inputs: Annotated[List[Path], Dependency], out: Annotated[Path, Product]):
+        pass
+
+    pipeline = Pipeline(None, quiet=True, depio_dir=tmp_path)
+    first = pipeline.add_task(Task("first", dummyfunc, [1], produces=[Path("a.txt")]))
+    inputs = [Path("a.txt")]
+    kwargs = {"inputs": inputs, "out": Path("b.txt")}
+    second = pipeline.add_task(Task("second", merge, func_kwargs=kwargs))
+
+    assert second.func_kwargs["inputs"][0] is first.products[0]
+    assert kwargs == {"inputs": inputs, "out": Path("b.txt")} and kwargs["inputs"] is inputs
+    assert inputs[0] is not first.products[0]
+
+
+def test_task_is_compact():
+    task = Task("t", dummyfunc, [1])
+    assert not hasattr(task, "__dict__")
+    assert task._stdout is None  # The capture is allocated on the first write
+
+    task.stdout.write("hello")
+    copy = pickle.loads(pickle.dumps(task))
+    assert copy.get_stdout() == "hello"
+    assert copy == task and hash(copy) == hash(task)
+
+    # Caches and observers may still hold weak references to tasks
+    assert weakref.ref(task)() is task
@@ -0,0 +1,77 @@
+# test_Task_TaskSchema_get_annotated_args.py
+
+import unittest
+from pathlib import Path
+from typing import Annotated, List
+
+from depio.Task import TaskSchema, Product, Dependency, IgnoredForEq
+
+
+class TestGetAnnotatedArgs(unittest.TestCase):
+
+    def test_get_annotated_args(self):
+        """Test TaskSchema.get_annotated_args"""
+
+        def dummy_function(inputa :Annotated[str, Product]) -> None: pass
+
+        expected_result = ['inputa']
+        parsed_annotations = TaskSchema(dummy_function).get_annotated_args({}, Product)
+        self.assertEqual(parsed_annotations, expected_result)
+
+    def test_get_annotated_args_return(self):
+        """Test TaskSchema.get_annotated_args"""
+
+        def dummy_function() -> Annotated[str, Product]: pass
+
+        expected_result = ['return']  # 'return' is the annotation name for function return type
+        parsed_annotations = TaskSchema(dummy_function).get_annotated_args({}, Product)
+        self.assertEqual(parsed_annotations, expected_result)
+
+    def test_get_annotated_args_no_args(self):
+        """Test TaskSchema.get_annotated_args"""
+
+        def dummy_function() -> None: pass
+
+        parsed_annotations = TaskSchema(dummy_function).get_annotated_args({}, Product)
+        self.assertEqual(parsed_annotations, [])
+
+    def test_get_annotated_args_no_metaclass(self):
+        """Test TaskSchema.get_annotated_args when no matching metaclass in annotation"""
+
+        # Change metaclass in function annotation
+        def dummy_function() -> Annotated[str, list]: pass
+
+        parsed_annotations = TaskSchema(dummy_function).get_annotated_args({}, Product)
+        self.assertEqual(parsed_annotations, [])
+
+    def test_get_annotated_args_other_metaclass(self):
+        """Test TaskSchema.get_annotated_args when the parameter is annotated with another metaclass"""
+
+        def dummy_function(inputa :Annotated[Path, Dependency], b :Annotated[int, IgnoredForEq]) -> None: pass
+
+        schema = TaskSchema(dummy_function)
+        self.assertEqual(schema.get_annotated_args({}, Product), [])
+        self.assertEqual(schema.get_annotated_args({}, Dependency), ['inputa'])
+        self.assertEqual(schema.get_annotated_args({}, IgnoredForEq), ['b'])
+
+    def test_get_annotated_args_no_annotations(self):
+        """Test TaskSchema.get_annotated_args when no function annotations"""
+
+        def dummy_function(a, b): pass  # No type annotations
+
+        parsed_annotations = TaskSchema(dummy_function).get_annotated_args({}, Product)
+        self.assertEqual(parsed_annotations, [])
+
+    def test_get_annotated_args_list(self):
+        """Test TaskSchema.get_annotated_args when a list of products gets expanded"""
+
+        def dummy_function(outs :Annotated[List[Path], Product]) -> None: pass
+
+        schema = TaskSchema(dummy_function)
+        parsed_annotations = schema.get_annotated_args({'outs': [Path("a"), Path("b")]}, Product)
+        self.assertEqual(parsed_annotations, ['outs_0', 'outs_1'])
+        self.assertEqual(schema.get_annotated_args({'outs': Path("a")}, Product), ['outs'])
+
+
+if __name__ == '__main__':
+    unittest.main()
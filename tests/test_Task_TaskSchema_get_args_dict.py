@@ -1,6 +1,6 @@
 import unittest
 
-from depio.Task import _get_args_dict
+from depio.Task import TaskSchema
 
 
 class TestGetArgsDict(unittest.TestCase):
@@ -9,30 +9,38 @@ class TestGetArgsDict(unittest.TestCase):
         def test_fn(a, b, c):
             pass
 
-        result = _get_args_dict(test_fn, [1, 2, 3], {})
+        result = TaskSchema(test_fn).get_args_dict([1, 2, 3], {})
         self.assertEqual(result, {'a': 1, 'b': 2, 'c': 3})
 
     def test_get_args_dict_with_kwargs(self):
         def test_fn(a, b, c, **kwargs):
             pass
 
-        result = _get_args_dict(test_fn, [1, 2, 3], {'d': 4, 'e': 5})
+        result = TaskSchema(test_fn).get_args_dict([1, 2, 3], {'d': 4, 'e': 5})
         self.assertEqual(result, {'a': 1, 'b': 2, 'c': 3, 'd': 4, 'e': 5})
 
     def test_get_args_dict_with_kwargs_swapped(self):
         def test_fn(a, b, c, **kwargs):
             pass
 
-        result = _get_args_dict(test_fn, [1, 2, 3], {'d': 5, 'e': 4})
+        result = TaskSchema(test_fn).get_args_dict([1, 2, 3], {'d': 5, 'e': 4})
         self.assertEqual(result, {'a': 1, 'b': 2, 'c': 3, 'd': 5, 'e': 4})
 
     def test_get_args_dict_with_partial_args_and_kwargs(self):
         def test_fn(a, b, c, *args, **kwargs):
             pass
 
-        result = _get_args_dict(test_fn, [1], {'b': 2, 'c': 3, 'd': 4})
+        result = TaskSchema(test_fn).get_args_dict([1], {'b': 2, 'c': 3, 'd': 4})
         self.assertEqual(result, {'a': 1, 'b': 2, 'c': 3, 'd': 4})
 
+    def test_get_args_dict_without_args_is_kwargs(self):
+        def test_fn(a, b):
+            pass
+
+        kwargs = {'a': 1, 'b': 2}
+        result = TaskSchema(test_fn).get_args_dict([], kwargs)
+        self.assertIs(result, kwargs)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -63,3 +63,17 @@ def test_task_eq_same_name():
     assert task1 == task2
 
 
+def test_task_hash_equal_for_equal_tasks():
+    task1 = Task("task1", func1, [[1, 2], {'x': [3]}, None])
+    task2 = Task("task2", func1, [[1, 2], {'x': [3]}, None])
+    assert task1 == task2
+    assert hash(task1) == hash(task2)
+
+
+def test_task_eq_unaffected_by_later_changes_to_kwargs():
+    kwargs = {'a': 1, 'b': 2}
+    task1 = Task("task", func1, None, kwargs)
+    kwargs['b'] = 3
+    task2 = Task("task", func1, None, {'a': 1, 'b': 2})
+    assert task1.cleaned_args == {'a': 1, 'b': 2}
+    assert task1 == task2
@@ -0,0 +1,83 @@
+import os
+import pathlib
+from typing import Annotated
+
+import pytest
+
+from depio.BuildMode import BuildMode
+from depio.Executors import SequentialExecutor
+from depio.Pipeline import Pipeline
+from depio.SignatureDatabase import SignatureDatabase
+from depio.Task import Task, Product, Dependency
+
+
+def copyfunc(input: Annotated[pathlib.Path, Dependency], output: Annotated[pathlib.Path, Product]):
+    output.write_text(input.read_text())
+
+
+@pytest.fixture
+def make_copy_task(make_task, tmp_path):
+    def make(db):
+        task = make_task("copy", copyfunc, [tmp_path / "input.txt", tmp_path / "output.txt"],
+                         buildmode=BuildMode.IF_CHANGED)
+        task.signature_db = db
+        task.path_dependencies = [tmp_path / "input.txt"]
+        return task
+    return make
+
+
+def test_should_run_if_changed(tmp_path, make_copy_task):
+    db = SignatureDatabase(tmp_path / "db" / "signatures.sqlite")
+    (tmp_path / "input.txt").write_text("hello")
+
+    task = make_copy_task(db)
+    assert task.should_run()  # Product missing
+    task.run()
+    assert task.should_run()  # No signature recorded yet
+    task.record_signature()
+    assert not task.should_run()
+
+    # A touch does not change the content
+    st = (tmp_path / "input.txt").stat()
+    os.utime(tmp_path / "input.txt", ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert not make_copy_task(db).should_run()
+
+    # A different content does
+    (tmp_path / "input.txt").write_text("hello world")
+    assert make_copy_task(db).should_run()
+
+
+def test_should_run_if_changed_survives_reopening_the_database(tmp_path, make_copy_task):
+    (tmp_path / "input.txt").write_text("hello")
+    db = SignatureDatabase(tmp_path / "signatures.sqlite")
+    task = make_copy_task(db)
+    task.run()
+    task.record_signature()
+    db.close()
+
+    assert not make_copy_task(SignatureDatabase(tmp_path / "signatures.sqlite")).should_run()
+
+
+def upperfunc(source: pathlib.Path, output: Annotated[pathlib.Path, Product]):
+    output.write_text(source.read_text().upper())
+
+
+def test_should_run_if_changed_with_task_dependency(tmp_path):
+    def run_pipeline():
+        pipeline = Pipeline(SequentialExecutor(), quiet=True, depio_dir=tmp_path / "depio")
+        up = pipeline.add_task(Task("up", copyfunc, [tmp_path / "input.txt", tmp_path / "up.txt"],
+                                    buildmode=BuildMode.IF_CHANGED))
+        # The source is not annotated, the dependency on the product of up is only known through the task
+        pipeline.add_task(Task("down", upperfunc, [tmp_path / "up.txt", tmp_path / "down.txt"], depends_on=[up],
+                               buildmode=BuildMode.IF_CHANGED))
+        with pytest.raises(SystemExit) as e:
+            pipeline.run()
+        assert e.value.code == 0
+
+    (tmp_path / "input.txt").write_text("v1")
+    run_pipeline()
+    assert (tmp_path / "down.txt").read_text() == "V1"
+
+    (tmp_path / "input.txt").write_text("v2")
+    run_pipeline()
+    assert (tmp_path / "down.txt").read_text() == "V2"
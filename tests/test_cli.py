@@ -0,0 +1,51 @@
+import pytest
+
+from depio import cli
+from depio.BuildMode import BuildMode
+from depio.Executors import ParallelExecutor
+from depio.Manifest import Manifest
+from depio.Pipeline import Pipeline
+from depio.Task import Task
+
+from conftest import dummyfunc
+
+
+def submit_detached(tmp_path, make_submitit_executor):
+    executor = make_submitit_executor()
+    pipeline = Pipeline(executor, quiet=True, depio_dir=tmp_path, name="demo", detached=True)
+    a = pipeline.add_task(Task("a", dummyfunc, [1], buildmode=BuildMode.ALWAYS))
+    b = pipeline.add_task(Task("b", dummyfunc, [2], depends_on=[a], buildmode=BuildMode.ALWAYS))
+    pipeline.add_task(Task("c", dummyfunc, [3], depends_on=[b], buildmode=BuildMode.ALWAYS))
+    with pytest.raises(SystemExit) as e:
+        pipeline.run()
+    assert e.value.code == 0
+    return tmp_path / "manifest_demo.json"
+
+
+def test_detached_pipeline_submits_whole_dag_and_writes_manifest(tmp_path, make_submitit_executor):
+    manifest = Manifest.read(submit_detached(tmp_path, make_submitit_executor))
+    assert [t["job_id"] for t in manifest.tasks] == ["100", "101", "102"]
+    assert [t["dependencies"] for t in manifest.tasks] == [[], [1], [2]]
+
+
+def test_detached_mode_requires_executor_handling_dependencies():
+    with pytest.raises(ValueError):
+        Pipeline(ParallelExecutor(), quiet=True, detached=True)
+
+
+def test_status_propagates_failures(tmp_path, capsys, fake_command, make_submitit_executor):
+    manifest_path = submit_detached(tmp_path, make_submitit_executor)
+    sacct = fake_command("sacct", "100|COMPLETED\n101|FAILED\n102|PENDING")
+    manifest = Manifest.read(manifest_path)
+    statuses = cli.get_statuses(manifest, cli.SlurmStatePoller(sacct_command=str(sacct)))
+    assert [s.name for s in statuses.values()] == ["FINISHED", "FAILED", "DEPFAILED"]
+
+    assert cli.main(["status", str(manifest_path), "--sacct", str(sacct)]) == 0
+    assert "DEPFAILED: 1, FAILED: 1, FINISHED: 1" in capsys.readouterr().out
+    assert cli.main(["wait", str(manifest_path), "--sacct", str(sacct), "--interval", "0"]) == 1
+
+
+def test_wait_until_done(tmp_path, fake_command, make_submitit_executor):
+    manifest_path = submit_detached(tmp_path, make_submitit_executor)
+    sacct = fake_command("sacct", "100|COMPLETED\n101|COMPLETED\n102|COMPLETED")
+    assert cli.main(["wait", str(manifest_path), "--sacct", str(sacct), "--interval", "0"]) == 0
@@ -0,0 +1,94 @@
+from pathlib import Path
+from typing import Annotated
+
+from depio.BuildMode import BuildMode
+from depio.Task import Product, Task
+from depio.file_helpers import StatCache, stat_cache
+
+from conftest import dummyfunc
+
+
+def test_stat_cache_caches_until_cleared(tmp_path):
+    cache = StatCache()
+    f = tmp_path / "file.txt"
+    with cache.tick():
+        assert not cache.exists(f)
+
+        f.write_text("hello")
+        assert not cache.exists(f)  # Still cached
+
+        generation = cache.generation
+        cache.clear()
+        assert cache.generation == generation + 1
+        assert cache.exists(f)
+        assert cache.getmtime(f) == f.stat().st_mtime
+
+
+def test_stat_cache_invalidate(tmp_path):
+    cache = StatCache()
+    f = tmp_path / "file.txt"
+    with cache.tick():
+        assert not cache.exists(f)
+        f.write_text("hello")
+        cache.invalidate([f])
+        assert cache.exists(f)
+
+
+def test_stat_cache_outside_of_a_tick_is_live(tmp_path):
+    cache = StatCache()
+    f = tmp_path / "file.txt"
+    with cache.tick():
+        assert not cache.exists(f)
+    assert not cache.active
+
+    f.write_text("hello")
+    assert cache.exists(f)
+    f.unlink()
+    assert not cache.exists(f)
+
+
+def test_nested_tick_keeps_the_cache_of_the_outer_one(tmp_path):
+    cache = StatCache()
+    f = tmp_path / "file.txt"
+    with cache.tick():
+        assert not cache.exists(f)
+        generation = cache.generation
+        f.write_text("hello")
+        with cache.tick():
+            assert not cache.exists(f)  # Still cached
+            assert cache.generation == generation
+        assert cache.active and not cache.exists(f)
+    assert cache.exists(f)
+
+
+def test_should_run_if_new_is_memoized(monkeypatch):
+    # A lattice of width two: without memoization this would take 2^depth calls.
+    depth = 30
+    layers = [[Task("t", dummyfunc, [0, 0], buildmode=BuildMode.IF_NEW)]]
+    for d in range(1, depth):
+        layers.append([Task("t", dummyfunc, [d, i], buildmode=BuildMode.IF_NEW) for i in range(2)])
+    for d, layer in enumerate(layers):
+        for task in layer:
+            task.task_dependencies = layers[d - 1] if d > 0 else []
+
+    calls = []
+    original = Task._should_run
+    monkeypatch.setattr(Task, "_should_run", lambda self: calls.append(self) or original(self))
+
+    with stat_cache.tick():
+        assert not layers[-1][0].should_run()
+    assert len(calls) <= 2 * depth
+
+
+def test_should_run_is_not_memoized_outside_of_a_tick(tmp_path):
+    product = tmp_path / "out.txt"
+    task = Task("t", productfunc, [product])
+    with stat_cache.tick():
+        assert task.should_run()
+
+    product.write_text("done")
+    assert not task.should_run()
+
+
+def productfunc(out: Annotated[Path, Product]):
+    pass
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def imported_modules(statement: str):
+    """Run the statement in a fresh interpreter and return the names of the imported modules."""
+    env = {**os.environ, "PYTHONPATH": f"{SRC}{os.pathsep}{os.environ.get('PYTHONPATH', '')}"}
+    result = subprocess.run([sys.executable, "-c", f"{statement}; import sys; print(' '.join(sys.modules))"],
+                            capture_output=True, text=True, check=True, env=env)
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize("module", ["depio.Task", "depio.Executors", "depio.Pipeline"])
+def test_import_does_not_load_heavy_dependencies(module):
+    modules = imported_modules(f"import {module}")
+    assert module in modules
+    for dependency in ["submitit", "rich", "termcolor", "tabulate", "werkzeug"]:
+        assert dependency not in modules
+
+
+def test_submitit_is_imported_on_first_use(tmp_path):
+    modules = imported_modules(f"from depio.Executors import SubmitItExecutor; "
+                               f"SubmitItExecutor(folder={str(tmp_path / 'slurm')!r})")
+    assert "submitit" in modules
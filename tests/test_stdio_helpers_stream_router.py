@@ -0,0 +1,84 @@
+import io
+import sys
+import threading
+
+from depio.BuildMode import BuildMode
+from depio.Executors import ParallelExecutor
+from depio.Task import Task
+from depio.stdio_helpers import StreamRouter, enable_proxy, redirect, stop_redirect
+
+
+def printingfunc(i: int):
+    print(f"out {i}")
+    print(f"err {i}", file=sys.stderr)
+
+
+def route_in_thread(router_out, router_err, out, err, text):
+    def run():
+        redirect(out, err)
+        router_out.write(f"{text}\n")
+        router_err.write(f"{text} error\n")
+        stop_redirect()
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+
+
+def test_router_routes_each_thread_to_its_streams():
+    original_out, original_err = io.StringIO(), io.StringIO()
+    router_out, router_err = StreamRouter(original_out, "stdout"), StreamRouter(original_err, "stderr")
+    buffers = [(io.StringIO(), io.StringIO()) for _ in range(3)]
+    for i, (out, err) in enumerate(buffers):
+        route_in_thread(router_out, router_err, out, err, f"thread {i}")
+    router_out.write("main\n")
+
+    assert [out.getvalue() for out, _ in buffers] == [f"thread {i}\n" for i in range(3)]
+    assert [err.getvalue() for _, err in buffers] == [f"thread {i} error\n" for i in range(3)]
+    assert original_out.getvalue() == "main\n"
+    assert original_err.getvalue() == ""
+
+
+def test_router_line_buffering():
+    class CountingStream(io.StringIO):
+        writes = 0
+
+        def write(self, s):
+            self.writes += 1
+            return super().write(s)
+
+    router = StreamRouter(io.StringIO(), "stdout", line_buffering=True)
+    stream = CountingStream()
+    redirect(stream)
+    try:
+        print("hello", "world", file=router)
+        router.write("partial")
+        assert stream.writes == 1
+        router.flush()
+    finally:
+        stop_redirect()
+    assert stream.getvalue() == "hello world\npartial"
+    assert stream.writes == 2
+
+
+def test_enable_proxy_does_not_nest(monkeypatch):
+    for name in ["stdout", "stderr", "__stdout__", "__stderr__"]:
+        monkeypatch.setattr(sys, name, io.StringIO())
+    enable_proxy()
+    router = sys.stdout
+    enable_proxy()
+    assert sys.stdout is router
+    assert isinstance(sys.stderr, StreamRouter)
+
+
+def test_task_stderr_is_routed_to_task():
+    enable_proxy()
+    executor = ParallelExecutor()
+    tasks = [Task(f"t{i}", printingfunc, [i], buildmode=BuildMode.ALWAYS) for i in range(4)]
+    for task in tasks:
+        task.path_dependencies = []  # Set by the pipeline otherwise
+        executor.submit(task)
+    executor.wait_for_all()
+
+    for i, task in enumerate(tasks):
+        assert task.get_stdout() == f"out {i}\n"
+        assert task.get_stderr() == f"err {i}\n"